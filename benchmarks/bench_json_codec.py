@@ -0,0 +1,55 @@
+"""
+Benchmark of the JSON codecs on a synthetic results payload.
+
+The payload mimics the response of GET /alpha/results for an experiment
+with three parameters and one outcome, as fetched by SimpleREST.get_results.
+Only the codecs installed are measured.
+
+Usage: python benchmarks/bench_json_codec.py [number of results]
+"""
+
+import sys
+import time
+import random
+
+from whetlab.server.http_client.codec import Codec
+
+def make_payload(n_results):
+    results = []
+    for id in range(n_results):
+        variables = [{'id': 4 * id + i, 'setting': i, 'result': id, 'name': name, 'value': value}
+                     for i, (name, value) in enumerate([('learning_rate', random.random()),
+                                                        ('n_hidden', random.randint(1, 1000)),
+                                                        ('activation', 'relu'),
+                                                        ('accuracy', random.random())])]
+        results.append({'id': id, 'experiment': 1, 'userProposed': False,
+                        'description': '', 'variables': variables})
+    return {'count': n_results, 'next': None, 'previous': None, 'results': results}
+
+def best_time(fn, repeat=3):
+    times = []
+    for i in range(repeat):
+        start = time.time()
+        fn()
+        times.append(time.time() - start)
+    return min(times)
+
+def main(n_results=50000):
+    payload = make_payload(n_results)
+    content = Codec.get('json').dumps(payload)
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+
+    print('payload: %d results, %.1f MB' % (n_results, len(content) / 1e6))
+    print('%-12s %12s %12s' % ('codec', 'loads (ms)', 'dumps (ms)'))
+    for name in Codec.PREFERENCE:
+        if name not in Codec.registry:
+            continue
+        codec = Codec.get(name)
+        loads = best_time(lambda: codec.loads(content))
+        dumps = best_time(lambda: codec.dumps(payload))
+        print('%-12s %12.1f %12.1f' % (name, 1e3 * loads, 1e3 * dumps))
+    print('auto codec: %s' % Codec.get().name)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,62 @@
+"""
+Offline benchmark of the suggest/update loop of an Experiment.
+
+The calls made by an Experiment which is resumed and then runs a number of
+suggest/update iterations are recorded to a cassette from the stand-in
+server (see whetlab.standin), which is then stopped. The loop is run again
+against the cassette with the 'replay' cassette mode, so that no server is
+needed. The time per iteration is reported with no added latency and with a
+simulated server latency, along with the per-endpoint statistics.
+
+Usage: python benchmarks/bench_replay.py [iterations] [latency in seconds]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import whetlab
+from whetlab.standin import StandinServer
+
+PARAMETERS = {'x': {'type': 'float', 'min': 0., 'max': 1.},
+              'n': {'type': 'integer', 'min': 1, 'max': 100}}
+
+OUTCOME = {'name': 'outcome'}
+
+# Results of the experiment before the loop
+SEEDED_RESULTS = 50
+
+def run(options, iterations):
+    options = dict(options, experiment_index=None)
+    with whetlab.Experiment('bench', access_token='token', parameters=PARAMETERS, outcome=OUTCOME,
+                            client_options=options) as experiment:
+        start = time.time()
+        for i in range(iterations):
+            job = experiment.suggest()
+            experiment.update(job, job['x'] * job['n'])
+        return (time.time() - start) / iterations, experiment.stats()
+
+def record(path, iterations):
+    """ Record the interactions of resuming an experiment and running the suggest/update loop. """
+
+    with StandinServer() as server:
+        server.store.seed('bench', SEEDED_RESULTS, PARAMETERS)
+        run({'base': server.url, 'cassette': path, 'cassette_mode': 'record'}, iterations)
+        return server.url
+
+def main(iterations=1000, latency=0.001):
+    path = os.path.join(tempfile.mkdtemp(), 'suggest_update.cassette')
+    base = record(path, iterations)
+
+    for name, delay in [('no latency', None), ('%g s latency' % latency, latency)]:
+        options = {'base': base, 'cassette': path, 'cassette_mode': 'replay', 'replay_latency': delay}
+        per_iteration, stats = run(options, iterations)
+        print('%-16s %8.3f ms per suggest/update iteration' % (name, 1e3 * per_iteration))
+
+    print('%-40s %8s %14s' % ('endpoint', 'calls', 'mean (ms)'))
+    for endpoint, endpoint_stats in sorted(stats['endpoints'].items()):
+        print('%-40s %8d %14.3f' % (endpoint, endpoint_stats['calls'], 1e3 * endpoint_stats['mean_latency']))
+
+if __name__ == '__main__':
+    main(*[float(arg) if '.' in arg else int(arg) for arg in sys.argv[1:]])
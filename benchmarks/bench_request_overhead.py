@@ -0,0 +1,110 @@
+"""
+Micro-benchmark of the per-call overhead of HttpClient.request.
+
+The network is taken out of the picture by a session which answers every
+request with the same canned response, so that what is measured is the
+time spent building the request and decoding the response. The request
+path as it was before the request template was introduced is reproduced
+in ``legacy_request`` for comparison.
+
+Usage: python benchmarks/bench_request_overhead.py [number of calls]
+"""
+
+import sys
+import copy
+import timeit
+import platform
+import os
+import requests
+
+try:
+    import urlparse
+except ImportError:
+    import urllib.parse as urlparse
+
+from whetlab.server.http_client import HttpClient
+from whetlab.server.http_client.error_handler import ErrorHandler
+from whetlab.server.http_client.response import Response
+
+class CannedSession(requests.Session):
+    """ Session answering every request with the same JSON response. """
+
+    def __init__(self, content):
+        super(CannedSession, self).__init__()
+        self.content = content
+
+    def request(self, method, url, **kwargs):
+        response = requests.models.Response()
+        response.status_code = 200
+        response.headers['content-type'] = 'application/json'
+        response._content = self.content
+        response.url = url
+        for hook in kwargs.get('hooks', {}).values():
+            hook(response)
+        return response
+
+def legacy_request(client, path, body, method, options):
+    """ HttpClient.request and create_request, as they were before the request template. """
+
+    kwargs = copy.deepcopy(client.options)
+    kwargs.update(options)
+    kwargs['headers'] = copy.deepcopy(client.headers)
+    if 'headers' in options:
+        kwargs['headers'].update(client.dict_key_lower(options['headers']))
+    kwargs['data'] = body
+    kwargs['allow_redirects'] = True
+    kwargs['params'] = kwargs['query'] if 'query' in kwargs else {}
+    if 'query' in kwargs:
+        del kwargs['query']
+    if 'body' in kwargs:
+        del kwargs['body']
+    del kwargs['base']
+    del kwargs['user_agent']
+    if body is not None:
+        try:
+            body['sys_info'] = list(platform.uname())
+        except:
+            pass
+        try:
+            body['load_info'] = os.getloadavg()
+        except:
+            pass
+    if method != 'get':
+        kwargs = client.set_body(kwargs)
+    kwargs['hooks'] = dict(response=ErrorHandler.check_error)
+    kwargs = client.auth.set(kwargs)
+
+    version = '/' + kwargs['api_version'] if 'api_version' in kwargs else ''
+    url = urlparse.urljoin(client.base, version + path)
+    if 'api_version' in kwargs:
+        del kwargs['api_version']
+    if 'response_type' in kwargs:
+        del kwargs['response_type']
+    response = client.session.request(method, url, **kwargs)
+    return Response(client.get_body(response), response.status_code, response.headers)
+
+def make_client():
+    options = {'headers': {'Authorization': 'Bearer token'},
+               'user_agent': 'whetlab_python_client',
+               'api_version': 'api',
+               'base': 'https://www.whetlab.com'}
+    client = HttpClient({}, options)
+    client.session = CannedSession(b'{"id": 1, "variables": []}')
+    return client
+
+def main(number=20000):
+    client = make_client()
+
+    calls = [
+        ('get', lambda request: request(client, '/alpha/results/12/', None, 'get', {'query': {}})),
+        ('post', lambda request: request(client, '/alpha/results/', {'variables': []}, 'post', {})),
+    ]
+
+    print('%-6s %14s %14s' % ('method', 'before (us)', 'after (us)'))
+    for name, call in calls:
+        before = min(timeit.repeat(lambda: call(legacy_request), number=number, repeat=3))
+        after = min(timeit.repeat(lambda: call(HttpClient.request), number=number, repeat=3))
+        print('%-6s %14.2f %14.2f' % (name, 1e6 * before / number, 1e6 * after / number))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,100 @@
+"""
+Benchmark of the response path of HttpClient on large payloads.
+
+Each call is answered by a session with the same canned response (a page of
+results, or a client error), so that what is measured is the processing of
+the response: error classification and decoding. The response path as it
+was before the single processing stage (error hook, ``range`` checks, body
+decoded by the hook and again by ``get_body``) is reproduced in
+``legacy_response`` for comparison.
+
+Usage: python benchmarks/bench_response_path.py [number of results] [number of calls]
+"""
+
+import sys
+import json
+import timeit
+import requests
+
+from whetlab.server.error import ClientError
+from whetlab.server.http_client import HttpClient
+from whetlab.server.http_client.response_handler import ResponseHandler
+
+class LegacyResponse():
+    """ Response as it was before __slots__ and the lazy body. """
+
+    def __init__(self, body, code, headers):
+        self.body = body
+        self.code = code
+        self.headers = headers
+
+def legacy_check_error(response, codec):
+    """ ErrorHandler.check_error as it was, run as a response hook. """
+
+    code = response.status_code
+    typ = response.headers.get('content-type')
+    if code in range(500, 600):
+        raise ClientError('There was a problem with the server.', code)
+    elif code in range(400, 500):
+        body = ResponseHandler.get_body(response, codec)
+        message = body['error'] if typ.find('json') != -1 and 'error' in body else ''
+        raise ClientError(message, code)
+
+def legacy_response(client):
+    response = client.session.request('get', 'http://localhost/api/alpha/results')
+    legacy_check_error(response, client.codec)
+    return LegacyResponse(client.get_body(response), response.status_code, response.headers)
+
+def current_response(client):
+    return client.send('get', '/alpha/results', 'http://localhost/api/alpha/results', {})
+
+class CannedSession(requests.Session):
+    """ Session answering every request with the same response. """
+
+    def __init__(self, code, content):
+        super(CannedSession, self).__init__()
+        self.code = code
+        self.content = content
+
+    def request(self, method, url, **kwargs):
+        response = requests.models.Response()
+        response.status_code = self.code
+        response.headers['content-type'] = 'application/json'
+        response._content = self.content
+        response.url = url
+        return response
+
+def payload(n_results):
+    results = [{'id': i, 'experiment': 1, 'userProposed': False, 'description': '',
+                'variables': [{'id': 3*i + j, 'name': name, 'value': 0.5, 'setting': j}
+                              for j, name in enumerate(['x', 'y', 'outcome'])]}
+               for i in range(n_results)]
+    return json.dumps({'count': n_results, 'next': None, 'previous': None, 'results': results})
+
+def call(process, client, read_body):
+    def run():
+        try:
+            response = process(client)
+            if read_body:
+                response.body
+        except ClientError:
+            pass
+    return run
+
+def main(n_results=5000, number=20):
+    content = payload(n_results)
+    cases = [('200, body read', 200, content, True),
+             ('200, body unread', 200, content, False),
+             ('400 error', 400, json.dumps({'error': 'Bad request', 'detail': content}), True)]
+
+    print('%d results, %.1f MB' % (n_results, len(content) / 1e6))
+    print('%-18s %14s %14s' % ('response', 'before (ms)', 'after (ms)'))
+    for name, code, content, read_body in cases:
+        client = HttpClient({}, {'base': 'http://localhost', 'single_flight': False})
+        client.session = CannedSession(code, content)
+        before = min(timeit.repeat(call(legacy_response, client, read_body), number=number, repeat=3))
+        after = min(timeit.repeat(call(current_response, client, read_body), number=number, repeat=3))
+        print('%-18s %14.2f %14.2f' % (name, 1e3 * before / number, 1e3 * after / number))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
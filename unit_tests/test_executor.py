@@ -0,0 +1,68 @@
+from nose.tools import *
+import time
+import threading
+from whetlab.server.executor import Executor, Future, TimeoutError, ShutdownError
+
+class TestExecutor:
+
+    def setup(self):
+        self.executor = Executor(4)
+
+    def teardown(self):
+        self.executor.shutdown()
+
+    def test_submit(self):
+        """ Submitted calls are run in the background and their results are returned in their futures. """
+
+        futures = [self.executor.submit(pow, i, 2) for i in range(20)]
+        assert_equals([f.result(1) for f in futures], [i**2 for i in range(20)])
+
+    def test_exception(self):
+        """ Exceptions raised by a call are raised again by the result of its future. """
+
+        future = self.executor.submit(int, 'not a number')
+        assert isinstance(future.exception(1), ValueError)
+        assert_raises(ValueError, future.result)
+
+    def test_workers_run_concurrently(self):
+        """ Calls are spread on all the workers. """
+
+        barrier = threading.Semaphore(0)
+        def wait():
+            barrier.release()
+            time.sleep(0.1)
+            return threading.current_thread()
+
+        futures = [self.executor.submit(wait) for i in range(4)]
+        assert_equals(len(set(f.result(1) for f in futures)), 4)
+
+    def test_call_later(self):
+        """ Delayed calls are run once their delay has passed, in order of their due time. """
+
+        order = []
+        start = time.time()
+        late = self.executor.call_later(0.2, order.append, 'late')
+        early = self.executor.call_later(0.1, order.append, 'early')
+        late.result(1)
+        early.result(1)
+        assert time.time() - start >= 0.2
+        assert_equals(order, ['early', 'late'])
+
+    def test_shutdown_with_timers(self):
+        """ Delayed calls not due yet when the executor is shut down fail, instead of never finishing. """
+
+        future = self.executor.call_later(60, int, '1')
+        self.executor.shutdown()
+        assert isinstance(future.exception(1), ShutdownError)
+        assert_raises(RuntimeError, self.executor.call_later, 0, int, '1')
+
+    def test_done_callback(self):
+        """ Done callbacks are called with the future, including when added after it is done. """
+
+        future = Future()
+        called = []
+        future.add_done_callback(called.append)
+        assert_raises(TimeoutError, future.result, 0.01)
+        future.set_result(1)
+        future.add_done_callback(called.append)
+        assert_equals(called, [future, future])
@@ -0,0 +1,672 @@
+from nose.tools import *
+import os
+import json
+import time
+import tempfile
+import numpy as np
+import requests
+import threading
+import BaseHTTPServer
+import SocketServer
+import whetlab
+import whetlab.server
+import whetlab.server.http_client
+
+class LocalHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Records every request as it arrives, and answers it with a JSON description of that request after the delay of the server.
+
+    While the server has a version, the document also gives it and is sent with an ETag,
+    or answered with 304 when the client's copy is current.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def handle_request(self):
+        length = int(self.headers.get('content-length', 0))
+        body = self.rfile.read(length) if length else ''
+        etag = None if self.server.version is None else '"v%d"' % self.server.version
+        status = 304 if etag is not None and self.headers.get('if-none-match') == etag else 200
+        self.server.requests.append({'method':self.command, 'path':self.path,
+                                     'headers':dict(self.headers), 'body':body,
+                                     'port':self.client_address[1], 'status':status})
+        time.sleep(self.server.delay)
+
+        content = '' if status == 304 else json.dumps({'path':self.path, 'body':body, 'version':self.server.version})
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        if etag is not None:
+            self.send_header('etag', etag)
+        self.send_header('content-length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = handle_request
+
+    def log_message(self, *args):
+        pass
+
+class ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+class LocalServer:
+    """ HTTP server running in a background thread, recording the requests it receives. """
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), LocalHandler)
+        self.url = 'http://127.0.0.1:%d/' % self.httpd.server_address[1]
+        self.reset()
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def reset(self, delay=0, version=None):
+        """ Forget the requests received, and answer the next ones after delay, with the given version. """
+
+        self.httpd.requests = []
+        self.httpd.delay = delay
+        self.httpd.version = version
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def statuses(self):
+        return [r['status'] for r in self.requests]
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# Server shared by the tests of this module, reset by each of them
+server = None
+
+def setup_module():
+    global server
+    server = LocalServer()
+
+def teardown_module():
+    server.stop()
+
+def counting_codec():
+    """ JSON codec recording the content of each decoding, returned with the list it records to. """
+
+    calls = []
+    def loads(content):
+        calls.append(content)
+        return json.loads(content)
+    return whetlab.server.http_client.Codec('counting', json.dumps, loads), calls
+
+class TestHttpClient:
+
+    def setup(self):
+        server.reset()
+        self.client = whetlab.server.http_client.HttpClient({'access_token':'token'},
+                                                            {'base':server.url, 'api_version':'api'})
+
+    def teardown(self):
+        self.client.close()
+
+    def test_request_path(self):
+        """ Requests are sent under the api version, with the auth parameters. """
+
+        body = self.client.get('/alpha/results/', {'page':2}).body
+        assert_equals(body['path'].split('?')[0], '/api/alpha/results/')
+        assert 'page=2' in body['path']
+        assert 'access_token=token' in body['path']
+
+    def test_connection_reuse(self):
+        """ Consecutive requests go through the same pooled connection. """
+
+        for i in range(5):
+            self.client.get('/alpha/results/', {})
+            self.client.post('/alpha/results/', {'value':i})
+
+        assert_equals(len(server.requests), 10)
+        assert_equals(len(set(r['port'] for r in server.requests)), 1)
+
+    def test_close(self):
+        """ The client can be used as a context manager, which closes its session. """
+
+        with whetlab.server.http_client.HttpClient({}, {'base':server.url}) as client:
+            client.get('/alpha/results/', {})
+        assert_equals(len(client.session.adapters['http://'].poolmanager.pools), 0)
+
+    def test_system_info(self):
+        """ Host information is added to request bodies, without modifying the caller's body. """
+
+        body = {'value':1}
+        self.client.patch('/alpha/results/1/', body)
+        sent = json.loads(server.requests[-1]['body'])
+        assert_equals(body, {'value':1})
+        assert 'sys_info' in sent
+        assert 'load_info' in sent
+
+    def test_system_info_suggest_only(self):
+        """ With option system_info set to 'suggest', only suggest requests carry host information. """
+
+        client = whetlab.server.http_client.HttpClient({}, {'base':server.url, 'system_info':'suggest'})
+        client.patch('/alpha/results/1/', {'value':1})
+        assert 'sys_info' not in json.loads(server.requests[-1]['body'])
+        client.post('/alpha/experiments/1/suggest/', {})
+        assert 'sys_info' in json.loads(server.requests[-1]['body'])
+        client.close()
+
+class TestBatch:
+
+    def setup(self):
+        server.reset()
+        self.client = whetlab.server.Client({}, {'base':server.url, 'batch_workers':4})
+
+    def teardown(self):
+        self.client.close()
+
+    def test_batch_order(self):
+        """ Responses of a batch are returned in the order of the calls. """
+
+        ids = [str(i) for i in range(20)]
+        responses = self.client.batch([self.client.result(id).get for id in ids])
+        assert_equals([r.body['path'].split('?')[0] for r in responses],
+                      ['/alpha/results/%s/' % id for id in ids])
+
+    def test_batch_errors(self):
+        """ An error in a call of a batch is returned in place of its response, or raised on demand. """
+
+        calls = [self.client.result('1').get, (int, 'not a number'), (self.client.result('2').delete,)]
+        responses = self.client.batch(calls)
+        assert_equals(responses[0].body['path'].split('?')[0], '/alpha/results/1/')
+        assert isinstance(responses[1], ValueError)
+        assert_equals(responses[2].code, 200)
+        assert_raises(ValueError, self.client.batch, calls, True)
+
+class TestSingleFlight:
+
+    def setup(self):
+        # Concurrent requests overlap
+        server.reset(delay=0.2)
+
+    def get_concurrently(self, client, paths):
+        responses = [None] * len(paths)
+        def get(i):
+            responses[i] = client.get(paths[i])
+        threads = [threading.Thread(target=get, args=(i,)) for i in range(len(paths))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def test_identical_gets_coalesced(self):
+        """ Identical GETs in flight at the same time share one request, and receive copies of its response. """
+
+        with whetlab.server.http_client.HttpClient({}, {'base':server.url, 'single_flight':True}) as client:
+            responses = self.get_concurrently(client, ['/alpha/results/1/'] * 5 + ['/alpha/results/2/'])
+            coalesced = client.stats()['coalesced'].get('GET /alpha/results/:id/', 0)
+
+        assert_equals(len(server.requests) + coalesced, 6)
+        assert len(server.requests) < 6
+        assert_equals([r.body for r in responses[:5]], [responses[0].body] * 5)
+        # The first call gets its own copy as well
+        assert_equals(len(set(id(r.body) for r in responses)), 6)
+
+    def test_decoded_once(self):
+        """ The response shared by coalesced GETs is decoded once, before it is copied. """
+
+        codec, calls = counting_codec()
+        with whetlab.server.http_client.HttpClient({}, {'base':server.url, 'json_codec':codec, 'single_flight':True}) as client:
+            responses = self.get_concurrently(client, ['/alpha/results/1/'] * 5)
+
+        assert_equals(len(calls), len(server.requests))
+        assert all(r.raw is None for r in responses)
+
+    def test_timeouts(self):
+        """ Requests time out after the read timeout of the client, unless the call gives its own timeout. """
+
+        with whetlab.server.http_client.HttpClient({}, {'base':server.url, 'read_timeout':0.05}) as client:
+            assert_raises(requests.exceptions.RequestException, client.get, '/alpha/results/1/')
+            assert_equals(client.get('/alpha/results/1/', {}, {'timeout':5}).code, 200)
+
+    def test_disabled(self):
+        """ By default, every GET sends its own request. """
+
+        with whetlab.server.http_client.HttpClient({}, {'base':server.url}) as client:
+            self.get_concurrently(client, ['/alpha/results/1/'] * 3)
+        assert_equals(len(server.requests), 3)
+
+class TestResponse:
+
+    def raw(self, code, content):
+        response = requests.models.Response()
+        response.status_code = code
+        response.headers['content-type'] = 'application/json'
+        response._content = content
+        return response
+
+    def test_lazy_body(self):
+        """ The body of a response is decoded when first read, and only once, then the response received is released. """
+
+        codec, calls = counting_codec()
+        response = whetlab.server.http_client.Response.lazy(self.raw(200, '{"id": 1}'), codec)
+        assert_equals(calls, [])
+        assert_equals([response.body, response.body], [{'id':1}, {'id':1}])
+        assert_equals(len(calls), 1)
+        assert response.raw is None
+        assert not hasattr(response, '__dict__')
+
+    def test_error_classification(self):
+        """ Error statuses raise ClientErrors, decoding the body only for client errors. """
+
+        codec, calls = counting_codec()
+        check = whetlab.server.http_client.ErrorHandler.check
+        Response = whetlab.server.http_client.Response
+
+        check(Response.lazy(self.raw(201, '{}'), codec))
+        assert_raises(whetlab.server.error.ClientError, check, Response.lazy(self.raw(502, 'down'), codec))
+        assert_equals(calls, [])
+
+        response = Response.lazy(self.raw(400, '{"error": "Bad"}'), codec)
+        try:
+            check(response)
+            assert False
+        except whetlab.server.error.ClientError as e:
+            assert_equals((e.code, e.message), (400, 'Bad'))
+        assert_equals(response.body, {'error':'Bad'})
+        assert_equals(len(calls), 1)
+
+class TestCodec:
+
+    def test_codecs_round_trip(self):
+        """ All the available JSON codecs decode exactly what the standard library encodes. """
+
+        data = {'results':[{'id':i, 'value':np.random.rand(), 'name':u'caf\xe9'} for i in range(100)]}
+        content = json.dumps(data)
+        for name in whetlab.server.http_client.Codec.registry:
+            codec = whetlab.server.http_client.Codec.get(name)
+            assert_equals(codec.loads(content), data)
+            assert_equals(json.loads(codec.dumps(data)), data)
+
+    def test_numpy_values(self):
+        """ Numpy values in request bodies can be encoded by the preferred codec. """
+
+        codec = whetlab.server.http_client.Codec.get()
+        assert_equals(json.loads(codec.dumps({'value':np.float64(0.5)})), {'value':0.5})
+
+    def test_unknown_codec(self):
+        """ Asking for a codec which isn't installed raises an error. """
+
+        assert_raises(ValueError, whetlab.server.http_client.Codec.get, 'unknown')
+
+class ChunkedResponse:
+    """ Stand-in for a streamed requests response, delivering its content in small chunks. """
+
+    encoding = 'utf-8'
+
+    def __init__(self, content):
+        self.content = content
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), 7):
+            yield self.content[i:i+7]
+
+    def close(self):
+        self.closed = True
+
+class TestJSONStream:
+
+    def test_items(self):
+        """ Items of the streamed array are decoded one by one, and the other values are kept. """
+
+        data = {'count':1234, 'next':None,
+                'results':[{'id':i, 'value':i*0.5, 'name':u'caf\xe9 %d' % i, 'variables':[[i]]} for i in range(50)],
+                'previous':u'page 0'}
+        response = ChunkedResponse(json.dumps(data, indent=1).encode('utf-8'))
+        stream = whetlab.server.http_client.JSONStream(response)
+
+        assert_equals(list(stream.iter_items('results')), data['results'])
+        assert_equals(stream.meta, {'count':1234, 'next':None, 'previous':u'page 0'})
+        assert response.closed
+
+    def test_empty_array(self):
+        """ An empty array yields no item. """
+
+        stream = whetlab.server.http_client.JSONStream(ChunkedResponse('{"results": [ ], "count": 0}'))
+        assert_equals(list(stream.iter_items('results')), [])
+        assert_equals(stream.meta, {'count':0})
+
+    def test_truncated(self):
+        """ A truncated response raises an error. """
+
+        stream = whetlab.server.http_client.JSONStream(ChunkedResponse('{"results": [{"id": 1}, {"id"'))
+        assert_raises(ValueError, list, stream.iter_items('results'))
+        stream = whetlab.server.http_client.JSONStream(ChunkedResponse('{"results": [{"id": 1}, {"id": "1'),
+                                                       codec=whetlab.server.http_client.Codec.get('json'))
+        assert_raises(ValueError, list, stream.iter_items('results'))
+
+    def test_codec(self):
+        """ Values are decoded by the codec given, whatever brackets, quotes and escapes their strings hold. """
+
+        codec, calls = counting_codec()
+        data = {'count':2, 'results':[{'id':1, 'name':u'[{"\\ caf\xe9 }]', 'variables':[[1, 2.5e-3]]},
+                                      {'id':2, 'done':True, 'outcome':None}]}
+        stream = whetlab.server.http_client.JSONStream(ChunkedResponse(json.dumps(data).encode('utf-8')), codec=codec)
+
+        assert_equals(list(stream.iter_items('results')), data['results'])
+        assert_equals(stream.meta, {'count':2})
+        # Both names, the count and both results
+        assert_equals(len(calls), 5)
+
+    def test_retried(self):
+        """ Streamed results are requested again when the download fails midway, and none is yielded twice. """
+
+        rest = whetlab.SimpleREST('token', 'http://localhost', {'stream_results':True,
+                                                               'retry_policy':whetlab.RetryPolicy(base=0.)})
+        contents = ['{"results": [{"id": 1}, {"id": 2}, {"id"', '{"results": [{"id": 1}, {"id": 2}, {"id": 3}]}']
+        rest._get_results_stream = lambda id, **kwargs: whetlab.server.http_client.JSONStream(ChunkedResponse(contents.pop(0)))
+
+        assert_equals([r['id'] for r in rest.iter_results(1)], [1, 2, 3])
+        assert_equals(rest.stats()['retries']['_get_results_stream']['retries'], 1)
+
+class TestResponseCache:
+
+    def setup(self):
+        server.reset(version=1)
+        self.client = whetlab.server.http_client.HttpClient({}, {'base':server.url, 'cache_size':2})
+
+    def teardown(self):
+        self.client.close()
+
+    def test_not_modified(self):
+        """ A response which is still current is revalidated and returned from the cache, as a body of its own. """
+
+        first = self.client.get('/alpha/settings/', {'experiment':1}).body
+        first['version'] = None
+        second = self.client.get('/alpha/settings/', {'experiment':1}).body
+        assert_equals(server.statuses(), [200, 304])
+        assert_equals(second['version'], 1)
+
+    def test_modified(self):
+        """ A response which has changed on the server is downloaded again. """
+
+        self.client.get('/alpha/settings/', {'experiment':1})
+        server.httpd.version = 2
+        body = self.client.get('/alpha/settings/', {'experiment':1}).body
+        assert_equals(body['version'], 2)
+        assert_equals(server.statuses(), [200, 200])
+
+    def test_query_is_part_of_key(self):
+        """ Responses are cached separately for each query. """
+
+        self.client.get('/alpha/settings/', {'experiment':1})
+        body = self.client.get('/alpha/settings/', {'experiment':2}).body
+        assert 'experiment=2' in body['path']
+        assert_equals(server.statuses(), [200, 200])
+
+    def test_least_recently_used(self):
+        """ The least recently used response is dropped when the cache is full. """
+
+        for experiment in [1, 2, 1, 3, 1, 2]:
+            self.client.get('/alpha/settings/', {'experiment':experiment})
+        assert_equals(server.statuses(), [200, 200, 304, 200, 304, 200])
+        assert_equals(len(self.client.cache), 2)
+
+class TestInstrumentation:
+
+    def setup(self):
+        server.reset()
+        self.client = whetlab.server.Client({}, {'base':server.url})
+
+    def teardown(self):
+        self.client.close()
+
+    def test_stats(self):
+        """ Requests are counted per endpoint, with their latency and size. """
+
+        for id in ['1', '2', '3']:
+            self.client.result(id).get()
+        self.client.results().add([], 1, True, 'description')
+
+        stats = self.client.stats()['endpoints']
+        assert_equals(sorted(stats.keys()), ['GET /alpha/results/:id/', 'POST /alpha/results/'])
+        assert_equals(stats['GET /alpha/results/:id/']['calls'], 3)
+        assert_equals(sum(count for bound, count in stats['GET /alpha/results/:id/']['histogram']), 3)
+        assert_equals(stats['GET /alpha/results/:id/']['bytes_sent'], 0)
+        assert stats['POST /alpha/results/']['bytes_sent'] > 0
+        assert stats['POST /alpha/results/']['bytes_received'] > 0
+
+    def test_callbacks(self):
+        """ Callbacks are called with each request, and their errors are ignored. """
+
+        events = []
+        def fail(event):
+            raise RuntimeError()
+        self.client.add_stats_callback(fail)
+        self.client.add_stats_callback(events.append)
+        self.client.result('1').delete()
+        assert_equals([(e['event'], e['endpoint'], e['code']) for e in events],
+                      [('request', 'DELETE /alpha/results/:id/', 200)])
+
+    def test_retries(self):
+        """ Retries made by the retry decorator are recorded with the time waited. """
+
+        instrumentation = whetlab.server.http_client.Instrumentation()
+        class Flaky:
+            calls = 0
+            @whetlab.retry
+            def call(self):
+                self.calls += 1
+                if self.calls < 3:
+                    raise requests.exceptions.ConnectionError()
+                return self.calls
+        flaky = Flaky()
+        flaky.instrumentation = instrumentation
+        flaky.retry_policy = whetlab.RetryPolicy(base=0, cap=0)
+
+        assert_equals(flaky.call(), 3)
+        assert_equals(instrumentation.stats()['retries'], {'call':{'retries':2, 'sleep':0.0}})
+
+class TestCassette:
+
+    def setup(self):
+        server.reset()
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.cassette')
+
+    def test_record_replay(self):
+        """ Recorded responses are replayed without the server, in order and without credentials. """
+
+        options = {'base':server.url, 'cassette':self.path, 'cassette_mode':'record'}
+        with whetlab.server.http_client.HttpClient({'access_token':'secret'}, options) as client:
+            recorded = [client.get('/alpha/results/1/', {'page':1}).body,
+                        client.patch('/alpha/results/1/', {'value':2}).body,
+                        client.get('/alpha/results/1/', {'page':1}).body]
+
+        interactions = whetlab.server.http_client.Cassette(self.path).load()
+        assert_equals([i['request'] for i in interactions],
+                      [['GET', '/alpha/results/1/', [['page', '1']]], ['PATCH', '/alpha/results/1/', []],
+                       ['GET', '/alpha/results/1/', [['page', '1']]]])
+
+        options['cassette_mode'] = 'replay'
+        with whetlab.server.http_client.HttpClient({'access_token':'secret'}, options) as client:
+            # Only the exact same request is answered, not another one of the same endpoint
+            assert_raises(whetlab.server.http_client.cassette.CassetteError, client.get, '/alpha/results/2/', {'page':1})
+            replayed = [client.get('/alpha/results/1/', {'page':1}).body,
+                        client.patch('/alpha/results/1/', {'value':3}).body,
+                        client.get('/alpha/results/1/', {'page':1}).body]
+            assert_raises(whetlab.server.http_client.cassette.CassetteError, client.get, '/alpha/results/1/')
+        assert_equals(replayed, recorded)
+        assert_equals(len(server.requests), 3)
+
+    def test_unicode_query(self):
+        """ Queries with non-ASCII values, as text or UTF-8 bytes, are replayed. """
+
+        options = {'base':server.url, 'cassette':self.path, 'cassette_mode':'record'}
+        with whetlab.server.http_client.HttpClient({}, options) as client:
+            recorded = client.get('/alpha/experiments/', {'name':u'caf\xe9'}).body
+
+        options['cassette_mode'] = 'replay'
+        with whetlab.server.http_client.HttpClient({}, options) as client:
+            assert_equals(client.get('/alpha/experiments/', {'name':u'caf\xe9'.encode('utf-8')}).body, recorded)
+        assert_equals(len(server.requests), 1)
+
+    def test_replay_errors(self):
+        """ Recorded error responses raise the same errors when replayed. """
+
+        cassette = whetlab.server.http_client.Cassette(self.path)
+        cassette.append({'request':['GET', '/alpha/results/5/', []], 'body':None, 'status':404,
+                         'headers':{'content-type':'application/json'}, 'content':'{"error": "Not found"}',
+                         'elapsed':0.1})
+        with whetlab.server.http_client.HttpClient({}, {'cassette':self.path}) as client:
+            try:
+                client.get('/alpha/results/5/')
+                assert False
+            except whetlab.server.error.ClientError as e:
+                assert_equals((e.code, e.message), (404, 'Not found'))
+
+    def test_invalid_mode(self):
+        """ Modes other than 'record' and 'replay' are refused. """
+
+        assert_raises(ValueError, whetlab.server.http_client.HttpClient, {},
+                      {'base':server.url, 'cassette':self.path, 'cassette_mode':'playback'})
+
+class FakeClock:
+    """ Clock whose sleeps only move its time forward. """
+
+    def __init__(self):
+        self.now = 0.
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestRateLimiter:
+
+    def setup(self):
+        self.clock = FakeClock()
+
+    def teardown(self):
+        # Bucket shared by the clients of test_shared_by_clients
+        with whetlab.server.http_client.TokenBucket.registry_lock:
+            whetlab.server.http_client.TokenBucket.registry.pop(('127.0.0.1:1', None), None)
+
+    def test_token_bucket(self):
+        """ A burst of requests goes through at once, and the following ones are spaced out at the rate. """
+
+        bucket = whetlab.server.http_client.TokenBucket(2, 3, self.clock)
+        waits = [bucket.acquire() for i in range(6)]
+        assert_equals(waits, [0, 0, 0, 0.5, 0.5, 0.5])
+
+        self.clock.now += 10
+        assert_equals(bucket.acquire(), 0)
+
+    def test_reservations(self):
+        """ Tokens taken while the bucket is empty are queued one after the other. """
+
+        bucket = whetlab.server.http_client.TokenBucket(10, 1, self.clock)
+        assert_equals([round(bucket.reserve(), 6) for i in range(4)], [0, 0.1, 0.2, 0.3])
+
+    def test_drain(self):
+        """ An emptied bucket waits for new tokens. """
+
+        bucket = whetlab.server.http_client.TokenBucket(10, 5, self.clock)
+        bucket.drain()
+        assert_equals(bucket.acquire(), 0.1)
+
+    def test_file_bucket(self):
+        """ Buckets backed by the same file share their tokens. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'bucket')
+        first = whetlab.server.http_client.rate_limiter.FileTokenBucket(path, 1, 2, self.clock)
+        second = whetlab.server.http_client.rate_limiter.FileTokenBucket(path, 1, 2, self.clock)
+        assert_equals([first.reserve(), second.reserve(), first.reserve(), second.reserve()], [0, 0, 1, 2])
+
+    def test_shared_by_clients(self):
+        """ Clients of the same host share their bucket, and a 429 from the server empties it. """
+
+        options = {'base':'http://127.0.0.1:1/', 'rate_limit':5, 'rate_burst':5}
+        first = whetlab.server.http_client.HttpClient({}, options)
+        second = whetlab.server.http_client.HttpClient({}, dict(options, rate_limit=8))
+        assert first.rate_limiter is second.rate_limiter
+        assert_equals(first.rate_limiter.rate, 8)
+        assert whetlab.server.http_client.HttpClient({}, {}).rate_limiter is None
+
+        class RateLimited(Exception):
+            code = 429
+        def create_request(*args):
+            raise RateLimited()
+        first.create_request = create_request
+        assert_raises(RateLimited, first.send, 'get', '/', 'http://127.0.0.1:1/', {})
+        assert first.rate_limiter.tokens <= 0
+
+class TestPaginator:
+
+    def setup(self):
+        self.items = range(25)
+        self.queries = []
+
+    def fetch(self, query):
+        """ Pages of self.items, linked like those of the server. """
+
+        self.queries.append(query)
+        page, page_size = int(query.get('page', 1)), int(query.get('page_size', 10))
+        start = (page - 1) * page_size
+        next = None
+        if start + page_size < len(self.items):
+            next = 'http://server/api/alpha/results/?experiment=1&page=%d&page_size=%d' % (page + 1, page_size)
+        return {'results':self.items[start:start + page_size], 'next':next}
+
+    def test_follows_next(self):
+        """ Items of all the pages are returned in order, following the next links. """
+
+        paginator = whetlab.server.Paginator(self.fetch, {'experiment':1}, page_size=7)
+        assert_equals(list(paginator), self.items)
+        assert_equals([q['page'] for q in self.queries[1:]], ['2', '3', '4'])
+        assert all(q['experiment'] in (1, '1') and int(q['page_size']) == 7 for q in self.queries)
+
+    def test_lazy(self):
+        """ Pages are only requested when their items are needed. """
+
+        items = iter(whetlab.server.Paginator(self.fetch))
+        assert_equals([next(items) for i in range(10)], range(10))
+        assert_equals(len(self.queries), 1)
+
+    def test_prefetch(self):
+        """ With an executor, the next page is requested while the current one is consumed. """
+
+        fetched = threading.Event()
+        def fetch(query):
+            page = self.fetch(query)
+            if len(self.queries) == 2:
+                fetched.set()
+            return page
+
+        with whetlab.server.executor.Executor(1) as executor:
+            items = iter(whetlab.server.Paginator(fetch, executor=executor))
+            assert_equals(next(items), 0)
+            assert fetched.wait(5)
+            assert_equals(list(items), self.items[1:])
+        assert_equals(len(self.queries), 3)
+
+    def test_busy_executor(self):
+        """ Pages which no worker has started fetching when they are needed are fetched by the iteration. """
+
+        release = threading.Event()
+        with whetlab.server.executor.Executor(1) as executor:
+            executor.submit(release.wait, 5)
+            assert_equals(list(whetlab.server.Paginator(self.fetch, executor=executor)), self.items)
+            assert_equals(len(self.queries), 3)
+            release.set()
+
+    def test_errors(self):
+        """ Errors fetching a page are raised by the iteration. """
+
+        def fetch(query):
+            if query.get('page') == '2':
+                raise ValueError('page 2')
+            return self.fetch(query)
+
+        with whetlab.server.executor.Executor(1) as executor:
+            for paginator in [whetlab.server.Paginator(fetch), whetlab.server.Paginator(fetch, executor=executor)]:
+                assert_raises(ValueError, list, paginator)
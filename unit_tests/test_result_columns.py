@@ -0,0 +1,70 @@
+from nose.tools import *
+import numpy as np
+from whetlab.result_columns import ResultColumns
+
+parameters = {'p1':{'type':'float', 'min':0, 'max':10.0, 'size':1},
+              'p2':{'type':'integer', 'min':0, 'max':10, 'size':2},
+              'p3':{'type':'enum', 'options':['a', 'b'], 'size':1}}
+
+class TestResultColumns:
+
+    def setup(self):
+        self.columns = ResultColumns(parameters)
+
+    def test_set(self):
+        """ Results are written in rows of the columns, in the order they were added. """
+
+        for i in range(100):
+            self.columns.set(i, {'p1':i / 10., 'p2':[i % 10, 9 - i % 10], 'p3':'ab'[i % 2]},
+                             None if i % 3 else float(i), True)
+        self.columns.set(100, {'p1':1., 'p2':[1, 1], 'p3':'a'})
+
+        columns = self.columns.snapshot()
+        assert_equals(columns['id'].tolist(), range(101))
+        assert_equals(columns['p1'][:3].tolist(), [0., .1, .2])
+        assert_equals(columns['p2'].shape, (101, 2))
+        assert_equals(columns['p3'][:3].tolist(), ['a', 'b', 'a'])
+        assert_equals(columns['pending'].sum(), 67)
+        assert_equals(columns['known'].sum(), 100)
+        assert_equals(np.nanmax(columns['outcome']), 99.)
+
+        self.columns.set(1, {'p1':5., 'p2':[1, 2], 'p3':'a'}, 3., True)
+        columns = self.columns.snapshot(['id', 'p1', 'outcome'])
+        assert_equals(sorted(columns), ['id', 'outcome', 'p1'])
+        assert_equals((columns['p1'][1], columns['outcome'][1]), (5., 3.))
+
+    def test_remove(self):
+        """ Removed results are left out, and the columns are compacted once half of their rows are removed. """
+
+        for i in range(10):
+            self.columns.set(i, {'p1':float(i), 'p2':[i, i], 'p3':'a'}, float(i), True)
+        for i in range(0, 10, 2):
+            self.columns.remove(i)
+        assert_equals(self.columns.snapshot()['id'].tolist(), [1, 3, 5, 7, 9])
+        assert_equals(self.columns.length, 10)
+
+        self.columns.remove(1)
+        assert_equals(self.columns.length, 4)
+        assert_equals(len(self.columns), 4)
+        assert_equals(self.columns.snapshot()['p1'].tolist(), [3., 5., 7., 9.])
+
+        self.columns.set(3, {'p1':0., 'p2':[0, 0], 'p3':'b'}, None, True)
+        assert_equals(self.columns.snapshot()['p3'].tolist(), ['b', 'a', 'a', 'a'])
+
+    def test_unexpected_values(self):
+        """ Values which don't fit the type or size of their parameter are kept as they are. """
+
+        self.columns.set(1, {'p1':1., 'p2':[1, 2], 'p3':'a'})
+        self.columns.set(2, {'p1':'unknown', 'p2':[1, 2, 3], 'p3':'a'})
+        columns = self.columns.snapshot()
+        assert_equals(columns['p1'].tolist(), [1., 'unknown'])
+        assert_equals(columns['p2'].tolist(), [[1, 2], [1, 2, 3]])
+
+    def test_integer_values(self):
+        """ Integer parameters are kept as floats, without truncating their values, and missing ones are nan. """
+
+        self.columns.set(1, {'p1':1., 'p2':[1, 2.5], 'p3':'a'})
+        self.columns.set(2, {'p1':1., 'p3':'a'})
+        p2 = self.columns.snapshot(['p2'])['p2']
+        assert_equals(p2[0].tolist(), [1., 2.5])
+        assert np.isnan(p2[1]).all()
@@ -0,0 +1,120 @@
+from nose.tools import *
+import requests
+import whetlab
+from whetlab.server.error import ClientError
+
+class FakeClock:
+    """ Clock whose sleeps only move its time forward. """
+
+    def __init__(self):
+        self.now = 1000.
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def failing(errors, value='done'):
+    """ Function raising the given errors in turn, then returning value. """
+
+    errors = list(errors)
+    def f():
+        if errors:
+            raise errors.pop(0)
+        return value
+    return f
+
+class TestRetryPolicy:
+
+    def setup(self):
+        self.clock = FakeClock()
+
+    def policy(self, **options):
+        return whetlab.RetryPolicy(clock=self.clock, **options)
+
+    def test_backoff(self):
+        """ Temporary errors are retried after jittered waits, growing up to the cap. """
+
+        errors = [requests.exceptions.ConnectionError()] * 3 + [ClientError('', 502)] * 3
+        policy = self.policy(base=1, cap=10, max_attempts=10, deadline=1000)
+        assert_equals(policy.call(failing(errors), (), {}), 'done')
+        assert_equals(len(self.clock.sleeps), 6)
+        assert all(1 <= s <= 10 for s in self.clock.sleeps)
+
+    def test_retry_after(self):
+        """ The delay of a Retry-After header is waited, in seconds or as a date. """
+
+        errors = [ClientError('', 429, {'retry-after':'7'}),
+                  ClientError('', 503, {'retry-after':'Thu, 01 Jan 1970 00:16:52 GMT'})]
+        assert_equals(self.policy().call(failing(errors), (), {}), 'done')
+        assert_equals(self.clock.sleeps, [7., 5.])
+
+    def test_max_attempts(self):
+        """ The last error is raised once the call has been attempted max_attempts times. """
+
+        f = failing([ClientError('', 502)] * 3)
+        assert_raises(ClientError, self.policy(max_attempts=3).call, f, (), {})
+        assert_equals(len(self.clock.sleeps), 2)
+
+    def test_deadline(self):
+        """ A call is given up when the next wait would end after its deadline. """
+
+        errors = [ClientError('', 429, {'retry-after':'20'})] * 10
+        assert_raises(ClientError, self.policy(max_attempts=10, deadline=50).call, failing(errors), (), {})
+        assert_equals(self.clock.sleeps, [20., 20.])
+
+    def test_client_errors_not_retried(self):
+        """ Errors other than rate limiting and server errors are raised at once. """
+
+        for code in [400, 404, 500]:
+            assert_raises(ClientError, self.policy().call, failing([ClientError('', code)]), (), {})
+        assert_equals(self.clock.sleeps, [])
+
+    def test_timeouts_retried(self):
+        """ Timed out requests are retried. """
+
+        f = failing([requests.exceptions.ReadTimeout(), requests.exceptions.ConnectTimeout()])
+        assert_equals(self.policy().call(f, (), {}), 'done')
+        assert_equals(len(self.clock.sleeps), 2)
+
+    def test_call_deadline(self):
+        """ A call can be given its own deadline. """
+
+        errors = [ClientError('', 429, {'retry-after':'20'})] * 10
+        assert_raises(ClientError, self.policy(max_attempts=10, deadline=50).call, failing(errors), (), {}, None, 90)
+        assert_equals(self.clock.sleeps, [20., 20., 20., 20.])
+
+class TestTimeouts:
+
+    def setup(self):
+        self.rest = whetlab.SimpleREST('token', 'http://127.0.0.1:1',
+                                       {'connect_timeout':5, 'read_timeout':30, 'timeouts':{'get_result':2}})
+
+    def teardown(self):
+        self.rest.close()
+
+    def test_call_timeout(self):
+        """ Calls use their own timeout, or the default of their method, or the one of the client. """
+
+        assert_equals(self.rest.call_timeout('get_suggestion'), (5, 30))
+        assert_equals(self.rest.call_timeout('get_result'), (5, 2))
+        assert_equals(self.rest.call_timeout('get_results'), (5, 600))
+        assert_equals(self.rest.call_timeout('get_results', 900), (5, 900))
+        assert_equals(self.rest.call_timeout('get_results', (1, 2)), (1, 2))
+
+    def test_deadline(self):
+        """ The deadline of a call is extended by its read timeout. """
+
+        deadlines = []
+        class Policy(whetlab.RetryPolicy):
+            def call(self, f, args, kwargs, instrumentation=None, deadline=None):
+                deadlines.append(deadline)
+                return {'results':[], 'next':None}
+        self.rest.retry_policy = Policy(deadline=100)
+        self.rest.get_result(1)
+        self.rest.get_results(1)
+        self.rest.get_results(1, timeout=(1, 10))
+        assert_equals(deadlines, [102, 700, 110])
@@ -0,0 +1,465 @@
+from nose.tools import *
+import requests
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import numpy as np
+import whetlab
+from whetlab import experiment_store
+from whetlab.broker import Broker
+from whetlab.standin import StandinServer
+
+parameters = {'p1':{'type':'float', 'min':0, 'max':10.0, 'size':1},
+              'p2':{'type':'integer', 'min':0, 'max':10, 'size':1}}
+outcome = {'name':'Dummy outcome'}
+
+class TestStandin:
+
+    def setup(self):
+        self.server = StandinServer().start()
+        self.retry_policy = whetlab.RETRY_POLICY
+
+    def teardown(self):
+        self.server.stop()
+        whetlab.RETRY_POLICY = self.retry_policy
+
+    def experiment(self, name='test', **options):
+        return whetlab.Experiment(name, access_token='token', parameters=parameters, outcome=outcome,
+                                  client_options=dict(options, base=self.server.url))
+
+    def test_suggest_and_update(self):
+        """ Suggested jobs are within the bounds of their parameters, and are pending until updated. """
+
+        with self.experiment() as scientist:
+            job = scientist.suggest()
+            assert 0 <= job['p1'] <= 10 and 0 <= job['p2'] <= 10
+            assert_equals(scientist.pending(), [job])
+
+            scientist.update(job, 3.)
+            assert_equals(scientist.pending(), [])
+
+        with self.experiment() as scientist:
+            assert_equals(scientist.best(), job)
+
+    def test_seeded_results(self):
+        """ Seeded experiments are resumed with all their results, over several pages. """
+
+        self.server.store.seed('seeded', 25, parameters)
+        with self.experiment('seeded') as scientist:
+            params, outcomes = scientist.get_all_results()
+            assert_equals(len(params), 25)
+            assert None not in outcomes
+
+    def test_pages(self):
+        """ Settings and results are requested one page at a time. """
+
+        experiment = self.server.store.seed('seeded', 25, parameters)
+        with whetlab.SimpleREST('token', self.server.url, {'page_size':4, 'experiment_index':None}) as rest:
+            assert_equals(len(rest.get_parameters(experiment['id'])), 3)
+            assert_equals(self.server.requests, 1)
+            results = list(rest.iter_results(experiment['id']))
+            assert_equals(sorted(r['id'] for r in results), sorted(self.server.store.results))
+            assert_equals(self.server.requests, 1 + 7)
+
+        with self.experiment('seeded', page_size=4, prefetch=False) as scientist:
+            params, outcomes = scientist.get_all_results()
+            assert_equals(len(params), 25)
+
+    def test_incremental_sync(self):
+        """ Syncs after the first one only fetch new and modified results, and notice deleted ones. """
+
+        experiment = self.server.store.seed('seeded', 25, parameters)
+        with self.experiment('seeded') as scientist:
+            store = self.server.store
+            job = store.suggest(experiment['id'])
+            requests = self.server.requests
+            assert_equals([j.result_id for j in scientist.pending()], [job['id']])
+            # New results and the count of results
+            assert_equals(self.server.requests, requests + 2)
+
+            store.update_result(job['id'], [{'name':'outcome', 'value':5.}])
+            assert_equals(scientist.pending(), [])
+            # Modified results and the count of results
+            assert_equals(self.server.requests, requests + 4)
+            params, outcomes = scientist.get_all_results()
+            assert_equals(len(params), 26)
+            assert 5. in outcomes
+
+            # Completed results modified by another process are fetched again
+            store.update_result(job['id'], [{'name':'outcome', 'value':7.}])
+            params, outcomes = scientist.get_all_results()
+            assert 7. in outcomes and 5. not in outcomes
+
+            del store.results[min(store.results)]
+            params, outcomes = scientist.get_all_results()
+            assert_equals(len(params), 25)
+
+    def test_sync_without_id_filters(self):
+        """ Servers which can't filter results by ID are always fully synced. """
+
+        self.server.id_filters = False
+        self.server.modified_filter = False
+        experiment = self.server.store.seed('seeded', 25, parameters)
+        with self.experiment('seeded') as scientist:
+            job = self.server.store.suggest(experiment['id'])
+            requests = self.server.requests
+            assert_equals([j.result_id for j in scientist.pending()], [job['id']])
+            assert not scientist._incremental
+            # The results sent while ignoring the filter, and the count checking the ID filters
+            assert_equals(self.server.requests, requests + 2)
+            assert_equals(len(scientist.get_all_results()[0]), 26)
+
+    def test_sync_without_modified_filter(self):
+        """ Servers which can't filter results by modification time have the pending results fetched again by ID. """
+
+        self.server.modified_filter = False
+        experiment = self.server.store.seed('seeded', 5, parameters)
+        with self.experiment('seeded') as scientist:
+            store = self.server.store
+            jobs = [store.suggest(experiment['id']) for i in range(whetlab.PENDING_REFRESH_BATCH + 5)]
+            assert_equals(len(scientist.pending()), len(jobs))
+            assert not scientist._modified_filter
+
+            for job in jobs:
+                store.update_result(job['id'], [{'name':'outcome', 'value':1.}])
+            requests = self.server.requests
+            assert_equals(scientist.pending(), [])
+            # New results, each pending result and the count of results
+            assert_equals(self.server.requests, requests + len(jobs) + 2)
+
+    def test_max_staleness(self):
+        """ Results synced recently enough are read without contacting the server, or revalidated in the background. """
+
+        experiment = self.server.store.seed('seeded', 5, parameters)
+        scientist = whetlab.Experiment('seeded', access_token='token', max_staleness=60,
+                                       client_options={'base':self.server.url})
+        with scientist:
+            requests = self.server.requests
+            job = self.server.store.suggest(experiment['id'])
+            assert_equals(scientist.pending(), [])
+            assert_equals(len(scientist.get_all_results()[0]), 5)
+            assert_equals(self.server.requests, requests)
+
+            assert_equals([j.result_id for j in scientist.pending(max_staleness=0)], [job['id']])
+            assert self.server.requests > requests
+
+            scientist.stale_while_revalidate = 60
+            self.server.latency = 0.2
+            self.server.store.suggest(experiment['id'])
+            assert_equals(len(scientist.pending(max_staleness=0)), 1)
+            while scientist._revalidating:
+                time.sleep(0.05)
+            assert_equals(len(scientist.pending()), 2)
+
+    def test_pending_suggestions(self):
+        """ Jobs suggested since the last sync are pending, even when the results are not synced again. """
+
+        self.server.store.seed('seeded', 5, parameters)
+        scientist = whetlab.Experiment('seeded', access_token='token', max_staleness=60,
+                                       client_options={'base':self.server.url})
+        with scientist:
+            job = scientist.suggest()
+            requests = self.server.requests
+            assert_equals(scientist.pending(max_staleness=60), [job])
+            assert_equals(self.server.requests, requests)
+            assert_equals(scientist.get_results_columns()['pending'].sum(), 1)
+
+            scientist.clear_pending()
+            assert_equals(scientist.pending(max_staleness=60), [])
+            assert_equals(len(self.server.store.results), 5)
+
+    def test_clear_pending_errors(self):
+        """ Jobs cancelled by clear_pending are forgotten even when others can't be cancelled. """
+
+        with self.experiment() as scientist:
+            jobs = [scientist.suggest() for i in range(3)]
+            delete_result = scientist._client.delete_result
+            def delete_all_but_first(id, timeout=None):
+                if id == jobs[0]._result_id:
+                    raise whetlab.server.error.ClientError('Forbidden', 403)
+                delete_result(id, timeout)
+            scientist._client.delete_result = delete_all_but_first
+
+            assert_raises(whetlab.server.error.ClientError, scientist.clear_pending)
+            assert_equals(scientist.pending(max_staleness=60), [jobs[0]])
+            assert_equals(sorted(self.server.store.results), [jobs[0]._result_id])
+
+    def test_experiment_store(self):
+        """ Experiments resumed from the experiment store only fetch the results created since it was saved. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'store.db')
+        experiment = self.server.store.seed('seeded', 250, parameters)
+        with self.experiment('seeded', experiment_store=path, experiment_index=None) as scientist:
+            results = scientist.get_all_results()
+        full = self.server.requests
+
+        job = self.server.store.suggest(experiment['id'])
+        with self.experiment('seeded', experiment_store=path, experiment_index=None) as scientist:
+            # Find the experiment, fetch the new results and count the results
+            assert_equals(self.server.requests, full + 3)
+            assert_equals([j.result_id for j in scientist.pending()], [job['id']])
+            params, outcomes = scientist.get_all_results()
+            assert_equals(len(params), 251)
+            assert_equals(sorted(o for o in outcomes if o is not None), sorted(results[1]))
+            scientist.cancel_by_result_id(job['id'])
+
+        with self.experiment('seeded', experiment_store=path, experiment_index=None) as scientist:
+            assert_equals(len(scientist.get_all_results()[0]), 250)
+
+    def test_old_experiment_store(self):
+        """ Stores created before the modification cursor was kept get its column. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'store.db')
+        connection = sqlite3.connect(path)
+        connection.executescript(experiment_store.SCHEMA.replace('modified_cursor INTEGER,', ''))
+        connection.close()
+
+        store = experiment_store.ExperimentStore(path, self.server.url, 'token')
+        state = {'experiment':'old', 'experiment_description':'', 'outcome_name':'outcome',
+                 'parameters':parameters, '_param_names_to_setting_ids':{'p1':1, 'p2':2},
+                 '_ids_to_param_values':{3:{'p1':1., 'p2':2}}, '_ids_to_outcome_values':{3:4.},
+                 'cursor':3, 'modified_cursor':5}
+        store.save(1, state)
+        assert_equals(store.load(1), state)
+
+    def test_results_columns(self):
+        """ Results are read as one array per parameter, along with their IDs and outcomes. """
+
+        experiment = self.server.store.seed('seeded', 25, parameters)
+        with self.experiment('seeded') as scientist:
+            job = self.server.store.suggest(experiment['id'])
+            columns = scientist.get_results_columns()
+            assert_equals(sorted(columns['id'].tolist()), sorted(self.server.store.results))
+            assert_equals(columns['pending'].tolist(), [r == job['id'] for r in columns['id'].tolist()])
+            assert_equals(columns['p1'].dtype, np.float64)
+
+            params, outcomes = scientist.get_all_results()
+            best = max(o for o in outcomes if o is not None)
+            assert_equals(scientist.best(), params[outcomes.index(best)])
+            assert_equals(np.nanmax(columns['outcome']), best)
+
+            scientist.cancel_by_result_id(job['id'])
+            assert_equals(scientist.get_results_columns(max_staleness=60)['pending'].sum(), 0)
+
+    def test_get_id(self):
+        """ Results are found from their parameter values without contacting the server, unless unknown. """
+
+        experiment = self.server.store.seed('seeded', 5, parameters)
+        with self.experiment('seeded') as scientist:
+            scientist.update({'p1':1., 'p2':1}, 2.)
+            requests = self.server.requests
+            id = scientist.get_id({'p1':np.float64(1.), 'p2':np.int64(1)})
+            assert id is not None
+            assert_equals(self.server.requests, requests)
+
+            job = self.server.store.suggest(experiment['id'])
+            values = dict((v['name'], v['value']) for v in job['variables'] if v['name'] != 'outcome')
+            assert_equals(scientist.get_id(values), job['id'])
+            assert self.server.requests > requests
+
+            scientist.cancel({'p1':1, 'p2':1})
+            assert_equals(scientist.get_id({'p1':1., 'p2':1}), None)
+
+    def test_access_token(self):
+        """ Requests without an access token are rejected. """
+
+        response = requests.get(self.server.url + '/api/alpha/experiments/')
+        assert_equals(response.status_code, 401)
+
+    def test_conditional_get(self):
+        """ GET responses carry an ETag, and are answered with 304 when it matches. """
+
+        url = self.server.url + '/api/alpha/experiments/?access_token=token'
+        etag = requests.get(url).headers['etag']
+        assert_equals(requests.get(url, headers={'if-none-match':etag}).status_code, 304)
+
+    def test_injected_errors(self):
+        """ Injected errors carry a Retry-After header, and are retried by the client. """
+
+        self.server.error_rate = 1
+        self.server.error_codes = (429,)
+        response = requests.get(self.server.url + '/api/alpha/experiments/?access_token=token')
+        assert_equals(response.status_code, 429)
+        assert_equals(response.headers['retry-after'], '1')
+
+        whetlab.RETRY_POLICY = whetlab.RetryPolicy(base=0, cap=0, max_attempts=20)
+        self.server.error_rate = 0.3
+        self.server.error_codes = (502,)
+        with self.experiment() as scientist:
+            scientist.update({'p1':1., 'p2':1}, 2.)
+            assert_equals(len(scientist.get_all_results()[0]), 1)
+
+    def test_latency(self):
+        """ Each request takes at least the latency of the server. """
+
+        self.server.latency = 0.05
+        with self.experiment() as scientist:
+            calls = self.server.requests
+            scientist.update({'p1':1., 'p2':1}, 2.)
+            assert self.server.requests > calls
+            assert scientist.stats()['endpoints']['POST /alpha/results/']['mean_latency'] >= 0.05
+
+    def test_shared_by_threads(self):
+        """ One experiment can be shared by many evaluator threads. """
+
+        errors = []
+        self.server.latency = (0, 0.005)
+        with self.experiment(pool_size=8) as scientist:
+            def evaluate(i):
+                try:
+                    for j in range(5):
+                        job = scientist.suggest()
+                        if j % 2:
+                            scientist.pending()
+                        scientist.update(job, float(i * 10 + j))
+                    scientist.update({'p1':float(i), 'p2':i}, -float(i))
+                    scientist.best()
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=evaluate, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert_equals(errors, [])
+            assert_equals(scientist.pending(), [])
+            params, outcomes = scientist.get_all_results()
+            assert_equals(len(params), 48)
+            assert_equals(sorted(outcomes), sorted([float(i * 10 + j) for i in range(8) for j in range(5)] +
+                                                   [-float(i) for i in range(8)]))
+            assert_equals(scientist.best(), params[outcomes.index(74.)])
+            assert_equals(len(self.server.store.results), 48)
+
+    def test_broker(self):
+        """ Requests go through a broker, which serves repeated reads from its cache until the next write. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'broker.sock')
+        with Broker(path, cache_ttl=60) as broker:
+            with self.experiment(broker=path) as scientist:
+                job = scientist.suggest()
+                assert_equals(scientist.pending(), [job])
+                # The first sync moved the cursor past the suggested job, the next ones read the same pages
+                assert_equals(scientist.pending(), [job])
+                forwarded = broker.stats['forwarded']
+                assert_equals(scientist.pending(), [job])
+                assert_equals(broker.stats['forwarded'], forwarded)
+
+                scientist.update(job, 1.)
+                assert_equals(scientist.pending(), [])
+                assert broker.stats['forwarded'] > forwarded
+
+            assert_equals(broker.stats['received'], self.server.requests + broker.stats['cached'])
+
+    def test_broker_reads_own_writes(self):
+        """ A read sent through the broker after a write doesn't share the response of a read sent before it. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'broker.sock')
+        url = self.server.url + '/alpha/results/'
+        with Broker(path) as broker:
+            sent = []
+            release = threading.Event()
+            def send(method, url, headers, body):
+                sent.append(method)
+                response = 200, {}, str(len(sent))
+                if len(sent) == 1:
+                    release.wait()
+                return response
+            broker.send = send
+
+            responses = []
+            def get():
+                responses.append(broker.forward('GET', url, {}, None))
+            first = threading.Thread(target=get)
+            first.start()
+            while not sent:
+                time.sleep(0.01)
+            broker.forward('PATCH', url, {}, '{}')
+
+            second = threading.Thread(target=get)
+            second.start()
+            second.join(5)
+            release.set()
+            first.join()
+            assert_equals(responses, [(200, {}, '3'), (200, {}, '1')])
+
+class TestFindExperiment:
+
+    def setup(self):
+        self.server = StandinServer(name_filter=False).start()
+        self.index = os.path.join(tempfile.mkdtemp(), 'index.json')
+        for i in range(35):
+            self.server.store.create_experiment('experiment %d' % i, '', [])
+
+    def teardown(self):
+        self.server.stop()
+
+    def rest(self, **options):
+        return whetlab.SimpleREST('token', self.server.url, dict(options, experiment_index=self.index))
+
+    def test_name_filter(self):
+        """ Experiments are found with a single request when the server filters them by name. """
+
+        self.server.name_filter = True
+        with self.rest(experiment_index=None) as rest:
+            assert_equals(rest.find_experiment('experiment 33'), 34)
+            assert_equals(rest.find_experiment('unknown'), None)
+        assert_equals(self.server.requests, 2)
+
+    def test_parallel_pages(self):
+        """ Without a filter by name, all the pages after the first are fetched at once. """
+
+        with self.rest(experiment_index=None) as rest:
+            assert_equals(rest.find_experiment('experiment 33'), 34)
+            assert_equals(rest.find_experiment('experiment 3'), 4)
+            assert_equals(rest.find_experiment('unknown'), None)
+        assert_equals(self.server.requests, 4 + 1 + 4)
+
+    def test_index(self):
+        """ Experiments found, created or deleted are recorded in the index, shared by clients. """
+
+        with self.rest() as rest:
+            assert_equals(rest.find_experiment('experiment 20'), 21)
+            id = rest.create_experiment('new', '', [])
+        requests = self.server.requests
+
+        with self.rest() as rest:
+            assert_equals(rest.find_experiment('experiment 20'), 21)
+            assert_equals(rest.find_experiment('new'), id)
+            # Each ID is checked with a single request
+            assert_equals(self.server.requests, requests + 2)
+
+            rest.delete_experiment(id)
+            assert_equals(rest.find_experiment('new'), None)
+
+    def test_stale_index(self):
+        """ IDs of the index which no longer match their experiment are dropped, and the experiment is searched by name. """
+
+        with self.rest() as rest:
+            id = rest.create_experiment('recreated', '', [])
+        self.server.store.delete_experiment(id)
+        new_id = self.server.store.create_experiment('recreated', '', [])['id']
+
+        with self.rest() as rest:
+            assert_equals(rest.find_experiment('recreated'), new_id)
+            requests = self.server.requests
+            assert_equals(rest.find_experiment('recreated'), new_id)
+            assert_equals(self.server.requests, requests + 1)
+
+    def test_index_opt_in(self):
+        """ Without the option, no index is used. """
+
+        with whetlab.SimpleREST('token', self.server.url) as rest:
+            assert rest._index is None
+
+    def test_index_ttl(self):
+        """ Entries of the index are only trusted for its TTL. """
+
+        with self.rest(experiment_index_ttl=0) as rest:
+            rest.find_experiment('experiment 20')
+            requests = self.server.requests
+            assert_equals(rest.find_experiment('experiment 20'), 21)
+            assert self.server.requests > requests + 1
@@ -4,8 +4,9 @@ from time import time, sleep
 from nose.tools import with_setup, assert_equals
 import numpy as np
 import numpy.random as npr
+from whetlab.standin import StandinServer
 
-whetlab.RETRY_TIMES = [] # So that it doesn't wait forever for tests that raise errors
+whetlab.RETRY_POLICY = whetlab.RetryPolicy(max_attempts=1) # So that it doesn't wait forever for tests that raise errors
 
 default_access_token = None
 
@@ -16,6 +17,21 @@ default_outcome = {'name':'Dummy outcome'}
 
 last_created_experiment = ""
 
+standin = None
+
+def setup_module():
+    """ Without an access token, run the tests against a local stand-in server. """
+
+    global default_access_token, standin
+    if default_access_token is None and not whetlab.load_config().has_key('access_token'):
+        standin = StandinServer().start()
+        whetlab.DEFAULT_API_URL = standin.url
+        default_access_token = 'standin'
+
+def teardown_module():
+    if standin is not None:
+        standin.stop()
+
 def test_required_prop_are_supported():
     """ All required properties should be supported, for parameters and outcome. """
     
@@ -41,6 +57,15 @@ def test_default_values_are_legal():
         if k in whetlab.outcome_legal_values:
             assert( v in whetlab.outcome_legal_values[k] )
 
+def test_param_key():
+    """ Equal parameter values have the same key, however they are written. """
+
+    key = whetlab._param_key({'p1':1.5, 'p2':3, 'p3':[1., 2.], 'p4':'a'})
+    assert_equals(whetlab._param_key({u'p4':u'a', 'p3':np.array([1, 2]), 'p2':3., 'p1':np.float32(1.5)}), key)
+    assert_equals(whetlab._param_key({'p1':1.5, 'p2':3, 'p3':(1., 2.), 'p4':'a'}), key)
+    assert whetlab._param_key({'p1':1.5, 'p2':4, 'p3':[1., 2.], 'p4':'a'}) != key
+    assert whetlab._param_key({'p1':1.5, 'p2':3, 'p3':[2., 1.], 'p4':'a'}) != key
+
 def test_delete_experiment():
     """ Delete experiment should remove the experiment from the server. """
     
@@ -1,4 +1,5 @@
 import os
+import sys
 import ast
 import tempfile
 import ConfigParser
@@ -6,10 +7,17 @@ import collections
 import numpy as np
 import server
 import time
+import random
+import email.utils
 import re
 import functools
+import itertools
+import threading
 import requests
 from whetlab.server.error.client_error import *
+from whetlab.experiment_index import ExperimentIndex, DEFAULT_INDEX_TTL
+from whetlab.experiment_store import ExperimentStore
+from whetlab.result_columns import ResultColumns
 
 def catch_exception(f):
     @functools.wraps(f)
@@ -28,6 +36,18 @@ def catch_exception(f):
 
 INF_PAGE_SIZE = 1000000
 
+# Default number of settings or results requested per page
+DEFAULT_PAGE_SIZE = 100
+
+# Number of pending results refreshed at once by an incremental sync, when the server can't filter results by modification time
+PENDING_REFRESH_BATCH = 20
+
+# Seconds between two polls of the server for the values of a suggested job
+SUGGEST_POLL_INTERVAL = 2
+
+# Default number of calls to the server that an AsyncExperiment runs at once
+DEFAULT_MAX_WORKERS = 10
+
 DEFAULT_API_URL = 'https://www.whetlab.com'
 
 supported_properties = set(['min','max','size','type','options'])
@@ -250,6 +270,46 @@ validate = {'integer': _validate_integer,
             'float'  : _validate_float,
             'enum'   : _validate_enum}
 
+def _canonical_value(value):
+    """
+    Convert a parameter value to a hashable value, equal for all the ways of writing it.
+
+    Vectors (lists, tuples or numpy arrays) become tuples, numpy scalars become
+    Python scalars and floats without a fractional part become integers.
+
+    :param value: Parameter value
+    :return: Canonical value
+    """
+
+    if isinstance(value, np.ndarray):
+        value = value.ravel().tolist()
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical_value(v) for v in value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, unicode):
+        try:
+            return str(value)
+        except UnicodeEncodeError:
+            pass
+    return value
+
+def _param_key(param_values):
+    """
+    Return a hashable key for an assignment of values to parameters.
+
+    Two assignments have the same key if they assign equal values to the same parameters.
+
+    :param param_values: Values of parameters.
+    :type param_values: dict
+    :return: Key of the assignment
+    :rtype: tuple
+    """
+
+    return tuple(sorted((name, _canonical_value(value)) for name, value in param_values.iteritems()))
+
 @catch_exception
 def delete_experiment(name='Default name', access_token=None):
     """
@@ -268,6 +328,7 @@ def delete_experiment(name='Default name', access_token=None):
     except ValueError:
         raise ValueError('Could not delete experiment \''+name+'\' (either it doesn\'t exist or access token is invalid)')
     scientist._client.delete_experiment(scientist.experiment_id)
+    scientist.close()
 
 @catch_exception
 def load_config():
@@ -329,6 +390,51 @@ class Experiment:
     :type resume: bool
     :param access_token: Access token for your Whetlab account. If ``None``, then is read from whetlab configuration file (default: ``None``).
     :type access_token: str
+    :param client_options: Options for the connection to the server (default: ``None``, see below).
+    :type client_options: dict
+    :param max_staleness: Age in seconds up to which the results known locally are read without syncing with the server, ``float('inf')`` to only sync when a result is unknown (default: ``0``, always sync).
+    :type max_staleness: float
+    :param stale_while_revalidate: Seconds past ``max_staleness`` during which the results known locally are still read, while they are synced in the background (default: ``0``).
+    :type stale_while_revalidate: float
+
+    ``client_options`` is a ``dict`` which can contain the keys:
+
+    * ``'pool_size'``: number of connections to the server kept open (default: ``10``)
+    * ``'max_retries'``: number of retries of failed connection attempts (default: ``3``)
+    * ``'keep_alive'``: whether connections are reused between requests (default: ``True``)
+    * ``'connect_timeout'``: seconds to wait for a connection to the server, ``None`` to wait forever (default: ``10``)
+    * ``'read_timeout'``: seconds to wait for each read of a response, ``None`` to wait forever (default: ``60``)
+    * ``'timeouts'``: read timeouts of specific calls, by name of :class:`SimpleREST` method, e.g. ``{'get_results': 1200}`` (default: ``None``, see :attr:`SimpleREST.TIMEOUTS`)
+    * ``'system_info'``: which requests carry information about the host, one of ``'all'``, ``'suggest'`` or ``'none'`` (default: ``'all'``)
+    * ``'json_codec'``: JSON library, one of ``'orjson'``, ``'ujson'``, ``'simplejson'`` and ``'json'`` (default: ``'auto'``, the fastest one installed)
+    * ``'page_size'``: number of settings or results requested per page (default: ``100``)
+    * ``'prefetch'``: whether the next page of settings or results is requested while the current one is processed (default: ``True``)
+    * ``'stream_results'``: whether all results are requested at once and decoded while they are downloaded, instead of one page at a time (default: ``False``)
+    * ``'cache_size'``: number of responses kept to revalidate with conditional requests, ``0`` to disable (default: ``0``)
+    * ``'cassette'``: path of a file to record the requests and responses to, or to replay them from, without accessing the server (default: ``None``)
+    * ``'cassette_mode'``: ``'record'`` or ``'replay'`` (default: ``'replay'``)
+    * ``'replay_latency'``: delay added to replayed responses, in seconds or ``'recorded'`` for their recorded duration (default: ``None``)
+    * ``'experiment_index'``: path of a file indexing the IDs of experiments by name, shared by the processes of the host, e.g. ``'~/.whetlab_index.json'`` (default: ``None``, experiments are always searched by name on the server)
+    * ``'experiment_index_ttl'``: seconds during which the IDs of that index are used, after checking that they still exist (default: ``600``)
+    * ``'experiment_store'``: path of a SQLite database keeping the settings and results of experiments, shared by the processes of the host, from which resumed experiments only fetch the results changed since (default: ``None``, no store)
+    * ``'broker'``: path of the Unix socket of a :mod:`whetlab.broker` to send the requests through, sharing its connections and cache with the other processes of the host (default: ``None``)
+    * ``'instrumentation'``: :class:`whetlab.server.http_client.instrumentation.Instrumentation` recording the requests made (default: ``None``, a new one for each experiment)
+    * ``'single_flight'``: whether identical reads made at the same time by several threads share a single request (default: ``False``)
+    * ``'rate_limit'``: most requests per second sent to the server, shared by all the experiments of the process (default: ``None``, no limit)
+    * ``'rate_burst'``: most requests sent at once within the rate limit (default: ``None``, the rate limit)
+    * ``'rate_limit_file'``: path of a file through which the rate limit is shared by all the processes of the host (default: ``None``)
+    * ``'retry_policy'``: :class:`RetryPolicy` deciding how failed calls are retried (default: ``None``, :data:`RETRY_POLICY`)
+
+    The connections to the server are kept open for the lifetime of the experiment.
+    They can be released with :meth:`close`, or by using the experiment as a context manager.
+
+    An experiment can be shared by several threads, e.g. evaluators suggesting
+    and updating jobs concurrently, which then also share its pool of connections.
+
+    :meth:`pending`, :meth:`best`, :meth:`get_all_results` and :meth:`report` sync
+    the results with the server before reading them, unless they were synced less than
+    ``max_staleness`` seconds ago. Each of them can also be given its own ``max_staleness``.
+    Changes made through the experiment itself are always seen at once.
 
     A Whetlab experiment instance will have the following variables:
 
@@ -347,7 +453,10 @@ class Experiment:
                  parameters=None,
                  outcome=None,
                  resume = True,
-                 access_token=None):
+                 access_token=None,
+                 client_options=None,
+                 max_staleness=0,
+                 stale_while_revalidate=0):
 
         # These are for the client to keep track of things without always 
         # querying the REST server ...
@@ -358,6 +467,44 @@ class Experiment:
         # ... From a parameter name to the setting IDs
         self._param_names_to_setting_ids = {}
 
+        # The maps above are modified in place under the lock, and replaced at once by a sync.
+        # The values of a result are replaced when it changes, never modified, so that the
+        # copies of the maps (see _snapshot) share them. Changes made while a sync is in
+        # flight are also replayed on its maps.
+        self._lock = threading.RLock()
+        self._syncs = 0
+        self._changes = []
+
+        # ... From the key of parameter values (see _param_key) to the IDs of the
+        # results with these values. It is modified in place under the lock, and
+        # may still list results which were forgotten or changed
+        self._param_keys_to_ids = {}
+        # ... The same results, in one numpy array per parameter and for the outcomes,
+        # also modified in place under the lock (None until the parameters are known)
+        self._columns = None
+
+        # Highest result ID fetched by the last sync, from which the next one can
+        # fetch only the newer results (None until a first full sync)
+        self._sync_cursor = None
+        # Whether the server supports the filters needed by incremental syncs
+        self._incremental = True
+        # Latest modification time of the results fetched by the last sync, from which the next one
+        # can fetch only the results created or modified since (None if the server doesn't give it),
+        # and whether the server can filter results by modification time
+        self._modified_cursor = None
+        self._modified_filter = True
+        # Maps from result IDs to parameter and outcome values last saved to the experiment store
+        self._stored = None
+        self._store_lock = threading.Lock()
+        # Time at which the last successful sync started, and whether one is running in the background
+        self._synced_at = None
+        self._revalidating = False
+
+        if max_staleness < 0 or stale_while_revalidate < 0:
+            raise ValueError('Staleness of results must be positive')
+        self.max_staleness = max_staleness
+        self.stale_while_revalidate = stale_while_revalidate
+
         config = load_config()
         if config.has_key('api_url'):
             url = config['api_url']
@@ -369,7 +516,7 @@ class Experiment:
             else:
                 raise Exception("No access token specified in dotfile or via constructor.")
 
-        self._client = SimpleREST(access_token, url)
+        self._client = SimpleREST(access_token, url, client_options)
 
         # Make a few obvious asserts
         if name == '' or type(name) not in [str,unicode]:
@@ -384,7 +531,8 @@ class Experiment:
         self.experiment_id = self._client.find_experiment(self.experiment)
 
         if self.experiment_id is not None and resume:
-            # Sync all the internals with the REST server
+            # Sync all the internals with the REST server, from their stored copy if any
+            self._load_state()
             self._sync_with_server()
 
         else:
@@ -474,58 +622,497 @@ class Experiment:
             # (e.g. fetching the setting ids)
             self._sync_with_server()
 
-        pending = self.pending()
+        # The results were just synced
+        pending = self.pending(max_staleness=float('inf'))
         if len(pending) > 0:
             print "INFO: this experiment currently has "+str(len(pending))+" jobs (results) that are pending."
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Close the connections to the server held by this experiment.
+        """
+
+        self._client.close()
+
+    def stats(self):
+        """
+        Return statistics on the requests made to the server so far.
+
+        For each endpoint (e.g. ``'PATCH /alpha/results/:id/'``), the statistics
+        under ``'endpoints'`` give the number of calls and errors, the total, mean and maximum
+        latency, a latency histogram (pairs of upper bound in seconds and count) and
+        the bytes sent and received. For each call to the server which was retried,
+        the statistics under ``'retries'`` give the number of retries and the time spent waiting before them.
+        The statistics under ``'coalesced'`` give, for each endpoint, the number of calls which
+        shared the response of an identical request already in flight.
+
+        Functions called with each request or retry as it happens can be added with
+        ``add_callback`` of the instrumentation given by the client option ``'instrumentation'``.
+
+        :return: Snapshot of the statistics.
+        :rtype: dict
+        """
+
+        return self._client.stats()
 
     @catch_exception
-    def _sync_with_server(self):
+    def _sync_with_server(self, full=False):
         """
         Synchronize the client's internals with the REST server.
+
+        After a first full sync, only the results created or modified since the last sync
+        are fetched, and merged into the current ones (see :meth:`_fetch_changes`).
+        Everything is fetched again whenever this can't be done reliably, e.g. when
+        results were deleted by another process.
+
+        The new internals are built aside, then replace the current ones at once.
+
+        :param full: Whether to fetch everything, even after a first sync (default: ``False``).
+        :type full: bool
         """
 
-        self.experiment, self.experiment_description = self._client.get_experiment_name_and_description(self.experiment_id)
+        started = time.time()
+        with self._lock:
+            self._syncs += 1
+            first_change = len(self._changes)
+            cursor = None if full or not self._incremental else self._sync_cursor
+            modified_cursor = self._modified_cursor if self._modified_filter else None
+            ids_to_param_values = dict(self._ids_to_param_values)
+            ids_to_outcome_values = dict(self._ids_to_outcome_values)
 
-        # Reset internals
-        self._ids_to_param_values = {}
-        self._ids_to_outcome_values = {}
-        self._param_names_to_setting_ids = {}
+        try:
+            state = None
+            if cursor is not None:
+                cursors = self._fetch_changes(cursor, modified_cursor, ids_to_param_values, ids_to_outcome_values)
+                if cursors is not None:
+                    cursor, modified_cursor = cursors
+                    state = {'_ids_to_param_values':ids_to_param_values,
+                             '_ids_to_outcome_values':ids_to_outcome_values,
+                             '_modified_cursor':modified_cursor}
+
+            fetched_all = state is None
+            if fetched_all:
+                state = self._fetch_all()
+                cursor = max(state['_ids_to_param_values'].keys() or [0])
+
+            with self._lock:
+                # Changes made since the results were fetched must not be lost
+                for change in self._changes[first_change:]:
+                    change(state['_ids_to_param_values'], state['_ids_to_outcome_values'])
+
+                previous_param_values = self._ids_to_param_values
+                previous_outcome_values = self._ids_to_outcome_values
+                for name, value in state.items():
+                    setattr(self, name, value)
+                self._sync_cursor = cursor
+                self._synced_at = max(self._synced_at, started)
+
+                if fetched_all:
+                    self._track_all_results()
+                else:
+                    missing = object()
+                    self._track_results([id for id, values in self._ids_to_param_values.iteritems()
+                                         if previous_param_values.get(id) is not values or
+                                            previous_outcome_values.get(id, missing) is not
+                                            self._ids_to_outcome_values.get(id, missing)],
+                                        [id for id in previous_param_values if id not in self._ids_to_param_values])
+        finally:
+            with self._lock:
+                self._syncs -= 1
+                if self._syncs == 0:
+                    self._changes = []
+
+        self._save_state(fetched_all)
+
+    def _load_state(self):
+        """
+        Replace the client's internals with the copy kept in the experiment store, if any.
+
+        The next sync then only fetches the results changed since that copy was saved.
+        """
+
+        store = self._client.experiment_store
+        state = store.load(self.experiment_id) if store else None
+        if state is None:
+            return
+
+        with self._lock:
+            self._sync_cursor = state.pop('cursor')
+            self._modified_cursor = state.pop('modified_cursor')
+            for name, value in state.items():
+                setattr(self, name, value)
+            self._stored = (dict(self._ids_to_param_values), dict(self._ids_to_outcome_values))
+            self._track_all_results()
+
+    def _save_state(self, full=False):
+        """
+        Save the client's internals to the experiment store, if any.
+
+        Only the results changed since the last save are written, unless ``full`` is true.
+
+        :param full: Whether all the results are written again (default: ``False``).
+        :type full: bool
+        """
+
+        store = self._client.experiment_store
+        if store is None:
+            return
+
+        with self._store_lock:
+            with self._lock:
+                state = dict((name, getattr(self, name)) for name in
+                             ('experiment', 'experiment_description', 'parameters', 'outcome_name',
+                              '_param_names_to_setting_ids', '_ids_to_param_values', '_ids_to_outcome_values'))
+                state['cursor'] = self._sync_cursor
+                state['modified_cursor'] = self._modified_cursor
+                # The maps are changed in place, under the lock
+                state['_ids_to_param_values'] = dict(state['_ids_to_param_values'])
+                state['_ids_to_outcome_values'] = dict(state['_ids_to_outcome_values'])
+
+            ids_to_param_values = state['_ids_to_param_values']
+            ids_to_outcome_values = state['_ids_to_outcome_values']
+            if full or self._stored is None:
+                store.save(self.experiment_id, state)
+            else:
+                # Changed results are given new values, so unchanged results are the same objects
+                stored_param_values, stored_outcome_values = self._stored
+                missing = object()
+                changed = [id for id, values in ids_to_param_values.iteritems()
+                           if stored_param_values.get(id) is not values or
+                              stored_outcome_values.get(id, missing) is not ids_to_outcome_values.get(id, missing)]
+                deleted = [id for id in stored_param_values if id not in ids_to_param_values]
+                store.save(self.experiment_id, state, changed, deleted)
+            self._stored = (ids_to_param_values, ids_to_outcome_values)
+
+    def _refresh(self, max_staleness=None):
+        """
+        Sync with the REST server, unless the results known locally are recent enough.
+
+        Results older than ``max_staleness``, but within :attr:`stale_while_revalidate`
+        of it, are synced in the background instead.
+
+        :param max_staleness: Age in seconds up to which the results are recent enough (default: ``None``, :attr:`max_staleness`)
+        :type max_staleness: float
+        """
+
+        if max_staleness is None:
+            max_staleness = self.max_staleness
+
+        with self._lock:
+            age = float('inf') if self._synced_at is None else time.time() - self._synced_at
+            if age <= max_staleness:
+                return
+            if age > max_staleness + self.stale_while_revalidate:
+                revalidate = False
+            else:
+                revalidate = not self._revalidating
+                if not revalidate:
+                    # Already syncing in the background
+                    return
+                self._revalidating = True
+
+        if not revalidate:
+            self._sync_with_server()
+            return
+
+        def sync():
+            try:
+                self._sync_with_server()
+            except Exception:
+                # Raised by the next sync in the foreground instead
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating = False
+
+        thread = threading.Thread(target=sync, name='whetlab-revalidate')
+        thread.daemon = True
+        thread.start()
+
+    def _fetch_all(self):
+        """
+        Fetch the experiment's description, settings and results from the REST server.
+
+        :return: New values of the client's internals, by attribute name.
+        :rtype: dict
+        """
+
+        experiment, experiment_description = self._client.get_experiment_name_and_description(self.experiment_id)
+
+        ids_to_param_values = {}
+        ids_to_outcome_values = {}
+        param_names_to_setting_ids = {}
 
         # Get settings for this experiment, to get the parameter and outcome names
         rest_parameters = self._client.get_parameters(self.experiment_id)
-        self.parameters = {}
+        parameters = {}
+        outcome_name = getattr(self, 'outcome_name', None)
         for rest_param in rest_parameters:
-            rest_param
             id = rest_param['id']
             name = rest_param['name']
             type = rest_param['type']
             isOutput = rest_param['isOutput']
 
-            self._param_names_to_setting_ids[name] = id
+            param_names_to_setting_ids[name] = id
 
             if isOutput:
-                self.outcome_name = name
+                outcome_name = name
             else:
-                self.parameters[name] = reformat_from_rest[type](rest_param)
+                parameters[name] = reformat_from_rest[type](rest_param)
 
         # Get results generated so far for this experiment
-        rest_results = self._client.get_results(self.experiment_id)
-        # Construct things needed by client internally, to keep track of
-        # all the results
-        for res in rest_results:
-            res_id = res['id']
-            variables = res['variables']
-
-            # Construct _ids__param_values dict and ids_to_outcome_values
-            self._ids_to_param_values[res_id] = {}
-            for v in variables:
-                id = v['id']
-                name = v['name']
-                if cmp(name,self.outcome_name) == 0 :
-                    self._ids_to_outcome_values[res_id] = v['value']
-                else:
-                    self._ids_to_param_values[res_id][v['name']] = v['value']
+        modified_cursor = 0
+        for res in self._client.iter_results(self.experiment_id):
+            self._read_result(res, outcome_name, ids_to_param_values, ids_to_outcome_values)
+            if modified_cursor is not None:
+                modified_cursor = None if res.get('modified') is None else max(modified_cursor, res['modified'])
+
+        return {'experiment':experiment,
+                'experiment_description':experiment_description,
+                'parameters':parameters,
+                'outcome_name':outcome_name,
+                '_param_names_to_setting_ids':param_names_to_setting_ids,
+                '_ids_to_param_values':ids_to_param_values,
+                '_ids_to_outcome_values':ids_to_outcome_values,
+                '_modified_cursor':modified_cursor}
+
+    def _fetch_changes(self, cursor, modified_cursor, ids_to_param_values, ids_to_outcome_values):
+        """
+        Fetch the results created or modified since the last sync, and merge them into the given maps.
+
+        If the server can filter results by modification time, a single request fetches the results
+        created since the last sync along with the results modified since (e.g. completed by
+        another process). Otherwise, the results created since the last sync are fetched, then the
+        pending results are fetched again by ID, a page at a time: completed results are then
+        assumed to be never modified.
+
+        The number of results on the server up to the new cursor is then checked
+        against the maps, to detect results deleted since the last sync.
+
+        When the server turns out to ignore the filter, the results it sent are
+        all of them, and they replace the content of the maps.
+
+        :param cursor: Highest result ID fetched by the last sync
+        :type cursor: int
+        :param modified_cursor: Latest modification time of the results fetched by the last sync,
+                                ``None`` if results are not to be filtered by modification time
+        :type modified_cursor: int
+        :param ids_to_param_values: Copy of the map from result IDs to parameter values, updated
+        :type ids_to_param_values: dict
+        :param ids_to_outcome_values: Copy of the map from result IDs to outcome values, updated
+        :type ids_to_outcome_values: dict
+        :return: The new cursor and modification cursor, or ``None`` if the maps are out of sync and everything must be fetched again.
+        :rtype: tuple
+        """
+
+        new_cursor = cursor
+        new_modified_cursor = modified_cursor
+        fetched = []
+        if modified_cursor is not None:
+            results = iter(self._client.iter_results(self.experiment_id, modified_since=modified_cursor))
+        else:
+            results = iter(self._client.iter_results(self.experiment_id, since=cursor))
+        for res in results:
+            if modified_cursor is not None:
+                if res.get('modified') is None or res['modified'] < modified_cursor:
+                    # The server doesn't filter results by modification time, and is sending all of them.
+                    # Whether it filters them by ID is checked at once, with a count of no result.
+                    self._modified_filter = False
+                    self._incremental = self._client.count_results(self.experiment_id, until=0) == 0
+                    return self._read_all(itertools.chain(fetched, [res], results),
+                                          ids_to_param_values, ids_to_outcome_values)
+                new_modified_cursor = max(new_modified_cursor, res['modified'])
+            elif res['id'] <= cursor:
+                # The server doesn't filter results by ID, and is sending all of them
+                self._incremental = False
+                return self._read_all(itertools.chain(fetched, [res], results),
+                                      ids_to_param_values, ids_to_outcome_values)
+            self._read_result(res, self.outcome_name, ids_to_param_values, ids_to_outcome_values)
+            new_cursor = max(new_cursor, res['id'])
+            fetched.append(res)
+        fetched = set(res['id'] for res in fetched)
+
+        # Results known since the last sync, but no longer on the server, were deleted
+        for id in [id for id in ids_to_param_values if id > cursor and id not in fetched]:
+            del ids_to_param_values[id]
+            ids_to_outcome_values.pop(id, None)
+
+        if modified_cursor is None:
+            pending = [id for id in ids_to_param_values if id <= cursor and ids_to_outcome_values.get(id) is None]
+            try:
+                for start in range(0, len(pending), PENDING_REFRESH_BATCH):
+                    for res in self._client.get_results_by_id(pending[start:start + PENDING_REFRESH_BATCH]):
+                        self._read_result(res, self.outcome_name, ids_to_param_values, ids_to_outcome_values)
+            except server.error.ClientError as e:
+                if e.code != 404:
+                    raise
+                return None
+
+        count = self._client.count_results(self.experiment_id, until=new_cursor)
+        if count is None:
+            self._incremental = False
+            return None
+        if count != sum(1 for id in ids_to_param_values if id <= new_cursor):
+            return None
+
+        return new_cursor, new_modified_cursor
+
+    def _read_all(self, results, ids_to_param_values, ids_to_outcome_values):
+        """
+        Replace the content of the given maps with all the results of the experiment.
+
+        :param results: All the results of the experiment, as obtained from the REST server
+        :type results: iterator
+        :param ids_to_param_values: Copy of the map from result IDs to parameter values, replaced
+        :type ids_to_param_values: dict
+        :param ids_to_outcome_values: Copy of the map from result IDs to outcome values, replaced
+        :type ids_to_outcome_values: dict
+        :return: The new cursor, and no modification cursor.
+        :rtype: tuple
+        """
+
+        ids_to_param_values.clear()
+        ids_to_outcome_values.clear()
+        for res in results:
+            self._read_result(res, self.outcome_name, ids_to_param_values, ids_to_outcome_values)
+
+        return max(ids_to_param_values.keys() or [0]), None
+
+    @staticmethod
+    def _read_result(res, outcome_name, ids_to_param_values, ids_to_outcome_values):
+        """
+        Record the parameter and outcome values of a result obtained from the REST server in the given maps.
+        """
+
+        res_id = res['id']
+        param_values = {}
+        ids_to_outcome_values.pop(res_id, None)
+        for v in res['variables']:
+            if cmp(v['name'],outcome_name) == 0:
+                ids_to_outcome_values[res_id] = v['value']
+            else:
+                param_values[v['name']] = v['value']
+        ids_to_param_values[res_id] = param_values
+
+    def _snapshot(self):
+        """
+        Return copies of the current maps from result IDs to parameter values and to outcome values.
+
+        The maps are changed in place, so the copies are made while holding the lock.
+
+        :return: Tuple of the two maps.
+        :rtype: tuple
+        """
+
+        with self._lock:
+            return dict(self._ids_to_param_values), dict(self._ids_to_outcome_values)
+
+    def _change(self, change, changed=(), deleted=()):
+        """
+        Apply ``change`` in place to the maps from result IDs to parameter and outcome values.
+
+        ``change`` must give new values to the results it changes rather than modify their
+        values, which are shared with the copies made by :meth:`_snapshot` and :meth:`_save_state`.
+
+        :param change: Function modifying the two maps given as arguments.
+        :type change: function
+        :param changed: IDs of the results added or modified by ``change`` (default: none)
+        :type changed: list
+        :param deleted: IDs of the results removed by ``change`` (default: none)
+        :type deleted: list
+        """
+
+        with self._lock:
+            change(self._ids_to_param_values, self._ids_to_outcome_values)
+            self._track_results(changed, deleted)
+
+            if self._syncs > 0:
+                self._changes.append(change)
+
+    def _track_results(self, changed=(), deleted=()):
+        """
+        Update the index from parameter values to result IDs and the result columns,
+        for results changed or deleted in the current maps.
+
+        :param changed: IDs of the results added or modified (default: none)
+        :type changed: list
+        :param deleted: IDs of the results removed (default: none)
+        :type deleted: list
+        """
+
+        with self._lock:
+            columns = self._columns
+            if columns is not None:
+                for id in deleted:
+                    columns.remove(id)
+
+            for id in changed:
+                if id not in self._ids_to_param_values:
+                    # The result was forgotten since
+                    if columns is not None:
+                        columns.remove(id)
+                    continue
+
+                param_values = self._ids_to_param_values[id]
+                key = _param_key(param_values)
+                self._param_keys_to_ids.setdefault(key, set()).add(id)
+                if columns is not None:
+                    columns.set(id, param_values, self._ids_to_outcome_values.get(id),
+                                id in self._ids_to_outcome_values)
+
+    def _track_all_results(self):
+        """
+        Rebuild the index from parameter values to result IDs and the result columns from the current maps.
+        """
+
+        with self._lock:
+            self._param_keys_to_ids = {}
+            self._columns = ResultColumns(self.parameters)
+            self._track_results(self._ids_to_param_values.keys())
+
+    def _columns_snapshot(self, names=None):
+        """
+        Return copies of the result columns.
+
+        The parameter values of the results they list can be read from the maps while still
+        holding the lock, since the results can be forgotten once it is released.
+
+        :param names: Names of the columns to copy (default: ``None``, all of them, see :meth:`ResultColumns.snapshot`).
+        :type names: list
+        :return: Columns by name.
+        :rtype: dict
+        """
+
+        with self._lock:
+            return self._columns.snapshot(names)
+
+    def _find_id(self, key):
+        """
+        Look up the ID of a result from the key of its parameter values, in the index.
+
+        IDs listed by the index for results which were forgotten or changed since are removed from it.
+
+        :param key: Key of parameter values (see :func:`_param_key`)
+        :type key: tuple
+        :return: ID of a result with these parameter values, or ``None`` if none is known.
+        :rtype: int
+        """
+
+        with self._lock:
+            ids = self._param_keys_to_ids.get(key, ())
+            for id in sorted(ids, reverse=True):
+                values = self._ids_to_param_values.get(id)
+                if values is not None and _param_key(values) == key:
+                    return id
+                ids.discard(id)
+            self._param_keys_to_ids.pop(key, None)
+        return None
 
     @catch_exception
     def suggest(self):
@@ -542,10 +1129,24 @@ class Experiment:
         result = self._client.get_result(result_id)
         variables = result['variables']
         while not variables:
-            time.sleep(2)
+            time.sleep(SUGGEST_POLL_INTERVAL)
             result = self._client.get_result(result_id)
             variables = result['variables']
 
+        return self._make_suggestion(result_id, variables)
+
+    def _make_suggestion(self, result_id, variables):
+        """
+        Build the suggested job from the variables of its result, and keep track of it.
+
+        :param result_id: ID of the suggested result
+        :type result_id: int
+        :param variables: Variables of the suggested result, as obtained from the REST server
+        :type variables: list
+        :return: Values to assign to the parameters in the suggested job.
+        :rtype: Result
+        """
+
         # Put in nicer format
         next = {}
         for var in variables:
@@ -562,7 +1163,9 @@ class Experiment:
                     next[var['name']] = python_types[self.parameters[var['name']]['type']](value)
             
         # Keep track of id / param_values relationship
-        self._ids_to_param_values[result_id] = next
+        def change(ids_to_param_values, ids_to_outcome_values):
+            ids_to_param_values[result_id] = next
+        self._change(change, [result_id])
         next = Result(next)
         next._result_id = result_id
         next._experiment_id = self.experiment_id
@@ -581,13 +1184,17 @@ class Experiment:
         :rtype: dict or None
         """
         result = None
-        if id in self._ids_to_param_values:            
-            result = Result(self._ids_to_param_values[id])
+        with self._lock:
+            values = self._ids_to_param_values.get(id)
+        if values is not None:
+            result = Result(values)
 
         else:
             self._sync_with_server()
-            if id in self._ids_to_param_values:
-                result = Result(self._ids_to_param_values[id])
+            with self._lock:
+                values = self._ids_to_param_values.get(id)
+            if values is not None:
+                result = Result(values)
 
         if result is not None:
             result._result_id = id
@@ -613,41 +1220,66 @@ class Experiment:
             else: # Result belongs to another experiment
                 param_values = dict(param_values)
 
-        # Sync with the REST server
-        self._sync_with_server()
-
-        id = None
-
-        for k,v in self._ids_to_param_values.iteritems():
-            if cmp(v,param_values) == 0:
-                id = k
+        key = _param_key(param_values)
+        id = self._find_id(key)
+        if id is None:
+            # Sync with the REST server, the result might have been added by another process
+            self._sync_with_server()
+            id = self._find_id(key)
 
         return id
 
     @catch_exception
-    def get_all_results(self):
+    def get_all_results(self, max_staleness=None):
         """
         Return a list of all jobs and a list of their corresponding outcomes.
         Pending outcomes are returned as having ``None`` outcomes.
 
+        :param max_staleness: Age in seconds up to which the results known locally are returned without syncing (default: ``None``, that of the experiment).
+        :type max_staleness: float
         :return: Tuple of lists containing parameter values and corresponding outcomes indexed by unique result id.
         :rtype: tuple of lists
         """
 
         # Sync with the REST server
-        self._sync_with_server()
+        self._refresh(max_staleness)
 
+        ids_to_param_values, ids_to_outcome_values = self._snapshot()
         jobs     = []
         outcomes = []
-        for k,v in self._ids_to_param_values.iteritems():
+        for k,v in ids_to_param_values.iteritems():
             if v:
                 jobs.append(Result(v))
                 jobs[-1]._result_id = k
                 jobs[-1]._experiment_id = self.experiment_id
-                outcomes.append(self._ids_to_outcome_values.get(k, None))            
+                outcomes.append(ids_to_outcome_values.get(k, None))
 
         return jobs, outcomes
 
+    @catch_exception
+    def get_results_columns(self, max_staleness=None):
+        """
+        Return the parameter and outcome values of all jobs, in one numpy array per parameter.
+
+        The arrays have a row per job, in the same order: under ``'id'`` the unique result ids,
+        under ``'outcome'`` the outcomes (``nan`` for pending jobs), under ``'pending'``
+        whether each job is pending, and under the name of each parameter its values
+        (with a column per element for parameters of ``size`` above 1). The values of
+        integer parameters are floats, ``nan`` for jobs without a value.
+
+        :param max_staleness: Age in seconds up to which the results known locally are returned without syncing (default: ``None``, that of the experiment).
+        :type max_staleness: float
+        :return: Arrays by name.
+        :rtype: dict
+        """
+
+        # Sync with the REST server
+        self._refresh(max_staleness)
+
+        columns = self._columns_snapshot()
+        del columns['known']
+        return columns
+
     @catch_exception
     def cancel_by_result_id(self, id):
         """
@@ -658,6 +1290,7 @@ class Experiment:
         """
 
         self._client.delete_result(id)
+        self._forget([id])
 
     @catch_exception
     def update_by_result_id(self, result_id, outcome_val):
@@ -675,29 +1308,35 @@ class Experiment:
 
         result_id = int(result_id)
 
-        result = self._client.get_result(result_id)
-        if result is None or 'variables' not in result:
-            raise ValueError("Job with result_id '" + str(result_id) + "' not found.")
+        self._report_outcome(result_id, outcome_val)
+        self._set_outcome(result_id, outcome_val)
 
-        for var in result['variables']:
-            if var['name'] == self.outcome_name:
-                var['value'] = outcome_val
-                break # Assume only one outcome per experiment!
-        self._client.update_result(result_id,result)
-        self._ids_to_outcome_values[result_id] = outcome_val
+    def _set_outcome(self, result_id, outcome_val, param_values=None):
+        """
+        Keep track of the outcome value of a result, and of its parameter values if given.
 
-    @catch_exception
-    def update(self, param_values, outcome_val):
+        :param result_id: Unique result identifier
+        :type result_id: int
+        :param outcome_val: Outcome value associated with this result
+        :type outcome_val: float
+        :param param_values: Values of parameters of this result (default: ``None``, unchanged)
+        :type param_values: dict
         """
-        Update the experiment with the outcome value associated with some parameter values.
+
+        def change(ids_to_param_values, ids_to_outcome_values):
+            if param_values is not None:
+                ids_to_param_values[result_id] = param_values
+            ids_to_outcome_values[result_id] = outcome_val
+        self._change(change, [result_id])
+
+    def _validate_param_values(self, param_values):
+        """
+        Check that ``param_values`` assigns a valid value to each parameter of the experiment.
 
         :param param_values: Values of parameters.
         :type param_values: dict
-        :param outcome_val: Value of the outcome.
-        :type outcome_val: type defined for outcome
         """
-        if outcome_val is not None:
-            outcome_val = float(outcome_val)
+
         # Check if param_values is compatible
         for param,value in param_values.iteritems():
             if param not in self.parameters:
@@ -732,6 +1371,44 @@ class Experiment:
             if param not in param_values:
                 raise ValueError("Parameter '" +param+ "' not specified")
 
+    def _report_outcome(self, result_id, outcome_val):
+        """
+        Fill in the outcome value of an existing result, on the REST server.
+
+        :param result_id: Unique result identifier
+        :type result_id: int
+        :param outcome_val: Outcome value associated with this result
+        :type outcome_val: float
+        """
+
+        result = self._client.get_result(result_id)
+        if result is None or 'variables' not in result:
+            raise ValueError("Job with result_id '" + str(result_id) + "' not found.")
+
+        # Work on a copy, as the result might be shared with the client's response cache
+        result = dict(result)
+        result['variables'] = [dict(var) for var in result['variables']]
+        for var in result['variables']:
+            if var['name'] == self.outcome_name:
+                var['value'] = outcome_val
+                break # Assume only one outcome per experiment!
+        self._client.update_result(result_id,result)
+
+    @catch_exception
+    def update(self, param_values, outcome_val):
+        """
+        Update the experiment with the outcome value associated with some parameter values.
+
+        :param param_values: Values of parameters.
+        :type param_values: dict
+        :param outcome_val: Value of the outcome.
+        :type outcome_val: type defined for outcome
+        """
+        if outcome_val is not None:
+            outcome_val = float(outcome_val)
+
+        self._validate_param_values(param_values)
+
         # Check whether this param_values has a results ID
         if (type(param_values) == Result and 
                 param_values._result_id is not None and
@@ -746,7 +1423,9 @@ class Experiment:
 
             # Create variables for new result
             variables = []
-            for name, setting_id in self._param_names_to_setting_ids.iteritems():
+            with self._lock:
+                param_names_to_setting_ids = self._param_names_to_setting_ids
+            for name, setting_id in param_names_to_setting_ids.iteritems():
                 if name in param_values:
                     value = param_values[name]
                 elif name == self.outcome_name:
@@ -761,19 +1440,13 @@ class Experiment:
 
             result_id = self._client.add_result(variables, self.experiment_id, self.experiment_description)
 
-            self._ids_to_param_values[result_id] = param_values
-            self._ids_to_outcome_values[result_id] = outcome_val
+            self._set_outcome(result_id, outcome_val, param_values)
             
         else:
             # Fill in result with the given outcome value
             if outcome_val is not None:
-                result = self._client.get_result(result_id)
-                for var in result['variables']:
-                    if var['name'] == self.outcome_name:
-                        var['value'] = outcome_val
-                        break # Assume only one outcome per experiment!
-                self._client.update_result(result_id,result)
-                self._ids_to_outcome_values[result_id] = outcome_val
+                self._report_outcome(result_id, outcome_val)
+                self._set_outcome(result_id, outcome_val)
 
     @catch_exception
     def cancel(self,param_values):
@@ -789,9 +1462,7 @@ class Experiment:
 
         if id is not None:
             # Delete from internals
-            del self._ids_to_param_values[id]
-            if id in self._ids_to_outcome_values:
-                del self._ids_to_outcome_values[id]
+            self._forget([id])
 
             # Delete from server
             self._client.delete_result(id)
@@ -799,22 +1470,25 @@ class Experiment:
             print 'Did not find experiment with the provided parameters'
 
     @catch_exception
-    def pending(self):
+    def pending(self, max_staleness=None):
         """
         Return the list of jobs which have been suggested, but for which no 
         result has been provided yet.
 
+        :param max_staleness: Age in seconds up to which the results known locally are returned without syncing (default: ``None``, that of the experiment).
+        :type max_staleness: float
         :return: List of parameter values.
         :rtype: list
         """
     
         # Sync with the REST server     
-        self._sync_with_server()
+        self._refresh(max_staleness)
         
         # Find IDs of results with value None and append parameters to returned list
-        ret = [] 
-        for key,val in self._ids_to_outcome_values.iteritems():
-            if val is None:
+        with self._lock:
+            columns = self._columns_snapshot(['id', 'pending'])
+            ret = [] 
+            for key in columns['id'][columns['pending']].tolist():
                 ret.append(Result(self._ids_to_param_values[key]))
                 ret[-1].result_id = key
                 ret[-1].experiment_id = self.experiment_id
@@ -827,62 +1501,90 @@ class Experiment:
         Cancel jobs (results) that are marked as pending.
         """
 
-        p = self.pending()
-        for job in p:
-            self.cancel(job)
+        # Sync with the REST server
+        self._sync_with_server()
+
+        columns = self._columns_snapshot(['id', 'pending'])
+        ids = columns['id'][columns['pending']].tolist()
+        errors = self._client.delete_results(ids)
+
+        # Delete from internals the jobs which were cancelled, even if others weren't
+        self._forget([id for id, error in zip(ids, errors) if error is None])
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def _forget(self, ids):
+        """
+        Stop keeping track of the results with the given IDs.
+
+        :param ids: Unique result identifiers
+        :type ids: list
+        """
+
+        def change(ids_to_param_values, ids_to_outcome_values):
+            for id in ids:
+                ids_to_param_values.pop(id, None)
+                ids_to_outcome_values.pop(id, None)
+        self._change(change, deleted=ids)
 
     @catch_exception
-    def best(self):
+    def best(self, max_staleness=None):
         """
         Return job with best outcome found so far.
         
+        :param max_staleness: Age in seconds up to which the results known locally are used without syncing (default: ``None``, that of the experiment).
+        :type max_staleness: float
         :return: Parameter values with best outcome.
         :rtype: dict
         """
 
         # Sync with the REST server
-        self._sync_with_server()
+        self._refresh(max_staleness)
 
         # Find ID of result with best outcome
-        ids = np.array(self._ids_to_outcome_values.keys())
-        outcomes = [self._ids_to_outcome_values[i] for i in ids]
+        with self._lock:
+            columns = self._columns_snapshot(['id', 'outcome', 'known'])
+            ids = columns['id'][columns['known']]
+            outcomes = columns['outcome'][columns['known']]
 
-        # Clean up nans, infs and Nones
-        outcomes = np.array(map(lambda x: float(x) if x is not None else -np.inf, outcomes))
-        outcomes[np.logical_not(np.isfinite(outcomes))] = -np.inf
-        result_id = ids[outcomes.argmax()]
+            # Clean up nans, infs and Nones (which are nans in the columns)
+            outcomes[np.logical_not(np.isfinite(outcomes))] = -np.inf
+            result_id = int(ids[outcomes.argmax()])
 
-        result = Result(self._ids_to_param_values[result_id])
+            result = Result(self._ids_to_param_values[result_id])
         result._result_id     = result_id
         result._experiment_id = self.experiment_id
 
         return result
     
     @catch_exception
-    def report(self):
+    def report(self, max_staleness=None):
         """
         Plot a visual report of the progress made so far in the experiment.
+
+        :param max_staleness: Age in seconds up to which the results known locally are plotted without syncing (default: ``None``, that of the experiment).
+        :type max_staleness: float
         """
 
         # Sync with the REST server
-        self._sync_with_server()
+        self._refresh(max_staleness)
 
         # Report historical progress and results assumed pending
         import matplotlib.pyplot as plt        
 
         # Get outcome values and put them in order of their IDs,
         # which should be equivalent to chronological order (of suggestion time)
-        ids = np.array(self._ids_to_outcome_values.keys())
-        outcomes_values = np.array(self._ids_to_outcome_values.values())
-
-        # Clean up nans, infs and Nones
-        outcomes_values = np.array(map(lambda x: float(x) if x is not None else -np.inf, outcomes_values))
-        outcomes_values[np.logical_not(np.isfinite(outcomes_values))] = -np.inf
-
-        s = ids.argsort()
-        ids = ids[s]
-        outcome_values = outcomes_values[s]
-        outcome_values = np.array([float(i) for i in outcome_values])
+        columns = self._columns_snapshot()
+        known = columns['known']
+        s = columns['id'][known].argsort()
+        ids = columns['id'][known][s]
+        pending = columns['pending'][known][s]
+        outcomes = columns['outcome'][known][s]
+
+        # Clean up nans, infs and Nones (which are nans in the columns)
+        outcome_values = outcomes.copy()
+        outcome_values[np.logical_not(np.isfinite(outcome_values))] = -np.inf
         if outcome_values.size == 0 or np.all(np.isinf(outcome_values)):
             print 'There are no completed results to report'
             return
@@ -891,7 +1593,7 @@ class Experiment:
         plt.figure(1)
         plt.clf()
         y = outcome_values
-        best_so_far = [ np.max(y[:(i+1)]) for i in range(len(y)) ]
+        best_so_far = np.maximum.accumulate(y)
         plt.scatter(range(len(y)),y,marker='x',color='k',label='Outcomes')
         plt.plot(range(len(y)),best_so_far,color='k',label='Best so far')
         plt.xlabel('Result #')
@@ -906,18 +1608,16 @@ class Experiment:
         plt.figure(2)
         param_names = list(np.sort(self.parameters.keys()))
         col_names = ['Result #'] + param_names + [self.outcome_name]
+        param_columns = [columns[name][known][s] for name in param_names]
         cell_text = []
-        for nb,id in enumerate(ids):
-            # Get paramater values, put in correct order and add to
+        # Only the last 20 results are shown
+        for nb in range(max(0, len(ids) - 20), len(ids)):
+            # Get paramater values, in the order of their names, and add to
             # table with corresponding outcome value
-            params, values = zip(*self._ids_to_param_values[id].iteritems())
-            s = np.argsort(params)
-            values = np.array(values)[s]
-            outcome = self._ids_to_outcome_values[id]
+            values = [np.asarray(column[nb]).tolist() for column in param_columns]
+            outcome = None if pending[nb] else outcomes[nb]
             cell_text.append([str(nb+1)] + [str(v) for v in values] + [str(outcome)])
 
-        if len(cell_text) > 20:
-            cell_text = cell_text[-20:]
         the_table = plt.table(cellText = cell_text, colLabels=col_names, loc='center')
 
         ## change cell properties
@@ -934,6 +1634,166 @@ class Experiment:
 
 
 
+class AsyncExperiment:
+    """
+    A Whetlab tuning experiment whose methods do not block.
+
+    It takes the same arguments as :class:`Experiment`, as well as ``max_workers``,
+    the number of calls to the server that can run at once (default: ``10``).
+    The experiment is created (or resumed) when the instance is constructed.
+
+    Each of :meth:`suggest`, :meth:`update`, :meth:`pending`, :meth:`best`
+    and :meth:`get_all_results` returns immediately a :class:`whetlab.server.executor.Future`.
+    Its ``result()`` method waits for and returns the value the corresponding
+    method of :class:`Experiment` would return (or raises its exception), and
+    ``add_done_callback()`` registers a function to call once it is available.
+
+    All the calls of the experiment are run by the same pool of ``max_workers`` threads,
+    so that many jobs can be in flight at the same time without a thread for each of them.
+    In particular, polling the server for a suggestion doesn't hold a thread between two polls.
+    Each request to the server still blocks the thread running it, so at most ``max_workers``
+    requests are sent at once, and the others wait for a free thread.
+
+    :ivar experiment: The underlying synchronous experiment.
+    :type experiment: Experiment
+    """
+
+    @catch_exception
+    def __init__(self,
+                 name,
+                 description='',
+                 parameters=None,
+                 outcome=None,
+                 resume = True,
+                 access_token=None,
+                 client_options=None,
+                 max_workers=DEFAULT_MAX_WORKERS,
+                 max_staleness=0,
+                 stale_while_revalidate=0):
+
+        # Allow for one pooled connection per worker
+        client_options = dict(client_options or {})
+        client_options.setdefault('pool_size', max_workers)
+
+        self.experiment = Experiment(name, description, parameters, outcome,
+                                     resume, access_token, client_options,
+                                     max_staleness, stale_while_revalidate)
+        self.experiment_id = self.experiment.experiment_id
+
+        self._client = self.experiment._client
+        self._executor = server.executor.Executor(max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Wait for the calls in progress, then close the connections to the server.
+        """
+
+        self._executor.shutdown()
+        self.experiment.close()
+
+    def _submit(self, f, *args):
+        """
+        Run ``f`` in the background, on one of the workers.
+        """
+
+        return self._executor.submit(catch_exception(f), *args)
+
+    def suggest(self):
+        """
+        Suggest a new job.
+
+        :return: Future of the values to assign to the parameters in the suggested job.
+        :rtype: whetlab.server.executor.Future
+        """
+
+        future = server.executor.Future()
+
+        @catch_exception
+        def poll(result_id):
+            result = self._client.get_result(result_id)
+            if not result['variables']:
+                # The next poll fails, rather than never happens, if the experiment is closed before
+                self._executor.call_later(SUGGEST_POLL_INTERVAL, step, poll, result_id).add_done_callback(forward_error)
+                return
+
+            future.set_result(self.experiment._make_suggestion(result_id, result['variables']))
+
+        @catch_exception
+        def start():
+            poll(self._client.get_suggestion(self.experiment_id))
+
+        def step(f, *args):
+            try:
+                f(*args)
+            except Exception as e:
+                future.set_exception(e)
+
+        def forward_error(timer):
+            if timer.exception() is not None:
+                future.set_exception(timer.exception())
+
+        self._executor.submit(step, start)
+        return future
+
+    def update(self, param_values, outcome_val):
+        """
+        Update the experiment with the outcome value associated with some parameter values.
+
+        :param param_values: Values of parameters.
+        :type param_values: dict
+        :param outcome_val: Value of the outcome.
+        :type outcome_val: type defined for outcome
+        :return: Future which is done once the update is complete.
+        :rtype: whetlab.server.executor.Future
+        """
+
+        return self._submit(self.experiment.update, param_values, outcome_val)
+
+    def pending(self, max_staleness=None):
+        """
+        Return the list of jobs which have been suggested, but for which no 
+        result has been provided yet.
+
+        :param max_staleness: Age in seconds up to which the results known locally are used without syncing (default: ``None``, that of the experiment).
+        :type max_staleness: float
+        :return: Future of the list of parameter values.
+        :rtype: whetlab.server.executor.Future
+        """
+
+        return self._submit(self.experiment.pending, max_staleness)
+
+    def best(self, max_staleness=None):
+        """
+        Return job with best outcome found so far.
+
+        :param max_staleness: Age in seconds up to which the results known locally are used without syncing (default: ``None``, that of the experiment).
+        :type max_staleness: float
+        :return: Future of the parameter values with best outcome.
+        :rtype: whetlab.server.executor.Future
+        """
+
+        return self._submit(self.experiment.best, max_staleness)
+
+    def get_all_results(self, max_staleness=None):
+        """
+        Return a list of all jobs and a list of their corresponding outcomes.
+        Pending outcomes are returned as having ``None`` outcomes.
+
+        :param max_staleness: Age in seconds up to which the results known locally are used without syncing (default: ``None``, that of the experiment).
+        :type max_staleness: float
+        :return: Future of the tuple of lists containing parameter values and corresponding outcomes.
+        :rtype: whetlab.server.executor.Future
+        """
+
+        return self._submit(self.experiment.get_all_results, max_staleness)
+
+
 class Result(dict):
     """
     Simple class for results, which contain a result ID as metadata.
@@ -943,43 +1803,125 @@ class Result(dict):
     _result_id     = None    
 
 
-RETRY_TIMES = [5,30,60,150,300]
+class RetryPolicy(object):
+    """
+    Policy for retrying calls to the server which failed because of a temporary problem.
+
+    Connection errors, timeouts, rate limiting (429) and server errors (above 500) are
+    retried after a decorrelated jittered exponential backoff: each wait is
+    drawn uniformly between ``base`` and three times the previous wait, up to
+    ``cap``. When the server sends a ``Retry-After`` header, its delay is
+    waited instead.
+
+    A call is given up, and its last error raised, once it has been attempted
+    ``max_attempts`` times or when the next wait would end after its
+    ``deadline``.
+
+    :param base: Shortest wait between two attempts, in seconds (default: ``1``).
+    :type base: float
+    :param cap: Longest wait between two attempts, in seconds (default: ``60``).
+    :type cap: float
+    :param max_attempts: Maximum number of attempts of a call, ``1`` to never retry (default: ``6``).
+    :type max_attempts: int
+    :param deadline: Longest total time spent on a call, in seconds (default: ``300``).
+    :type deadline: float
+    :param clock: Object providing ``time()`` and ``sleep(seconds)``, e.g. to skip the waits in tests (default: the ``time`` module).
+    """
 
-def retry(f):
-    @functools.wraps(f)
-    def func(*args, **kwargs):
-        for i in range(len(RETRY_TIMES)+1):
+    def __init__(self, base=1., cap=60., max_attempts=6, deadline=300., clock=time):
+        self.base = base
+        self.cap = cap
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.clock = clock
+
+    def call(self, f, args, kwargs, instrumentation=None, deadline=None):
+        """
+        Call ``f(*args, **kwargs)``, retrying it according to the policy.
+
+        :param instrumentation: Instrumentation recording the retries (default: ``None``).
+        :type instrumentation: whetlab.server.http_client.instrumentation.Instrumentation
+        :param deadline: Deadline of this call, in seconds (default: ``None``, the deadline of the policy).
+        :type deadline: float
+        :return: Value returned by the call.
+        """
+
+        if deadline is None:
+            deadline = self.deadline
+
+        start = self.clock.time()
+        wait = self.base
+        for attempt in range(1, self.max_attempts+1):
             try:
                 return f(*args, **kwargs)
-            except requests.exceptions.ConnectionError as e:
-                if i == len(RETRY_TIMES):
-                    raise e
-                if i >=3 : # Only warn starting at the 2nd retry
-                    print 'WARNING: experiencing problems communicating with the server. Will try again in ',RETRY_TIMES[i],' seconds.'
-                time.sleep(RETRY_TIMES[i])
-            except ClientError as e: # An explicit error was returned by the server
-                if e.code == 503: # Temporary server maintenance
-                    retry_time = np.round(np.random.rand()*2*30)
-                    i -= 1
-                    print 'WARNING: Server is undergoing temporary maintenance. Will try again in %d seconds.' % (retry_time)
-                    time.sleep(retry_time)
-                elif e.code == 429:
-                    if i == len(RETRY_TIMES):
-                        i -= 1
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ClientError) as e:
+                error = sys.exc_info()
+                if attempt == self.max_attempts or not self.is_retryable(e):
+                    raise error[0], error[1], error[2]
+
+                wait = self.next_wait(wait)
+                delay = self.retry_after(e)
+                if delay is None:
+                    delay = wait
+                if self.clock.time() + delay - start > deadline:
+                    raise error[0], error[1], error[2]
+
+                if isinstance(e, ClientError) and e.code == 429:
                     msg = e.message[0] if type(e.message) == list else e.message
-                    print 'WARNING: rate limited by the server: %s Will try again in %d seconds.' % (msg, RETRY_TIMES[i])
-                    time.sleep(RETRY_TIMES[i])
-                elif e.code > 500:
-                    if i == len(RETRY_TIMES):
-                        raise e
-                    if i >=3 : # Only warn starting at the 2nd retry
-                        print 'WARNING: experiencing problems communicating with the server. Will try again in ',RETRY_TIMES[i],' seconds.'
-                    time.sleep(RETRY_TIMES[i])
-                else:
-                    raise
-            except:
-                raise 
-                       
+                    print 'WARNING: rate limited by the server: %s Will try again in %d seconds.' % (msg, delay)
+                elif attempt >= 3: # Only warn starting at the 2nd retry
+                    print 'WARNING: experiencing problems communicating with the server. Will try again in %d seconds.' % delay
+
+                if instrumentation is not None:
+                    instrumentation.record_retry(f.__name__, delay, e)
+                self.clock.sleep(delay)
+
+    def next_wait(self, wait):
+        """
+        Wait before the next attempt, in seconds, from the previous one.
+        """
+
+        return min(self.cap, random.uniform(self.base, wait * 3))
+
+    @staticmethod
+    def is_retryable(error):
+        if isinstance(error, ClientError):
+            return error.code == 429 or error.code > 500
+        return True
+
+    def retry_after(self, error):
+        """
+        Delay asked for by the ``Retry-After`` header of an error, in seconds, if any.
+        """
+
+        value = getattr(error, 'headers', {}).get('retry-after')
+        if value is None:
+            return None
+
+        try:
+            return max(0., float(value))
+        except ValueError:
+            date = email.utils.parsedate_tz(value)
+            if date is None:
+                return None
+            return max(0., email.utils.mktime_tz(date) - self.clock.time())
+
+# Policy used by clients which weren't given one
+RETRY_POLICY = RetryPolicy()
+
+def retry(f):
+    @functools.wraps(f)
+    def func(*args, **kwargs):
+        # Retries follow the policy of the client making the call, and are recorded by its instrumentation.
+        # Calls with a long read timeout get that much more time before their deadline.
+        client = args[0] if args else None
+        policy = getattr(client, 'retry_policy', None) or RETRY_POLICY
+        deadline = None
+        if hasattr(client, 'call_timeout'):
+            read_timeout = client.call_timeout(f.__name__, kwargs.get('timeout'))[1]
+            if read_timeout is not None:
+                deadline = policy.deadline + read_timeout
+        return policy.call(f, args, kwargs, getattr(client, 'instrumentation', None), deadline)
     return func
 
 class SimpleREST:
@@ -988,21 +1930,109 @@ class SimpleREST:
 
     The main reason for this class is to deal with retries, to be
     robust to glitches in the communication with the server.
+
+    Each call accepts a ``timeout``, in seconds for reading the response or as a
+    ``(connect, read)`` tuple, overriding the default of the call (see :attr:`TIMEOUTS`).
     """
 
-    def __init__(self, access_token, url):
-        
+    # Default read timeouts of the calls which can take longer than the others, in seconds
+    TIMEOUTS = {'get_results': 600., '_get_results_stream': 600.}
+
+    def __init__(self, access_token, url, options=None):
+        """
+        :param access_token: User access token
+        :type access_token: str
+        :param url: URL of the REST server
+        :type url: str
+        :param options: Connection options passed on to the REST client (e.g. ``'pool_size'``, ``'max_retries'``, ``'keep_alive'``), as well as ``'stream_results'`` (whether :meth:`iter_results` decodes results while they are downloaded, default: ``False``), ``'retry_policy'`` (:class:`RetryPolicy` of the calls, default: ``None`` for :data:`RETRY_POLICY`), ``'timeouts'`` (read timeouts of the calls, by method name, overriding :attr:`TIMEOUTS`), ``'page_size'`` (number of settings or results per page, default: :data:`DEFAULT_PAGE_SIZE`), ``'prefetch'`` (whether the next page is requested while the current one is consumed, default: ``True``), ``'experiment_index'`` (path of the file indexing experiment IDs by name, default: ``None`` to always search the server), ``'experiment_index_ttl'`` (seconds during which the IDs of the index are used, default: ``600``) and ``'experiment_store'`` (path of the database keeping the state of experiments, see :attr:`experiment_store`, default: ``None``)
+        :type options: dict
+        """
 
         # Create REST server client
-        options = ({'headers' : {'Authorization':'Bearer ' + access_token}, 
-                    'user_agent':'whetlab_python_client',
-                    'api_version':'api',
-                    'base': url})
-        
-        self._client = server.Client({},options)
+        client_options = ({'headers' : {'Authorization':'Bearer ' + access_token}, 
+                           'user_agent':'whetlab_python_client',
+                           'api_version':'api',
+                           'base': url})
+        if options is not None:
+            client_options.update(options)
+
+        self._stream_results = client_options.pop('stream_results', False)
+        self.retry_policy = client_options.pop('retry_policy', None)
+        self._timeouts = dict(self.TIMEOUTS, **client_options.pop('timeouts', {}))
+        self._page_size = client_options.pop('page_size', DEFAULT_PAGE_SIZE)
+        self._prefetch = client_options.pop('prefetch', True)
+
+        index_path = client_options.pop('experiment_index', None)
+        index_ttl = client_options.pop('experiment_index_ttl', DEFAULT_INDEX_TTL)
+        self._index = ExperimentIndex(index_path, index_ttl, client_options['base'], access_token) if index_path else None
+
+        # Local copy of the state of experiments, used by Experiment
+        store_path = client_options.pop('experiment_store', None)
+        self.experiment_store = ExperimentStore(store_path, client_options['base'], access_token) if store_path else None
+
+        self._client = server.Client({},client_options)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Close the pooled connections to the REST server.
+        """
+
+        self._client.close()
+
+    @property
+    def instrumentation(self):
+        """
+        Instrumentation recording the requests and retries of this client.
+        """
+
+        return self._client.http_client.instrumentation
+
+    def stats(self):
+        """
+        Statistics on the requests made so far and their retries.
+
+        :return: Snapshot of the statistics, under keys ``'endpoints'``, ``'retries'`` and ``'coalesced'``
+        :rtype: dict
+        """
+
+        return self.instrumentation.stats()
+
+    def call_timeout(self, name, timeout=None):
+        """
+        Timeout of a call: the one given to the call, or the default of the method, or the one of the client.
+
+        :param name: Name of the method called
+        :type name: str
+        :param timeout: Timeout given to the call, if any
+        :type timeout: float or tuple
+        :return: Connect and read timeouts, in seconds
+        :rtype: tuple
+        """
+
+        http_client = self._client.http_client
+        if timeout is None:
+            timeout = self._timeouts.get(name, http_client.read_timeout)
+        if not isinstance(timeout, tuple):
+            timeout = (http_client.connect_timeout, timeout)
+        return timeout
+
+    def _options(self, name, timeout, options=None):
+        """
+        Options of a request made by a call, with the timeout of the call.
+        """
+
+        options = dict(options or {})
+        options['timeout'] = self.call_timeout(name, timeout)
+        return options
 
     @retry
-    def create_experiment(self, name, description, settings):
+    def create_experiment(self, name, description, settings, timeout=None):
         """
         Create experiment and return its ID.
 
@@ -1012,121 +2042,369 @@ class SimpleREST:
         :type description: str
         :param settings: Specification of the experiment's variables
         :type settings: list
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         :return: Experiment ID
         :rtype: int
         """
         
         res = self._client.experiments().create(name=name, 
                                                 description=description,
-                                                settings=settings)
+                                                settings=settings,
+                                                options=self._options('create_experiment', timeout))
+        if self._index:
+            self._index.set(name, res.body['id'])
         return res.body['id']
 
     @retry
-    def delete_experiment(self, id):
+    def delete_experiment(self, id, timeout=None):
         """
         Delete experiment with the given ID ``id``.
 
         :param id: ID of experiment to delete
         :type ind: int
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         """
 
-        res = self._client.experiment(str(id)).delete()
+        res = self._client.experiment(str(id)).delete(self._options('delete_experiment', timeout))
+        if self._index:
+            self._index.discard(id)
+        if self.experiment_store:
+            self.experiment_store.discard(id)
         print 'Experiment has been deleted'
 
     @retry
-    def find_experiment(self, name):
+    def find_experiment(self, name, timeout=None):
         """
         Look for experiment matching name and return its ID.
 
+        IDs found recently are read from the experiment index (see the option
+        ``'experiment_index'``), and only checked against the server with a request
+        by ID. IDs of experiments which were deleted or renamed since are dropped
+        from the index, and the experiment is searched by name instead.
+
         :param name: Experiment's name
         :type name: str
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         :return: Experiment's ID.
         :rtype: int
         """
 
-        # Search one page at a time
-        page = 1
-        more_pages = True
-        while more_pages:
-            rest_exps = self._client.experiments().get({'query':{'page':page}}).body
+        id = self._index.get(name) if self._index else None
+        if id is not None:
+            experiment = self._get_experiment(id, timeout)
+            if experiment is not None and cmp(experiment['name'],name) == 0:
+                return id
+            self._index.discard(id)
+
+        # Ask for the experiment by name. Servers which don't filter experiments
+        # by name answer with the first page of all experiments instead
+        rest_exps = self._get_experiments_page({'page':1, 'name':name}, timeout)
+        id = self._match_experiment(rest_exps['results'], name)
+        if id is None and rest_exps['next'] is not None:
+            if rest_exps.get('count') and rest_exps['results']:
+                # Fetch the other pages all at once
+                page_size = len(rest_exps['results'])
+                n_pages = (rest_exps['count'] + page_size - 1) // page_size
+                pages = self._client.batch([(self._get_experiments_page, {'page':page}, timeout)
+                                            for page in range(2, n_pages + 1)], raise_errors=True)
+                for rest_exps in pages:
+                    id = self._match_experiment(rest_exps['results'], name)
+                    if id is not None:
+                        break
+            else:
+                rest_exps = server.Paginator(lambda query: self._get_experiments_page(query, timeout), {'page':2})
+                id = self._match_experiment(rest_exps, name)
 
-            # Check if more pages to come
-            more_pages = rest_exps['next'] is not None
-            page += 1
-        
-            # Find in current page whether we find the experiment we are looking for
-            rest_exps = rest_exps['results']
-            for exp in rest_exps:
-                if cmp(exp['name'],name) == 0:
-                    return exp['id']
+        if id is not None and self._index:
+            self._index.set(name, id)
+        return id
+
+    def _get_experiments_page(self, query, timeout):
+        """
+        Get a page of the experiments. Only those with the ``name`` of the query are returned, if the server supports it.
+        """
+
+        return self._client.experiments().get(self._options('find_experiment', timeout, {'query':query})).body
+
+    @staticmethod
+    def _match_experiment(rest_exps, name):
+        for exp in rest_exps:
+            if cmp(exp['name'],name) == 0:
+                return exp['id']
         return None
 
     @retry
-    def get_experiment_name_and_description(self, id):
+    def get_experiment_name_and_description(self, id, timeout=None):
         """
         Gives the name and description of an experiment, from it's ID
 
         :param id: Experiment's ID
         :type id: int
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         :return: Name and description of experiment
         :rtype: tuple (pair of str)
         """
-        res = self._client.experiments().get({'query':{'id':id}}).body['results'][0]
+        res = self._get_experiment(id, timeout)
+        if res is None:
+            raise server.error.ClientError('Experiment %s not found' % id, 404)
         return res['name'], res['description']
+
+    def _get_experiment(self, id, timeout):
+        """
+        Get the description of an experiment from its ID, or ``None`` if it doesn't exist.
+        """
+
+        try:
+            results = self._client.experiments().get(self._options('get_experiment_name_and_description', timeout,
+                                                                   {'query':{'id':id}})).body['results']
+        except server.error.ClientError as e:
+            if e.code != 404:
+                raise
+            return None
+        return results[0] if results else None
         
-    @retry
-    def get_parameters(self, id):
+    def get_parameters(self, id, timeout=None):
         """
         Gives the parameters of an experiment, from it's ID
 
         :param id: Experiment's ID
         :type id: int
+        :param timeout: Timeout of each request (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         :return: Parameters of the experiment
-        :rtype: dict
+        :rtype: list
         """
 
-        return self._client.settings().get(str(id),{'query':{'page_size':INF_PAGE_SIZE}}).body['results']
+        return list(self.iter_parameters(id, timeout=timeout))
 
-    @retry
-    def get_results(self, id):
+    def iter_parameters(self, id, timeout=None):
+        """
+        Iterate over the parameters of an experiment, from it's ID, requesting them one page at a time.
+
+        :param id: Experiment's ID
+        :type id: int
+        :param timeout: Timeout of each request (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
+        :return: Parameters of the experiment
+        :rtype: iterator
+        """
+
+        return self._paginate('get_parameters', functools.partial(self._client.settings().get, str(id)), {}, timeout)
+
+    def get_results(self, id, timeout=None):
         """
         Gives the results of an experiment, from it's ID
 
         :param id: Experiment's ID
         :type id: int
+        :param timeout: Timeout of each request (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         :return: Results of the experiment
         :rtype: list
         """
 
-        return self._client.results().get({'query': {'experiment':id,'page_size':INF_PAGE_SIZE}}).body['results']
+        return list(self._paginate('get_results', self._client.results().get, {'experiment':id}, timeout))
+
+    def _paginate(self, name, get, query, timeout, page_size=None):
+        """
+        Iterate over the items of a paginated collection, retrying the request of each page.
+
+        :param name: Name of the method iterating, giving the default timeout
+        :type name: str
+        :param get: ``get`` method of the collection
+        :type get: function
+        :param query: Query of the first page
+        :type query: dict
+        :param timeout: Timeout of each request
+        :type timeout: float or tuple
+        :param page_size: Number of items per page (default: ``None``, that of the option ``'page_size'``)
+        :type page_size: int
+        :return: Items of the collection
+        :rtype: whetlab.server.Paginator
+        """
+
+        if page_size is None:
+            page_size = self._page_size
+        timeout = self.call_timeout(name, timeout)
+        # The next pages are prefetched by the workers running batches of calls
+        executor = self._client.get_executor() if self._prefetch else None
+        return server.Paginator(lambda query: self._get_page(get, query, timeout=timeout), query,
+                                page_size, executor)
+
+    @retry
+    def _get_page(self, get, query, timeout=None):
+        """
+        Get a page of a collection.
+
+        :param get: ``get`` method of the collection
+        :type get: function
+        :param query: Query of the page
+        :type query: dict
+        :param timeout: Timeout of the request
+        :type timeout: tuple
+        :return: Body of the page
+        :rtype: dict
+        """
+
+        return get(self._options('_get_page', timeout, {'query':dict(query)})).body
+
+    def iter_results(self, id, timeout=None, since=None, modified_since=None):
+        """
+        Iterate over the results of an experiment, from it's ID.
+
+        The results are requested one page at a time, the next page being requested
+        while the results of the current one are consumed (see the options ``'page_size'``
+        and ``'prefetch'``). If the option ``'stream_results'`` is set instead, all the results
+        are requested at once and decoded one at a time while the response is being downloaded
+        (see :meth:`_iter_results_stream`).
+
+        :param id: Experiment's ID
+        :type id: int
+        :param timeout: Timeout of each request (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
+        :param since: Only the results with a greater ID are requested, if the server supports it (default: ``None``, all results)
+        :type since: int
+        :param modified_since: Only the results modified at or after this time are requested, if the server
+                               supports it (default: ``None``, all results)
+        :type modified_since: int
+        :return: Results of the experiment
+        :rtype: iterator
+        """
+
+        query = {'experiment':id}
+        if since is not None:
+            query['id__gt'] = since
+        if modified_since is not None:
+            query['modified__gte'] = modified_since
+
+        if not self._stream_results:
+            return iter(self._paginate('get_results', self._client.results().get, query, timeout))
+
+        return self._iter_results_stream(id, timeout=timeout, since=since, modified_since=modified_since)
+
+    def _iter_results_stream(self, id, timeout=None, since=None, modified_since=None):
+        """
+        Iterate over the results of an experiment, decoded while they are downloaded in one response.
+
+        When the download fails midway, the results are requested again according to the
+        retry policy, and the response is read from the start, skipping the results already yielded.
+
+        :param id: Experiment's ID
+        :type id: int
+        :param timeout: Timeout of each request (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
+        :param since: Only the results with a greater ID are requested, if the server supports it (default: ``None``, all results)
+        :type since: int
+        :param modified_since: Only the results modified at or after this time are requested, if the server
+                               supports it (default: ``None``, all results)
+        :type modified_since: int
+        :return: Results of the experiment
+        :rtype: iterator
+        """
+
+        policy = self.retry_policy or RETRY_POLICY
+        yielded = set()
+        wait = policy.base
+        for attempt in range(1, policy.max_attempts+1):
+            stream = self._get_results_stream(id, timeout=timeout, since=since, modified_since=modified_since)
+            try:
+                for res in stream.iter_items('results'):
+                    if res['id'] not in yielded:
+                        yielded.add(res['id'])
+                        yield res
+                return
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # The connection was lost, or the response was cut short
+                if attempt == policy.max_attempts:
+                    raise
+
+                wait = policy.next_wait(wait)
+                self.instrumentation.record_retry('_get_results_stream', wait, e)
+                policy.clock.sleep(wait)
+
+    @retry
+    def _get_results_stream(self, id, timeout=None, since=None, modified_since=None):
+        """
+        Request the results of an experiment, without downloading them yet.
+
+        :param id: Experiment's ID
+        :type id: int
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
+        :param since: Only the results with a greater ID are requested, if the server supports it (default: ``None``, all results)
+        :type since: int
+        :param modified_since: Only the results modified at or after this time are requested, if the server
+                               supports it (default: ``None``, all results)
+        :type modified_since: int
+        :return: Stream of the response's body
+        :rtype: whetlab.server.http_client.json_stream.JSONStream
+        """
+
+        query = {'experiment':id, 'page_size':INF_PAGE_SIZE}
+        if since is not None:
+            query['id__gt'] = since
+        if modified_since is not None:
+            query['modified__gte'] = modified_since
+
+        return self._client.results().get(self._options('_get_results_stream', timeout,
+                                          {'query': query, 'response_type': 'stream'})).body
+
+    @retry
+    def count_results(self, id, until=None, timeout=None):
+        """
+        Count the results of an experiment, from it's ID.
+
+        :param id: Experiment's ID
+        :type id: int
+        :param until: Only the results with a lower or equal ID are counted, if the server supports it (default: ``None``, all results)
+        :type until: int
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
+        :return: Number of results, or ``None`` if the server doesn't give it
+        :rtype: int
+        """
+
+        query = {'experiment':id, 'page_size':1}
+        if until is not None:
+            query['id__lte'] = until
+
+        return self._client.results().get(self._options('count_results', timeout, {'query':query})).body.get('count')
 
     @retry
-    def get_suggestion(self, id):
+    def get_suggestion(self, id, timeout=None):
         """
         Get suggestion. Obtained in the form of a result ID.
 
         :param id: Experiment's ID 
         :type id: int
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         :return: Suggested result's ID
         :rtype: int
         """
 
-        return  self._client.suggest(str(id)).go().body['id']
+        return  self._client.suggest(str(id)).go(self._options('get_suggestion', timeout)).body['id']
 
     @retry
-    def get_result(self, result_id):
+    def get_result(self, result_id, timeout=None):
         """
         Get a result from its ID.
 
         :param id: Result's ID 
         :type id: int
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         :return: Description of the result
         :rtype: dict
         """
-        return self._client.result(str(result_id)).get().body
+        return self._client.result(str(result_id)).get(self._options('get_result', timeout)).body
 
     @retry
-    def add_result(self, variables, id, experiment_description):
+    def add_result(self, variables, id, experiment_description, timeout=None):
         """
         Add a result with variable assignments from ``variables``,
         to experiment with ID ``id``.
@@ -1137,13 +2415,16 @@ class SimpleREST:
         :type id: int
         :param experiment_description: Description of experiment
         :type experiment_description: str
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         :return: Result ID of the added result
         :rtype: int
         """
-        return self._client.results().add(variables, id, True, experiment_description).body['id']
+        return self._client.results().add(variables, id, True, experiment_description,
+                                          self._options('add_result', timeout)).body['id']
 
     @retry
-    def update_result(self, result_id, result):
+    def update_result(self, result_id, result, timeout=None):
         """
         Update a result from its ID ``result_id``, based on the content of ``result``.
 
@@ -1151,16 +2432,43 @@ class SimpleREST:
         :type result_id: int
         :param result: Parameter and outcome values of the result
         :type result: dict
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
         """
-        self._client.result(str(result_id)).update(**result)
+        self._client.result(str(result_id)).update(options=self._options('update_result', timeout), **result)
                         
     @retry
-    def delete_result(self, result_id):
+    def delete_result(self, result_id, timeout=None):
         """
         Delete a result from its ID ``result_id``.
 
         :param result_id: ID of the result
         :type result_id: int
+        :param timeout: Timeout of the call (default: ``None``, see :meth:`call_timeout`)
+        :type timeout: float or tuple
+        """
+        self._client.result(str(result_id)).delete(self._options('delete_result', timeout))
+
+    def get_results_by_id(self, result_ids):
+        """
+        Get several results from their IDs, concurrently.
+
+        :param result_ids: IDs of the results
+        :type result_ids: list
+        :return: Descriptions of the results, in the order of ``result_ids``
+        :rtype: list
+        """
+        return self._client.batch([(self.get_result, id) for id in result_ids], raise_errors=True)
+
+    def delete_results(self, result_ids):
+        """
+        Delete several results from their IDs, concurrently.
+
+        :param result_ids: IDs of the results
+        :type result_ids: list
+        :return: Error raised by the deletion of each result, ``None`` for those deleted, in the order of ``result_ids``
+        :rtype: list
         """
-        self._client.result(str(result_id)).delete()
+        outcomes = self._client.batch([(self.delete_result, id) for id in result_ids])
+        return [outcome if isinstance(outcome, Exception) else None for outcome in outcomes]
 
@@ -0,0 +1,227 @@
+"""
+Local broker, through which the worker processes of a host share their connections to the Whetlab server.
+
+The broker listens on a Unix socket and forwards the requests it receives to
+the server, over its own pool of connections. Responses to reads are cached
+for ``cache_ttl`` seconds, and identical reads in flight at the same time are
+sent only once, so that e.g. many workers calling :meth:`whetlab.Experiment.pending`
+cost a single request to the server. Any write going through the broker
+empties its cache, so that a worker always reads its own writes.
+
+Start the broker once per host::
+
+    python -m whetlab.broker --socket /tmp/whetlab.sock --pool-size 32
+
+then have the experiments of the workers use it, with the client option ``'broker'``::
+
+    experiment = whetlab.Experiment(name, ..., client_options={'broker': '/tmp/whetlab.sock'})
+"""
+
+import os
+import time
+import socket
+import argparse
+import threading
+import BaseHTTPServer
+import SocketServer
+
+import requests
+
+from whetlab.server.http_client.single_flight import SingleFlight
+from whetlab.server.http_client.unix_adapter import UPSTREAM_HEADER
+
+# Headers of the requests passed on to the server
+FORWARDED_REQUEST_HEADERS = ('authorization', 'content-type', 'user-agent', 'if-none-match', 'if-modified-since')
+
+# Headers of the responses passed back to the workers
+FORWARDED_RESPONSE_HEADERS = ('content-type', 'etag', 'last-modified', 'retry-after')
+
+class BrokerHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Forwards a request received from a worker to the server, or answers it from the cache.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def handle_request(self):
+        broker = self.server.broker
+        length = int(self.headers.get('content-length') or 0)
+        body = self.rfile.read(length) if length else None
+
+        upstream = self.headers.get(UPSTREAM_HEADER)
+        if not upstream:
+            self.respond(400, {'content-type':'application/json'},
+                         '{"error": "Missing %s header"}' % UPSTREAM_HEADER)
+            return
+
+        headers = dict((h, self.headers[h]) for h in FORWARDED_REQUEST_HEADERS if h in self.headers)
+        status, headers, content = broker.forward(self.command, upstream + self.path, headers, body)
+        self.respond(status, headers, content)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = handle_request
+
+    def respond(self, status, headers, content):
+        self.send_response(status)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header('content-length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+class ThreadingUnixServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+class Broker:
+    """
+    Broker sharing a pool of connections to the Whetlab server between the processes of a host.
+
+    :param path: Path of the Unix socket to listen on.
+    :type path: str
+    :param pool_size: Number of connections to the server kept open (default: ``32``).
+    :type pool_size: int
+    :param cache_ttl: Time during which responses to reads are served from the cache, in seconds, ``0`` to disable the cache (default: ``1``).
+    :type cache_ttl: float
+    :param connect_timeout: Time to wait for a connection to the server, in seconds (default: ``10``).
+    :type connect_timeout: float
+    :param read_timeout: Time to wait for each read of a response of the server, in seconds (default: ``600``).
+    :type read_timeout: float
+
+    :ivar stats: Number of requests ``'received'``, ``'forwarded'`` to the server and answered from the cache (``'cached'``).
+    :type stats: dict
+    """
+
+    def __init__(self, path, pool_size=32, cache_ttl=1., connect_timeout=10., read_timeout=600.):
+        self.path = path
+        self.cache_ttl = cache_ttl
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Responses to reads, by url and credentials, and the number of writes seen so far,
+        # so that a read started before a write isn't cached after it
+        self.lock = threading.Lock()
+        self.cache = {}
+        self.writes = 0
+        self.single_flight = SingleFlight()
+        self.stats = {'received':0, 'forwarded':0, 'cached':0}
+
+        if os.path.exists(path):
+            os.unlink(path)
+        self.server = ThreadingUnixServer(path, BrokerHandler)
+        self.server.broker = self
+        os.chmod(path, 0o600)
+        self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """
+        Serve requests from a background thread.
+        """
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        """
+        Serve requests from the current thread, until interrupted.
+        """
+
+        self.server.serve_forever()
+
+    def stop(self):
+        """
+        Stop serving requests, and close the socket and the connections to the server.
+        """
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.session.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def forward(self, method, url, headers, body):
+        """
+        Send a request to the server, or answer it from the cache.
+
+        :return: Status, headers and content of the response.
+        :rtype: tuple
+        """
+
+        with self.lock:
+            self.stats['received'] += 1
+
+        if method != 'GET':
+            response = self.send(method, url, headers, body)
+            with self.lock:
+                self.writes += 1
+                self.cache = {}
+            return response
+
+        # Conditional reads are left to the server
+        if 'if-none-match' in headers or 'if-modified-since' in headers:
+            return self.send(method, url, headers, body)
+
+        key = (url, headers.get('authorization'))
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.stats['cached'] += 1
+                return entry[1]
+            writes = self.writes
+
+        # A read sent after a write doesn't share the response of a read sent before it
+        response = self.single_flight.do(key + (writes,), lambda: self.send(method, url, headers, body))
+
+        with self.lock:
+            if self.cache_ttl and response[0] == 200 and writes == self.writes:
+                self.cache[key] = (time.time() + self.cache_ttl, response)
+
+        return response
+
+    def send(self, method, url, headers, body):
+        with self.lock:
+            self.stats['forwarded'] += 1
+
+        try:
+            response = self.session.request(method, url, headers=headers, data=body,
+                                            timeout=self.timeout, allow_redirects=True)
+        except requests.exceptions.Timeout as e:
+            return 504, {'content-type':'application/json'}, '{"error": "Timeout of the broker"}'
+        except (requests.exceptions.RequestException, socket.error) as e:
+            return 502, {'content-type':'application/json'}, '{"error": "Server unreachable from the broker"}'
+
+        headers = dict((h, response.headers[h]) for h in FORWARDED_RESPONSE_HEADERS if h in response.headers)
+        return response.status_code, headers, response.content
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Broker sharing connections to the Whetlab server between the processes of a host.')
+    parser.add_argument('--socket', required=True, help='path of the Unix socket to listen on')
+    parser.add_argument('--pool-size', type=int, default=32, help='connections to the server kept open')
+    parser.add_argument('--cache-ttl', type=float, default=1., help='seconds during which reads are served from the cache')
+    parser.add_argument('--connect-timeout', type=float, default=10.)
+    parser.add_argument('--read-timeout', type=float, default=600.)
+    args = parser.parse_args(argv)
+
+    broker = Broker(args.socket, args.pool_size, args.cache_ttl, args.connect_timeout, args.read_timeout)
+    print 'Whetlab broker listening on %s' % args.socket
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        broker.stop()
+
+if __name__ == '__main__':
+    main()
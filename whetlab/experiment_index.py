@@ -0,0 +1,121 @@
+"""
+On-disk index from experiment names to IDs, so that experiments are found without searching the server.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Default time during which an entry of the index is trusted, in seconds
+DEFAULT_INDEX_TTL = 600.
+
+class ExperimentIndex:
+    """
+    Index from experiment names to IDs, stored in a JSON file shared by all the processes of a user.
+
+    Entries are kept separately for each server and access token, and are only
+    trusted for ``ttl`` seconds after they were recorded. The file is replaced
+    atomically when updated, so that concurrent processes never read it half written,
+    and it is read and updated under a lock on a ``.lock`` file next to it (where
+    ``flock`` is available), so that the entries recorded by concurrent processes are merged.
+
+    :param path: Path of the index file.
+    :type path: str
+    :param ttl: Time during which an entry is trusted, in seconds.
+    :type ttl: float
+    :param url: URL of the server.
+    :type url: str
+    :param access_token: Access token of the account.
+    :type access_token: str
+    """
+
+    def __init__(self, path, ttl, url, access_token):
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self.scope = url + ' ' + hashlib.sha1(access_token.encode('utf-8')).hexdigest()[:16]
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        """
+        Return the ID recorded for the experiment ``name``, or ``None`` if unknown or expired.
+        """
+
+        entry = self.load().get(self.scope, {}).get(name)
+        if entry is None or time.time() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def set(self, name, id):
+        """
+        Record the ID of the experiment ``name``.
+        """
+
+        def record(names):
+            names[name] = [id, time.time()]
+        self.update(record)
+
+    def discard(self, id):
+        """
+        Forget the experiment with the given ID.
+        """
+
+        def forget(names):
+            for name in [n for n, entry in names.items() if entry[0] == id]:
+                del names[name]
+        self.update(forget)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+    def update(self, change):
+        """
+        Apply ``change`` to the entries of this index's scope, dropping the expired entries of all scopes.
+        """
+
+        with self.lock:
+            try:
+                lock = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError:
+                lock = None
+            try:
+                if lock is not None and fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                self.write(change)
+            finally:
+                if lock is not None:
+                    os.close(lock)
+
+    def write(self, change):
+        """
+        Apply ``change`` to the entries of the file, and replace it. Called with the lock held.
+        """
+
+        index = self.load()
+        change(index.setdefault(self.scope, {}))
+
+        now = time.time()
+        for scope, names in index.items():
+            for name in [n for n, entry in names.items() if now - entry[1] > self.ttl]:
+                del names[name]
+            if not names:
+                del index[scope]
+
+        try:
+            fd, temp = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(index, f)
+            os.rename(temp, self.path)
+        except (IOError, OSError):
+            pass # The index is only an optimization
@@ -0,0 +1,191 @@
+"""
+On-disk copy of the settings and results of experiments, so that resumed experiments only fetch what changed since.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import contextlib
+
+# Seconds to wait for another process to release the database
+LOCK_TIMEOUT = 30.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    scope TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    name TEXT,
+    description TEXT,
+    outcome_name TEXT,
+    parameters TEXT,
+    setting_ids TEXT,
+    cursor INTEGER,
+    modified_cursor INTEGER,
+    PRIMARY KEY (scope, id)
+);
+CREATE TABLE IF NOT EXISTS results (
+    scope TEXT NOT NULL,
+    experiment INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    param_values TEXT,
+    outcome TEXT,
+    PRIMARY KEY (scope, experiment, id)
+);
+"""
+
+# Version of the schema, kept in the user_version of the database
+SCHEMA_VERSION = 1
+
+# Columns added to the experiments table since the first version of the schema
+ADDED_COLUMNS = [('modified_cursor', 'INTEGER')]
+
+class ExperimentStore:
+    """
+    Settings and results of experiments, stored in a SQLite database shared by all the processes of a user.
+
+    Experiments are kept separately for each server and access token. Each
+    experiment is stored with the cursors of its last sync (the highest result ID
+    and latest modification time fetched), from which a resumed experiment fetches
+    only the results created or modified since.
+    The store is only an optimization: when the database can't be used, experiments
+    are simply fetched in full from the server.
+
+    :param path: Path of the database file.
+    :type path: str
+    :param url: URL of the server.
+    :type url: str
+    :param access_token: Access token of the account.
+    :type access_token: str
+    """
+
+    def __init__(self, path, url, access_token):
+        self.path = os.path.expanduser(path)
+        self.scope = url + ' ' + hashlib.sha1(access_token.encode('utf-8')).hexdigest()[:16]
+
+    @contextlib.contextmanager
+    def connect(self):
+        """
+        Open a connection to the database, committed when the block exits without error.
+
+        A new connection is opened each time, as SQLite connections can't be shared by threads.
+        """
+
+        with contextlib.closing(sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)) as connection:
+            # Readers and the writer of other processes don't block each other
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+            if connection.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                self.migrate(connection)
+            with connection:
+                yield connection
+
+    def migrate(self, connection):
+        """
+        Add the columns missing from a database created by an earlier version of the schema.
+        """
+
+        columns = set(row[1] for row in connection.execute('PRAGMA table_info(experiments)'))
+        for name, type in ADDED_COLUMNS:
+            if name not in columns:
+                try:
+                    connection.execute('ALTER TABLE experiments ADD COLUMN %s %s' % (name, type))
+                except sqlite3.OperationalError:
+                    # Added by another process in the meantime
+                    pass
+        connection.execute('PRAGMA user_version = %d' % SCHEMA_VERSION)
+
+    def load(self, id):
+        """
+        Return the state stored for the experiment with the given ID, or ``None`` if unknown.
+
+        :param id: Experiment's ID
+        :type id: int
+        :return: The experiment's name, description, parameters, outcome name and setting IDs by name
+                 (under the attribute names of :class:`whetlab.Experiment`), its maps from result IDs
+                 to parameter and outcome values, and the cursors of its last sync under ``'cursor'``
+                 and ``'modified_cursor'``.
+        :rtype: dict
+        """
+
+        try:
+            with self.connect() as connection:
+                row = connection.execute('SELECT name, description, outcome_name, parameters, setting_ids, cursor, modified_cursor '
+                                         'FROM experiments WHERE scope = ? AND id = ?', (self.scope, id)).fetchone()
+                if row is None:
+                    return None
+
+                ids_to_param_values = {}
+                ids_to_outcome_values = {}
+                for res_id, param_values, outcome in connection.execute(
+                        'SELECT id, param_values, outcome FROM results WHERE scope = ? AND experiment = ?',
+                        (self.scope, id)):
+                    ids_to_param_values[res_id] = json.loads(param_values)
+                    if outcome is not None:
+                        ids_to_outcome_values[res_id] = json.loads(outcome)
+        except sqlite3.Error:
+            return None
+
+        return {'experiment':row[0],
+                'experiment_description':row[1],
+                'outcome_name':row[2],
+                'parameters':json.loads(row[3]),
+                '_param_names_to_setting_ids':json.loads(row[4]),
+                '_ids_to_param_values':ids_to_param_values,
+                '_ids_to_outcome_values':ids_to_outcome_values,
+                'cursor':row[5],
+                'modified_cursor':row[6]}
+
+    def save(self, id, state, changed=None, deleted=()):
+        """
+        Store the state of the experiment with the given ID.
+
+        :param id: Experiment's ID
+        :type id: int
+        :param state: State of the experiment, as returned by :meth:`load`
+        :type state: dict
+        :param changed: IDs of the results changed since the state was last stored (default: ``None``, all the results are stored again)
+        :type changed: list
+        :param deleted: IDs of the results deleted since the state was last stored (default: none)
+        :type deleted: list
+        """
+
+        ids_to_param_values = state['_ids_to_param_values']
+        ids_to_outcome_values = state['_ids_to_outcome_values']
+        full = changed is None
+        if full:
+            changed = ids_to_param_values.keys()
+
+        def row(res_id):
+            outcome = ids_to_outcome_values.get(res_id)
+            return (self.scope, id, res_id, json.dumps(ids_to_param_values[res_id]),
+                    None if res_id not in ids_to_outcome_values else json.dumps(outcome))
+
+        try:
+            with self.connect() as connection:
+                connection.execute('INSERT OR REPLACE INTO experiments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   (self.scope, id, state['experiment'], state['experiment_description'],
+                                    state['outcome_name'], json.dumps(state['parameters']),
+                                    json.dumps(state['_param_names_to_setting_ids']), state['cursor'],
+                                    state['modified_cursor']))
+                if full:
+                    connection.execute('DELETE FROM results WHERE scope = ? AND experiment = ?', (self.scope, id))
+                else:
+                    connection.executemany('DELETE FROM results WHERE scope = ? AND experiment = ? AND id = ?',
+                                           [(self.scope, id, res_id) for res_id in deleted])
+                connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                                       [row(res_id) for res_id in changed if res_id in ids_to_param_values])
+        except (sqlite3.Error, TypeError, ValueError):
+            pass # The store is only an optimization
+
+    def discard(self, id):
+        """
+        Forget the experiment with the given ID.
+        """
+
+        try:
+            with self.connect() as connection:
+                connection.execute('DELETE FROM experiments WHERE scope = ? AND id = ?', (self.scope, id))
+                connection.execute('DELETE FROM results WHERE scope = ? AND experiment = ?', (self.scope, id))
+        except sqlite3.Error:
+            pass
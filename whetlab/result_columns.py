@@ -0,0 +1,172 @@
+"""
+Parameter and outcome values of the results of an experiment, stored column by column in numpy arrays.
+"""
+
+import numpy as np
+
+# Number of rows allocated for the first results
+INITIAL_CAPACITY = 64
+
+# Types of the columns of parameters, by parameter type. Integers are kept as floats,
+# so that values which are not integral aren't truncated and missing ones are nan
+PARAMETER_DTYPES = {'float':np.float64, 'integer':np.float64, 'enum':object}
+
+# Values of the rows of parameter columns without a value, by parameter type
+MISSING_VALUES = {'float':np.nan, 'integer':np.nan, 'enum':None}
+
+class ResultColumns:
+    """
+    Parameter and outcome values of the results of an experiment, in one numpy array per column.
+
+    Each parameter has a column of ``size`` values per row (a 1-D column if its size is 1),
+    of floats for float and integer parameters (``nan`` where a result has no value),
+    and of objects for enum parameters. The outcomes are in a float column, where pending
+    outcomes are ``nan``, along with boolean columns telling which rows have an
+    outcome recorded (possibly ``None``) and which are pending, i.e. have no outcome
+    (including the rows without any outcome recorded yet). A column of the result IDs
+    gives the result of each row.
+
+    Rows are written in place in arrays which grow geometrically. Removed rows are
+    only marked as such, until they make up half of the rows and the arrays are compacted.
+
+    The columns are an index for vectorized reads, kept next to the maps of
+    :class:`whetlab.Experiment` from result IDs to values, which remain the reference:
+    they add to the memory used by the results rather than replace it.
+
+    :param parameters: Description of the parameters of the experiment, by name.
+    :type parameters: dict
+    """
+
+    def __init__(self, parameters):
+        self.parameters = parameters
+        self.rows = {}
+        self.length = 0
+        self.removed = 0
+
+        self.ids = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.outcomes = np.zeros(INITIAL_CAPACITY)
+        self.known = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self.pending = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self.alive = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self.values = {}
+        for name, param in parameters.iteritems():
+            size = param.get('size', 1)
+            shape = (INITIAL_CAPACITY,) if size == 1 else (INITIAL_CAPACITY, size)
+            self.values[name] = np.empty(shape, dtype=PARAMETER_DTYPES.get(param['type'], object))
+            self.values[name][:] = MISSING_VALUES.get(param['type'])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def resize(self, capacity, rows=None):
+        """
+        Reallocate the columns for ``capacity`` rows, keeping only the given ``rows`` (default: all used rows).
+        """
+
+        if rows is None:
+            rows = slice(0, self.length)
+
+        def resized(column, missing):
+            kept = column[rows]
+            column = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            column[:len(kept)] = kept
+            column[len(kept):] = missing
+            return column
+
+        for name in ('ids', 'outcomes', 'known', 'pending', 'alive'):
+            setattr(self, name, resized(getattr(self, name), 0))
+        for name, column in self.values.items():
+            self.values[name] = resized(column, MISSING_VALUES.get(self.parameters[name]['type']))
+
+    def set(self, id, param_values, outcome=None, known=False):
+        """
+        Write the values of the result with the given ID, in a new row if it has none yet.
+
+        :param id: Unique result identifier
+        :type id: int
+        :param param_values: Values of parameters of the result
+        :type param_values: dict
+        :param outcome: Outcome value of the result, ``None`` if pending (default: ``None``)
+        :type outcome: float
+        :param known: Whether an outcome (possibly ``None``) is recorded for the result (default: ``False``)
+        :type known: bool
+        """
+
+        row = self.rows.get(id)
+        if row is None:
+            if self.length == len(self.ids):
+                self.resize(2 * len(self.ids))
+            row = self.length
+            self.length += 1
+            self.rows[id] = row
+            self.ids[row] = id
+            self.alive[row] = True
+
+        for name, column in self.values.items():
+            value = param_values.get(name, MISSING_VALUES.get(self.parameters[name]['type']))
+            try:
+                column[row] = value
+            except (ValueError, TypeError):
+                # Values which don't fit the type of the parameter are kept as they are
+                if column.dtype != object or column.ndim > 1:
+                    column = self.values[name] = self.to_objects(column)
+                column[row] = value
+
+        self.known[row] = known
+        self.pending[row] = outcome is None
+        try:
+            self.outcomes[row] = np.nan if outcome is None else float(outcome)
+        except (ValueError, TypeError):
+            self.outcomes[row] = np.nan
+
+    @staticmethod
+    def to_objects(column):
+        """
+        Convert a column to a 1-D column of objects, where the rows of 2-D columns become lists.
+        """
+
+        objects = np.empty(len(column), dtype=object)
+        # One row at a time, as lists of the same length would be broadcast
+        for row, value in enumerate(column):
+            objects[row] = value.tolist() if isinstance(value, np.ndarray) else value
+        return objects
+
+    def remove(self, id):
+        """
+        Remove the row of the result with the given ID, if any.
+        """
+
+        row = self.rows.pop(id, None)
+        if row is None:
+            return
+
+        self.alive[row] = False
+        self.known[row] = False
+        self.pending[row] = False
+        self.removed += 1
+
+        if self.removed * 2 > self.length:
+            rows = np.flatnonzero(self.alive[:self.length])
+            self.resize(max(INITIAL_CAPACITY, 2 * len(rows)), rows)
+            self.length = len(rows)
+            self.removed = 0
+            self.rows = dict((id, row) for row, id in enumerate(self.ids[:self.length].tolist()))
+
+    def snapshot(self, names=None):
+        """
+        Return copies of the columns, with only the rows of current results.
+
+        :param names: Names of the columns to copy (default: ``None``, all of them).
+        :type names: list
+        :return: Columns by name: the parameter names, ``'id'``, ``'outcome'``, ``'known'`` and ``'pending'``
+                 (which take precedence over parameters with the same names).
+        :rtype: dict
+        """
+
+        columns = dict(self.values)
+        columns.update({'id':self.ids, 'outcome':self.outcomes, 'known':self.known, 'pending':self.pending})
+        if names is None:
+            names = columns.keys()
+
+        rows = self.alive[:self.length]
+        return dict((name, columns[name][:self.length][rows]) for name in names)
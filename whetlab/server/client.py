@@ -1,3 +1,6 @@
+import threading
+
+from .executor import Executor
 from .http_client import HttpClient
 
 # Assign all the api classes
@@ -14,7 +17,80 @@ from .api.setting import Setting
 class Client():
 
 	def __init__(self, auth = {}, options = {}):
-		self.http_client = HttpClient(auth, options)
+		options = dict(options)
+		self.batch_workers = options.pop('batch_workers', None)
+
+		self.http_client = self.create_http_client(auth, options)
+
+		self.executor = None
+		self.executor_lock = threading.Lock()
+
+	def create_http_client(self, auth, options):
+		return HttpClient(auth, options)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	# Release the connections held by the underlying http client
+	#
+	def close(self):
+		if self.executor is not None:
+			self.executor.shutdown()
+			self.executor = None
+
+		self.http_client.close()
+
+	# Snapshot of the statistics on the requests made so far
+	#
+	# Includes, for each endpoint, the number of calls and errors, the latency
+	# histogram and the bytes sent and received, as well as the number of retries
+	# of each call and the time spent waiting before them.
+	def stats(self):
+		return self.http_client.stats()
+
+	# Add a function called with a dict describing each request or retry as it happens
+	#
+	def add_stats_callback(self, fn):
+		self.http_client.instrumentation.add_callback(fn)
+
+	# Run independent resource calls concurrently and return their responses, in order
+	#
+	# The calls are run by a pool of 'batch_workers' threads (by default, one per
+	# pooled connection), which is created on first use.
+	#
+	# calls - List of calls, each one either a function without arguments
+	#         (e.g. client.result(id).get) or a tuple of a function and its arguments
+	#         (e.g. (client.result(id).update, variables, ...))
+	# raise_errors - If True, the first error is raised once all the calls are done.
+	#                Otherwise, the error raised by a call is returned in place of its response.
+	def batch(self, calls, raise_errors = False):
+		executor = self.get_executor()
+
+		futures = []
+		for call in calls:
+			if isinstance(call, tuple):
+				futures.append(executor.submit(call[0], *call[1:]))
+			else:
+				futures.append(executor.submit(call))
+
+		responses = [future.exception() or future.result() for future in futures]
+
+		if raise_errors:
+			for response in responses:
+				if isinstance(response, Exception):
+					raise response
+
+		return responses
+
+	def get_executor(self):
+		with self.executor_lock:
+			if self.executor is None:
+				self.executor = Executor(self.batch_workers or self.http_client.pool_size)
+
+			return self.executor
 
 	# Manipulate a result set indexed by its id
 	#
@@ -64,4 +140,3 @@ class Client():
 	#
 	def setting(self):
 		return Setting(self.http_client)
-
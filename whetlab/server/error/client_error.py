@@ -1,10 +1,11 @@
 # ClientException is used when the api returns an error
 class ClientError(Exception):
 
-	def __init__(self, message, code):
+	def __init__(self, message, code, headers=None):
 		super(ClientError, self).__init__()
 		self.message = message
 		self.code = code
+		self.headers = headers or {}
 
         def __str__(self):
         	return 'Error code: ' + str(self.code) + ' Server message: ' + str(self.message)
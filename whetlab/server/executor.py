@@ -0,0 +1,183 @@
+import heapq
+import itertools
+import threading
+import time
+
+try:
+	import Queue as queue
+except ImportError:
+	import queue
+
+# Raised when the result of a future is not available in the given time
+class TimeoutError(Exception):
+	pass
+
+# Raised by the futures of delayed calls which were not due yet when their executor was shut down
+class ShutdownError(Exception):
+	pass
+
+# Future holds the result of a call which is run in the background
+#
+# Its result (or the exception raised by the call) is obtained with result(),
+# which blocks until the call is done. Callbacks added with
+# add_done_callback are called with the future once it is done.
+class Future():
+
+	def __init__(self):
+		self.condition = threading.Condition()
+		self.finished = False
+		self.value = None
+		self.error = None
+		self.callbacks = []
+
+	def done(self):
+		return self.finished
+
+	def result(self, timeout=None):
+		self.wait(timeout)
+
+		if self.error is not None:
+			raise self.error
+
+		return self.value
+
+	def exception(self, timeout=None):
+		self.wait(timeout)
+
+		return self.error
+
+	def wait(self, timeout=None):
+		with self.condition:
+			if not self.finished:
+				self.condition.wait(timeout)
+
+			if not self.finished:
+				raise TimeoutError('Result was not available in time')
+
+	def add_done_callback(self, fn):
+		with self.condition:
+			if not self.finished:
+				self.callbacks.append(fn)
+				return
+
+		fn(self)
+
+	def set_result(self, value):
+		self.finish(value, None)
+
+	def set_exception(self, error):
+		self.finish(None, error)
+
+	def finish(self, value, error):
+		with self.condition:
+			if self.finished:
+				return
+
+			self.value = value
+			self.error = error
+			self.finished = True
+			self.condition.notify_all()
+
+			callbacks, self.callbacks = self.callbacks, []
+
+		for fn in callbacks:
+			fn(self)
+
+# Executor runs calls on a bounded pool of worker threads
+#
+# - submit runs a call as soon as a worker is available
+# - call_later runs a call once a delay has passed, without holding a worker while waiting
+#
+# Once shut down, the calls already submitted are still run, but the delayed
+# calls which are not due yet are dropped, and their futures raise ShutdownError.
+class Executor():
+
+	def __init__(self, max_workers):
+		if max_workers < 1:
+			raise ValueError('An executor needs at least one worker')
+
+		self.max_workers = max_workers
+		self.tasks = queue.Queue()
+		self.timers = []
+		self.counter = itertools.count()
+		self.condition = threading.Condition()
+		self.running = True
+
+		self.threads = [self.start_thread(self.work) for i in range(max_workers)]
+		self.timer_thread = self.start_thread(self.wait_for_timers)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.shutdown()
+
+	def start_thread(self, target):
+		thread = threading.Thread(target=target)
+		thread.daemon = True
+		thread.start()
+		return thread
+
+	def submit(self, fn, *args, **kwargs):
+		if not self.running:
+			raise RuntimeError('Cannot submit calls to an executor which has been shut down')
+
+		future = Future()
+		self.tasks.put((future, fn, args, kwargs))
+		return future
+
+	def call_later(self, delay, fn, *args, **kwargs):
+		if not self.running:
+			raise RuntimeError('Cannot submit calls to an executor which has been shut down')
+
+		future = Future()
+
+		with self.condition:
+			heapq.heappush(self.timers, (time.time() + delay, next(self.counter), (future, fn, args, kwargs)))
+			self.condition.notify()
+
+		return future
+
+	def shutdown(self, wait=True):
+		with self.condition:
+			self.running = False
+			timers, self.timers = self.timers, []
+			self.condition.notify()
+
+		for due, count, (future, fn, args, kwargs) in timers:
+			future.set_exception(ShutdownError('The executor was shut down before the call was due'))
+
+		for thread in self.threads:
+			self.tasks.put(None)
+
+		if wait:
+			for thread in self.threads:
+				thread.join()
+
+	# Loop of the worker threads
+	def work(self):
+		while True:
+			task = self.tasks.get()
+			if task is None:
+				return
+
+			future, fn, args, kwargs = task
+			try:
+				future.set_result(fn(*args, **kwargs))
+			except Exception as e:
+				future.set_exception(e)
+
+	# Loop of the thread handing over the delayed calls to the workers when they are due
+	def wait_for_timers(self):
+		with self.condition:
+			while self.running:
+				if not self.timers:
+					self.condition.wait()
+					continue
+
+				delay = self.timers[0][0] - time.time()
+				if delay > 0:
+					self.condition.wait(delay)
+					continue
+
+				self.tasks.put(heapq.heappop(self.timers)[2])
@@ -1,7 +1,5 @@
 import requests
-import copy
-import platform
-import os
+import time
 
 try:
 	import urlparse
@@ -9,14 +7,43 @@ except ImportError:
 	import urllib.parse as urlparse
 
 from .auth_handler import AuthHandler
+from .cassette import Cassette, RecordingSession, ReplaySession
+from .codec import Codec
+from .instrumentation import Instrumentation
+from .json_stream import JSONStream
+from .rate_limiter import TokenBucket
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
 from .error_handler import ErrorHandler
 from .request_handler import RequestHandler
 from .response import Response
 from .response_handler import ResponseHandler
+from .system_info import SystemInfo
+from .unix_adapter import UnixAdapter
+
+# Default number of pooled connections kept alive per host
+DEFAULT_POOL_SIZE = 10
+
+# Default number of times a failed connection attempt is retried by the transport
+DEFAULT_MAX_RETRIES = 3
+
+# Default time to wait for a connection to the server, and for each read of its response, in seconds
+DEFAULT_CONNECT_TIMEOUT = 10.
+DEFAULT_READ_TIMEOUT = 60.
 
 # Main HttpClient which is used by Api classes
+#
+# A single requests.Session is kept for the lifetime of the client, so that
+# consecutive calls reuse the same TCP/TLS connections. Call close() (or use
+# the client as a context manager) to release the pooled connections.
 class HttpClient():
 
+	# Client options which are not passed on to requests
+	CLIENT_ONLY = frozenset(['base', 'user_agent', 'api_version', 'response_type'])
+
+	# Per-call options which are not passed on to requests
+	PER_CALL_ONLY = frozenset(['query', 'body', 'headers', 'api_version', 'response_type'])
+
 	def __init__(self, auth, options):
 
 		if isinstance(auth, str):
@@ -41,8 +68,103 @@ class HttpClient():
 
 		self.auth = AuthHandler(auth)
 
+		# Transport options, consumed here rather than passed on to each request
+		self.pool_size = self.options.pop('pool_size', DEFAULT_POOL_SIZE)
+		self.max_retries = self.options.pop('max_retries', DEFAULT_MAX_RETRIES)
+		self.keep_alive = self.options.pop('keep_alive', True)
+
+		# Timeouts of the requests, which can be overridden for a call with the option timeout
+		# (seconds, or a (connect, read) tuple), None to wait forever
+		self.connect_timeout = self.options.pop('connect_timeout', DEFAULT_CONNECT_TIMEOUT)
+		self.read_timeout = self.options.pop('read_timeout', DEFAULT_READ_TIMEOUT)
+
+		# Record the requests to a cassette file, or answer them from one ('record' or 'replay')
+		self.cassette = self.options.pop('cassette', None)
+		self.cassette_mode = self.options.pop('cassette_mode', 'replay')
+		if self.cassette_mode not in ('record', 'replay'):
+			raise ValueError("Option 'cassette_mode' should be one of 'record' or 'replay'")
+		self.replay_latency = self.options.pop('replay_latency', None)
+
+		# Path of the Unix socket of a broker (see whetlab.broker) to send the requests through
+		self.broker = self.options.pop('broker', None)
+
+		# Which request bodies get the host information: 'all', 'suggest' or 'none'
+		self.system_info = self.options.pop('system_info', 'all')
+		if self.system_info not in ('all', 'suggest', 'none'):
+			raise ValueError("Option 'system_info' should be one of 'all', 'suggest' or 'none'")
+
+		# JSON codec used for request and response bodies (see Codec.PREFERENCE for 'auto')
+		self.codec = Codec.get(self.options.pop('json_codec', 'auto'))
+
+		# Number of responses to GET requests kept to be revalidated, 0 to disable the cache
+		cache_size = self.options.pop('cache_size', 0)
+		self.cache = ResponseCache(cache_size) if cache_size > 0 else None
+
+		# Records the cost of the requests, and can be shared between clients
+		self.instrumentation = self.options.pop('instrumentation', None) or Instrumentation()
+
+		# Whether identical GETs made at the same time share a single request, off by default
+		# since the key and the copies cost more than they save unless many threads read the same pages
+		self.single_flight = SingleFlight() if self.options.pop('single_flight', False) else None
+
+		# Requests per second (and burst) allowed to the host, shared by all its clients in the
+		# process, and by all the processes using the same rate_limit_file
+		rate_limit = self.options.pop('rate_limit', None)
+		rate_burst = self.options.pop('rate_burst', None)
+		rate_limit_file = self.options.pop('rate_limit_file', None)
+		if rate_limit:
+			host = urlparse.urlparse(self.base).netloc
+			self.rate_limiter = TokenBucket.shared(host, rate_limit, rate_burst, rate_limit_file)
+		else:
+			self.rate_limiter = None
+
+		self.session = self.create_session()
+		self.compile_template()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	# Create the long-lived session used for all the requests of this client
+	#
+	# Connections are pooled per host (up to pool_size of them) and failed
+	# connection attempts are retried max_retries times by the adapter.
+	#
+	# With the option cassette set, the session either records the requests
+	# and their responses to that file, or answers them from it.
+	#
+	# With the option broker set, the requests are sent to the broker over its
+	# Unix socket, and the broker holds the connections to the server.
+	def create_session(self):
+		if self.cassette is None:
+			session = requests.Session()
+		elif self.cassette_mode == 'record':
+			session = RecordingSession(Cassette(self.cassette))
+		else:
+			return ReplaySession(Cassette(self.cassette), self.replay_latency)
+
+		if self.broker is not None:
+			adapter = UnixAdapter(self.broker, self.pool_size, self.max_retries)
+		else:
+			adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size,
+								pool_maxsize=self.pool_size,
+								max_retries=self.max_retries)
+		session.mount('http://', adapter)
+		session.mount('https://', adapter)
+
+		if not self.keep_alive:
+			session.headers['connection'] = 'close'
+
+		return session
+
+	# Release the pooled connections
+	def close(self):
+		self.session.close()
+
 	def get(self, path, params={}, options={}):
-		options.update({ 'query': params })
+		options = dict(options, query=params)
 		return self.request(path, None, 'get', options)
 
 	def post(self, path, body={}, options={}):
@@ -62,73 +184,171 @@ class HttpClient():
 	# - Transforms the body of request into correct format
 	# - Creates the requests with give parameters
 	# - Returns response body after parsing it into correct format
+	#
+	# The parts of the request which are the same for every call (url prefix,
+	# headers, auth parameters) are built once by compile_template, so
+	# only the per-call options need to be merged in here.
+	#
+	# With the option response_type set to 'stream', the body of the response
+	# is a JSONStream, which decodes it while it is being downloaded.
+	#
+	# Identical GETs made at the same time by several threads are coalesced
+	# into one request (see SingleFlight) when the option single_flight is True.
 	def request(self, path, body, method, options):
-		kwargs = copy.deepcopy(self.options)
-		kwargs.update(options)
+		kwargs = self.template.copy()
+		kwargs['headers'] = self.headers.copy()
+		kwargs['params'] = {}
+		api_version = self.api_version
+		stream = options.get('response_type') == 'stream'
+
+		for key, value in options.items():
+			if key == 'query':
+				kwargs['params'] = dict(value)
+			elif key == 'headers':
+				kwargs['headers'].update(self.dict_key_lower(value))
+			elif key == 'api_version':
+				api_version = value
+			elif key not in self.PER_CALL_ONLY:
+				kwargs[key] = value
+
+		kwargs['params'].update(self.auth_params)
+
+		if body is not None and self.send_system_info(path):
+			body = SystemInfo.add_to(body)
 
-		kwargs['headers'] = copy.deepcopy(self.headers)
+		kwargs['data'] = body
 
-		if 'headers' in options:
-			kwargs['headers'].update(self.dict_key_lower(options['headers']))
+		if method != 'get':
+			kwargs = self.set_body(kwargs)
 
-		kwargs['data'] = body
-		kwargs['allow_redirects'] = True
+		url = self.url(path, api_version)
 
-		kwargs['params'] = kwargs['query'] if 'query' in kwargs else {}
+		if stream:
+			kwargs['stream'] = True
+			response = self.send(method, path, url, kwargs)
+			return Response(JSONStream(response.raw, codec=self.codec), response.code, response.headers)
 
-		if 'query' in kwargs:
-			del kwargs['query']
+		if method == 'get' and self.single_flight is not None:
+			key = SingleFlight.key(url, kwargs['params'], kwargs['headers'])
+			return self.single_flight.do(key, lambda: self.fetch(method, path, url, kwargs).decode(),
+						     lambda: self.instrumentation.record_coalesced(method, path))
 
-		if 'body' in kwargs:
-			del kwargs['body']
+		return self.fetch(method, path, url, kwargs)
 
-		del kwargs['base']
-		del kwargs['user_agent']
+	# Send a request and decode its response, revalidating cached GETs
+	def fetch(self, method, path, url, kwargs):
+		if method == 'get' and self.cache is not None:
+			return self.cached_request(path, url, kwargs)
 
-		if body is not None:
-			try:
-				body['sys_info'] = list(platform.uname())
-			except:
-				pass
-			try:
-				body['load_info'] = os.getloadavg()
-			except:
-				pass
+		return self.send(method, path, url, kwargs)
 
-		if method != 'get':
-			kwargs = self.set_body(kwargs)
+	# Whether the host information should be added to the body of a request to path
+	def send_system_info(self, path):
+		if self.system_info == 'all':
+			return True
 
-		kwargs['hooks'] = dict(response=ErrorHandler.check_error)
+		if self.system_info == 'suggest':
+			return path.endswith('/suggest/')
 
-		kwargs = self.auth.set(kwargs)
+		return False
 
-		response = self.create_request(method, path, kwargs)
+	# Send a GET request conditional on the cached response being out of date
+	def cached_request(self, path, url, kwargs):
+		key = ResponseCache.key(url, kwargs['params'])
+		entry = self.cache.get(key)
 
-		return Response(self.get_body(response), response.status_code, response.headers)
+		if entry is not None:
+			kwargs['headers'].update(entry.conditional_headers())
 
-	# Creating a request with the given arguments
+		response = self.send('get', path, url, kwargs)
+
+		if response.code == 304 and entry is not None:
+			return Response.lazy(entry.response, self.codec)
+
+		self.cache.store(key, response.raw)
+
+		return response
+
+	# Build the arguments shared by all the requests of this client
+	def compile_template(self):
+		self.api_version = self.options.get('api_version')
+		self.url_prefixes = {}
+
+		template = dict((key, value) for key, value in self.options.items()
+				if key not in self.CLIENT_ONLY)
+		template['allow_redirects'] = True
+		template.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+
+		self.template = template
+		self.auth_params = self.auth.set({ 'params': {} })['params']
+
+	# Full url of path
 	#
 	# If api_version is set, appends it immediately after host
-	def create_request(self, method, path, options):
-		version = '/' + options['api_version'] if 'api_version' in options else ''
+	def url(self, path, api_version=None):
+		if not path.startswith('/'):
+			version = '/' + api_version if api_version else ''
+			return urlparse.urljoin(self.base, version + path)
 
-		path = urlparse.urljoin(self.base, version + path)
+		if api_version not in self.url_prefixes:
+			version = '/' + api_version if api_version else '/'
+			self.url_prefixes[api_version] = urlparse.urljoin(self.base, version).rstrip('/')
 
-		if 'api_version' in options:
-			del options['api_version']
+		return self.url_prefixes[api_version] + path
 
-		if 'response_type' in options:
-			del options['response_type']
+	# Send a request, recording its latency and size, and return its Response
+	#
+	# The response goes through a single stage which raises a ClientError for
+	# error statuses, and otherwise leaves its body to be decoded when first
+	# read (see Response.lazy), so that it is never decoded twice.
+	#
+	# With a rate limit, the request first waits for its turn, and a 429 from
+	# the server empties the bucket so that all the clients slow down together.
+	def send(self, method, path, url, kwargs):
+		data = kwargs.get('data')
+		bytes_sent = len(data) if isinstance(data, (bytes, str)) else 0
+
+		if self.rate_limiter is not None:
+			self.rate_limiter.acquire()
+
+		start = time.time()
+
+		try:
+			response = self.create_request(method, url, kwargs)
+			result = Response.lazy(response, self.codec)
+			ErrorHandler.check(result)
+		except Exception as e:
+			if self.rate_limiter is not None and getattr(e, 'code', None) == 429:
+				self.rate_limiter.drain()
+			self.instrumentation.record_request(method, path, time.time() - start, bytes_sent, 0,
+							    getattr(e, 'code', None), e)
+			raise
+
+		if kwargs.get('stream'):
+			bytes_received = int(response.headers.get('content-length') or 0)
+		else:
+			bytes_received = len(response.content or b'')
+
+		self.instrumentation.record_request(method, path, time.time() - start, bytes_sent,
+						    bytes_received, response.status_code)
+
+		return result
+
+	# Snapshot of the statistics recorded by the instrumentation
+	def stats(self):
+		return self.instrumentation.stats()
 
-		return requests.request(method, path, **options)
+	# Creating a request with the given arguments
+	def create_request(self, method, url, options):
+		return self.session.request(method, url, **options)
 
 	# Get response body in correct format
 	def get_body(self, response):
-		return ResponseHandler.get_body(response)
+		return ResponseHandler.get_body(response, self.codec)
 
 	# Set request body in correct format
 	def set_body(self, request):
-		return RequestHandler.set_body(request)
+		return RequestHandler.set_body(request, self.codec)
 
 	# Make dict keys all lowercase
 	def dict_key_lower(self, dic):
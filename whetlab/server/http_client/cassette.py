@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+
+import requests
+
+try:
+	import urlparse
+except ImportError:
+	import urllib.parse as urlparse
+
+# Query parameters and headers which hold credentials, and are never written to a cassette
+SECRET_PARAMS = frozenset(['access_token', 'client_id', 'client_secret'])
+
+# Response headers kept in a cassette
+RECORDED_HEADERS = ('content-type', 'etag', 'last-modified', 'retry-after')
+
+# Raised when a request cannot be answered from a cassette
+class CassetteError(Exception):
+	pass
+
+# Cassette holds request/response pairs (interactions), stored one per line in a JSON file
+#
+# Each interaction records the method, path and query of the request (without
+# credentials), its body, and the status, headers, content and elapsed time
+# of its response.
+class Cassette():
+
+	def __init__(self, path):
+		self.path = path
+		self.lock = threading.Lock()
+
+	def load(self):
+		with open(self.path) as f:
+			return [json.loads(line) for line in f if line.strip()]
+
+	def append(self, interaction):
+		line = json.dumps(interaction, sort_keys=True, separators=(',', ':'))
+
+		with self.lock:
+			with open(self.path, 'a') as f:
+				f.write(line + '\n')
+
+	# Key matching a request with its recorded interaction
+	#
+	# The query is kept as lists of text, as it reads back from the cassette,
+	# whether its keys and values were given as text, UTF-8 bytes or numbers.
+	@staticmethod
+	def request_key(method, url, params):
+		path = urlparse.urlparse(url).path
+		query = sorted([Cassette.text(k), Cassette.text(v)] for k, v in (params or {}).items()
+			       if k not in SECRET_PARAMS)
+		return [method.upper(), path, query]
+
+	@staticmethod
+	def text(value):
+		if isinstance(value, bytes):
+			return value.decode('utf-8', 'replace')
+
+		return u'%s' % (value,)
+
+	@staticmethod
+	def interaction(method, url, params, data, response):
+		content = response.content
+		if isinstance(content, bytes) and not isinstance(content, str):
+			content = content.decode('utf-8')
+
+		return {
+			'request': Cassette.request_key(method, url, params),
+			'body': data if isinstance(data, (str, type(u''))) else None,
+			'status': response.status_code,
+			'headers': dict((h, response.headers[h]) for h in RECORDED_HEADERS if h in response.headers),
+			'content': content,
+			'elapsed': response.elapsed.total_seconds()
+		}
+
+# Session recording every request it sends, along with its response, in a cassette
+class RecordingSession(requests.Session):
+
+	def __init__(self, cassette):
+		requests.Session.__init__(self)
+		self.cassette = cassette
+
+	def request(self, method, url, **kwargs):
+		# Hooks are run after the interaction is recorded, as they may raise on errors
+		hooks = kwargs.pop('hooks', {})
+
+		response = requests.Session.request(self, method, url, **kwargs)
+		self.cassette.append(Cassette.interaction(method, url, kwargs.get('params'),
+							  kwargs.get('data'), response))
+
+		return requests.hooks.dispatch_hook('response', hooks, response)
+
+# Session answering requests from the interactions of a cassette, without any network access
+#
+# A request is answered by the first unused interaction with the same method,
+# path and query, and raises a CassetteError when none is left.
+#
+# latency - Delay added to each response: None for none, a number of seconds,
+#           or 'recorded' for the time taken by the recorded response
+class ReplaySession(requests.Session):
+
+	def __init__(self, cassette, latency=None):
+		requests.Session.__init__(self)
+		self.latency = latency
+		self.lock = threading.Lock()
+		self.unused = cassette.load()
+
+	def request(self, method, url, **kwargs):
+		interaction = self.find(Cassette.request_key(method, url, kwargs.get('params')))
+
+		delay = interaction['elapsed'] if self.latency == 'recorded' else self.latency
+		if delay:
+			time.sleep(delay)
+
+		response = requests.models.Response()
+		response.status_code = interaction['status']
+		response.headers.update(interaction['headers'])
+		response._content = (interaction['content'] or u'').encode('utf-8')
+		response._content_consumed = True
+		response.encoding = 'utf-8'
+		response.url = url
+
+		return requests.hooks.dispatch_hook('response', kwargs.get('hooks', {}), response)
+
+	def find(self, key):
+		with self.lock:
+			for i, interaction in enumerate(self.unused):
+				if interaction['request'] == key:
+					return self.unused.pop(i)
+
+		raise CassetteError('No recorded interaction left for %s %s with query %s' % tuple(key))
@@ -0,0 +1,80 @@
+import json
+
+# Codec takes care of encoding and decoding JSON bodies
+#
+# Codecs are registered by name. The 'auto' codec is the first one installed
+# in Codec.PREFERENCE, so that an accelerated JSON library is used when one
+# is available, and the standard library otherwise.
+class Codec():
+
+	PREFERENCE = ['orjson', 'ujson', 'simplejson', 'json']
+
+	registry = {}
+
+	def __init__(self, name, dumps, loads):
+		self.name = name
+		self.encode = dumps
+		self.decode = loads
+
+	# Encode data, falling back to the standard library for types the codec doesn't handle
+	def dumps(self, data):
+		try:
+			return self.encode(data)
+		except (TypeError, OverflowError):
+			return json.dumps(data)
+
+	# Decode content, falling back to the standard library for what the codec rejects (e.g. NaN)
+	def loads(self, content):
+		try:
+			return self.decode(content)
+		except ValueError:
+			return json.loads(content)
+
+	@staticmethod
+	def register(codec):
+		Codec.registry[codec.name] = codec
+
+	# Get a codec from its name, or the preferred one available for 'auto'
+	@staticmethod
+	def get(name='auto'):
+		if isinstance(name, Codec):
+			return name
+
+		if name == 'auto':
+			for preferred in Codec.PREFERENCE:
+				if preferred in Codec.registry:
+					return Codec.registry[preferred]
+
+		if name not in Codec.registry:
+			raise ValueError("JSON codec '%s' is not available" % name)
+
+		return Codec.registry[name]
+
+Codec.register(Codec('json', json.dumps, json.loads))
+
+try:
+	import orjson
+	Codec.register(Codec('orjson',
+		lambda data: orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+		orjson.loads))
+except ImportError:
+	pass
+
+try:
+	import ujson
+
+	# ujson rounds floats when encoding, so it is only used for decoding.
+	# Older versions also round floats when decoding, unless asked not to.
+	try:
+		ujson.loads('0.1', precise_float=True)
+		Codec.register(Codec('ujson', json.dumps, lambda content: ujson.loads(content, precise_float=True)))
+	except TypeError:
+		Codec.register(Codec('ujson', json.dumps, ujson.loads))
+except ImportError:
+	pass
+
+try:
+	import simplejson
+	Codec.register(Codec('simplejson', simplejson.dumps, simplejson.loads))
+except ImportError:
+	pass
@@ -1,18 +1,28 @@
 from ..error import ClientError
-from .response_handler import ResponseHandler
+from .response import Response
 
 # ErrorHanlder takes care of selecting the error message from response body
 class ErrorHandler():
 
+	# Raise a ClientError if a response received from the server has an error status
+	#
+	# Usable as a requests response hook.
 	@staticmethod
 	def check_error(response, *args, **kwargs):
-		code = response.status_code
-		typ = response.headers.get('content-type')
+		ErrorHandler.check(Response.lazy(response))
 
-		if code in range(500, 600):
-                        raise ClientError('There was a problem with the server.', code)
-		elif code in range(400, 500):
-			body = ResponseHandler.get_body(response)
+	# Raise a ClientError if a Response has an error status
+	#
+	# The body is only decoded (once) for client errors, to take the message from it.
+	@staticmethod
+	def check(response):
+		code = response.code
+
+		if 500 <= code < 600:
+			raise ClientError('There was a problem with the server.', code, response.headers)
+		elif 400 <= code < 500:
+			typ = response.headers.get('content-type') or ''
+			body = response.body
 			message = ''
 
 			# If HTML, whole body is taken
@@ -29,4 +39,4 @@ class ErrorHandler():
 			if message == '':
 				message = 'Unable to understand the content type of response returned by request responsible for error'
 
-			raise ClientError(message, code)
+			raise ClientError(message, code, response.headers)
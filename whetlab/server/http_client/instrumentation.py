@@ -0,0 +1,127 @@
+import re
+import threading
+
+# Upper bounds (in seconds) of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+# Path segments which identify a resource, and are replaced by ':id' in endpoint names
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+# Instrumentation records the calls made by a client and what they cost
+#
+# Requests are recorded per endpoint (method and path, with ids replaced by
+# ':id'): number of calls and errors, latency histogram, bytes sent and
+# received. Retries are recorded per retried call, with the time spent
+# sleeping before them, and coalesced calls (which used the response of an
+# identical request in flight) per endpoint. stats() returns a snapshot of all of these, and the
+# callbacks added with add_callback are called with each recorded event.
+class Instrumentation():
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.callbacks = []
+		self.reset()
+
+	def reset(self):
+		with self.lock:
+			self.endpoints = {}
+			self.retries = {}
+			self.coalesced = {}
+
+	# Add a function called with a dict describing each request or retry
+	def add_callback(self, fn):
+		self.callbacks.append(fn)
+
+	def remove_callback(self, fn):
+		self.callbacks.remove(fn)
+
+	@staticmethod
+	def endpoint(method, path):
+		return method.upper() + ' ' + ID_SEGMENT.sub('/:id', path)
+
+	def record_request(self, method, path, latency, bytes_sent, bytes_received, code, error=None):
+		endpoint = self.endpoint(method, path)
+
+		with self.lock:
+			if endpoint not in self.endpoints:
+				self.endpoints[endpoint] = {
+					'calls': 0,
+					'errors': 0,
+					'latency': 0.0,
+					'max_latency': 0.0,
+					'histogram': [0] * len(LATENCY_BUCKETS),
+					'bytes_sent': 0,
+					'bytes_received': 0
+				}
+
+			stats = self.endpoints[endpoint]
+			stats['calls'] += 1
+			stats['errors'] += error is not None
+			stats['latency'] += latency
+			stats['max_latency'] = max(stats['max_latency'], latency)
+			stats['bytes_sent'] += bytes_sent
+			stats['bytes_received'] += bytes_received
+
+			for i, bound in enumerate(LATENCY_BUCKETS):
+				if latency <= bound:
+					stats['histogram'][i] += 1
+					break
+
+		self.notify({
+			'event': 'request',
+			'endpoint': endpoint,
+			'latency': latency,
+			'bytes_sent': bytes_sent,
+			'bytes_received': bytes_received,
+			'code': code,
+			'error': error
+		})
+
+	def record_retry(self, call, sleep, error):
+		with self.lock:
+			if call not in self.retries:
+				self.retries[call] = { 'retries': 0, 'sleep': 0.0 }
+
+			self.retries[call]['retries'] += 1
+			self.retries[call]['sleep'] += sleep
+
+		self.notify({
+			'event': 'retry',
+			'call': call,
+			'sleep': sleep,
+			'error': error
+		})
+
+	def record_coalesced(self, method, path):
+		endpoint = self.endpoint(method, path)
+
+		with self.lock:
+			self.coalesced[endpoint] = self.coalesced.get(endpoint, 0) + 1
+
+		self.notify({
+			'event': 'coalesced',
+			'endpoint': endpoint
+		})
+
+	# Errors of the callbacks must not disturb the requests being recorded
+	def notify(self, event):
+		for fn in list(self.callbacks):
+			try:
+				fn(event)
+			except Exception:
+				pass
+
+	# Snapshot of the statistics recorded so far
+	def stats(self):
+		with self.lock:
+			endpoints = {}
+			for endpoint, stats in self.endpoints.items():
+				stats = dict(stats)
+				stats['mean_latency'] = stats['latency'] / stats['calls']
+				stats['histogram'] = list(zip(LATENCY_BUCKETS, stats['histogram']))
+				endpoints[endpoint] = stats
+
+			retries = dict((call, dict(stats)) for call, stats in self.retries.items())
+			coalesced = dict(self.coalesced)
+
+		return { 'endpoints': endpoints, 'retries': retries, 'coalesced': coalesced }
@@ -0,0 +1,157 @@
+import codecs
+import json
+import re
+
+# Number of bytes read from the connection at a time
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = ' \t\n\r'
+
+# Strings, an opening quote without its closing one, and brackets
+TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{}]')
+
+# Numbers and literals, up to the first character which can't be part of them
+SCALAR = re.compile(r'[^\s,:\]}]*')
+
+# JSONStream decodes a JSON object read from a streamed response, one value at a time
+#
+# The items of one of the arrays in the object are yielded one by one by
+# iter_items, so that the whole body never needs to be held in memory. The
+# other values of the object are collected in the meta dict as they are read.
+#
+# Values are decoded by the given codec (see Codec), once their end has been
+# found, or by the standard library's scanner as they are read by default.
+class JSONStream():
+
+	def __init__(self, response, chunk_size=CHUNK_SIZE, codec=None):
+		self.response = response
+		self.chunks = response.iter_content(chunk_size)
+		self.decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+		self.scanner = json.JSONDecoder()
+		self.codec = None if codec is None or codec.name == 'json' else codec
+		self.buffer = u''
+		self.index = 0
+		self.exhausted = False
+		self.meta = {}
+
+	# Yield the items of the array found under key, then read the rest of the object
+	def iter_items(self, key):
+		try:
+			self.expect('{')
+
+			while self.next_char() != '}':
+				name = self.read_value()
+				self.expect(':')
+
+				if name == key:
+					for item in self.read_array():
+						yield item
+				else:
+					self.meta[name] = self.read_value()
+
+				if self.next_char() == ',':
+					self.index += 1
+		finally:
+			self.response.close()
+
+	# Yield the items of the array starting at the current position
+	def read_array(self):
+		self.expect('[')
+
+		while self.next_char() != ']':
+			yield self.read_value()
+
+			if self.next_char() == ',':
+				self.index += 1
+
+		self.index += 1
+
+	# Decode the value starting at the current position
+	#
+	# A value is only accepted once the character following it has been read,
+	# so that a number cut in two by the end of a chunk is not taken as complete.
+	def read_value(self):
+		self.next_char()
+
+		if self.codec is not None:
+			end = self.value_end()
+			value = self.codec.loads(self.buffer[self.index:end])
+			self.index = end
+			return value
+
+		while True:
+			try:
+				value, end = self.scanner.raw_decode(self.buffer, self.index)
+				if end < len(self.buffer) or self.exhausted:
+					self.index = end
+					return value
+			except ValueError:
+				if self.exhausted:
+					raise
+
+			self.read_chunk()
+
+	# Find where the value starting at the current position ends, reading chunks until it does
+	#
+	# As with the scanner, a number or literal only ends once the character
+	# following it has been read.
+	def value_end(self):
+		while True:
+			start = self.index
+			depth = 0
+
+			if self.buffer[start] in '{[':
+				for match in TOKENS.finditer(self.buffer, start):
+					token = match.group()
+					if token == '"':
+						break # The string goes on in the next chunk
+					if token in '{[':
+						depth += 1
+					elif token in ']}':
+						depth -= 1
+						if depth == 0:
+							return match.end()
+			elif self.buffer[start] == '"':
+				match = TOKENS.match(self.buffer, start)
+				if match.group() != '"':
+					return match.end()
+			else:
+				end = SCALAR.match(self.buffer, start).end()
+				if end < len(self.buffer) or self.exhausted:
+					return end
+
+			if self.exhausted:
+				raise ValueError('Unexpected end of JSON response')
+
+			self.read_chunk()
+
+	# Move to the next non-whitespace character and return it
+	def next_char(self):
+		while True:
+			while self.index < len(self.buffer) and self.buffer[self.index] in WHITESPACE:
+				self.index += 1
+
+			if self.index < len(self.buffer):
+				return self.buffer[self.index]
+
+			if self.exhausted:
+				raise ValueError('Unexpected end of JSON response')
+
+			self.read_chunk()
+
+	def expect(self, char):
+		if self.next_char() != char:
+			raise ValueError("Expected '%s' in JSON response at position %d" % (char, self.index))
+
+		self.index += 1
+
+	def read_chunk(self):
+		# Drop what has already been decoded
+		self.buffer = self.buffer[self.index:]
+		self.index = 0
+
+		try:
+			self.buffer += self.decoder.decode(next(self.chunks))
+		except StopIteration:
+			self.buffer += self.decoder.decode(b'', True)
+			self.exhausted = True
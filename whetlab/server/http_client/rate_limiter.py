@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+# TokenBucket spaces out requests so that they stay under a rate limit
+#
+# The bucket holds up to burst tokens and is refilled with rate tokens per
+# second. Each request takes a token, waiting for it if the bucket is empty.
+# Tokens are reserved before waiting, so that threads waiting together are
+# let through one after the other rather than all at once.
+#
+# Buckets are shared by all the clients of a process which use the same key
+# (see shared), so that their requests add up to the rate.
+class TokenBucket():
+
+	registry = {}
+	registry_lock = threading.Lock()
+
+	def __init__(self, rate, burst=None, clock=time):
+		if rate <= 0:
+			raise ValueError('The rate of a token bucket should be positive')
+
+		self.rate = float(rate)
+		self.burst = float(burst or max(1, rate))
+		self.clock = clock
+		self.lock = threading.Lock()
+		self.tokens = self.burst
+		self.stamp = clock.time()
+
+	# Get the bucket shared under key, creating it (or updating its rate) as needed
+	#
+	# With path set, the bucket is also shared with the other processes of
+	# the host through that file.
+	@staticmethod
+	def shared(key, rate, burst=None, path=None):
+		with TokenBucket.registry_lock:
+			bucket = TokenBucket.registry.get((key, path))
+
+			if bucket is None:
+				bucket = FileTokenBucket(path, rate, burst) if path else TokenBucket(rate, burst)
+				TokenBucket.registry[(key, path)] = bucket
+			else:
+				bucket.rate = float(rate)
+				bucket.burst = float(burst or max(1, rate))
+
+		return bucket
+
+	# Wait for a token, and return the time waited
+	def acquire(self):
+		wait = self.reserve()
+
+		if wait > 0:
+			self.clock.sleep(wait)
+
+		return wait
+
+	# Take a token and return how long to wait before it is available
+	def reserve(self):
+		with self.lock:
+			self.tokens, self.stamp, wait = self.take(self.tokens, self.stamp)
+
+		return wait
+
+	# Empty the bucket, after the server reported that the limit was hit
+	def drain(self):
+		with self.lock:
+			self.tokens, self.stamp = self.empty(self.tokens, self.stamp)
+
+	# New state of the bucket after taking a token, and the time to wait for it
+	def take(self, tokens, stamp):
+		now = self.clock.time()
+		tokens = self.refill(tokens, stamp, now) - 1
+
+		return tokens, now, max(0., -tokens / self.rate)
+
+	# New state of the bucket once emptied, keeping the tokens already reserved
+	def empty(self, tokens, stamp):
+		now = self.clock.time()
+
+		return min(0., self.refill(tokens, stamp, now)), now
+
+	def refill(self, tokens, stamp, now):
+		return min(self.burst, tokens + (now - stamp) * self.rate)
+
+# TokenBucket whose state is kept in a file, to be shared by the processes of a host
+#
+# The file holds the number of tokens and the time they were counted, and is
+# locked with flock while it is updated.
+class FileTokenBucket(TokenBucket):
+
+	def __init__(self, path, rate, burst=None, clock=time):
+		if fcntl is None:
+			raise ValueError('Rate limits shared between processes need fcntl, which is not available')
+
+		TokenBucket.__init__(self, rate, burst, clock)
+		self.path = path
+
+	def reserve(self):
+		return self.update(self.take)[2]
+
+	def drain(self):
+		self.update(self.empty)
+
+	# Apply fn to the state stored in the file, and store the state it returns
+	def update(self, fn):
+		with self.lock:
+			fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+			try:
+				fcntl.flock(fd, fcntl.LOCK_EX)
+
+				try:
+					tokens, stamp = [float(v) for v in os.read(fd, 64).split()]
+				except ValueError:
+					tokens, stamp = self.burst, self.clock.time()
+
+				state = fn(tokens, stamp)
+
+				os.lseek(fd, 0, os.SEEK_SET)
+				os.ftruncate(fd, 0)
+				os.write(fd, '%r %r' % (state[0], state[1]))
+			finally:
+				os.close(fd)
+
+		return state
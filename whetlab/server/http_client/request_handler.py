@@ -1,5 +1,6 @@
 import urllib
-import json
+
+from .codec import Codec
 
 # RequestHandler takes care of encoding the request body into format given by options
 class RequestHandler():
@@ -35,12 +36,12 @@ class RequestHandler():
 		return pairs
 
 	@staticmethod
-	def set_body(request):
+	def set_body(request, codec=None):
 		typ = request['request_type'] if 'request_type' in request else 'json'
 
 		# Encoding request body into JSON format
 		if typ == 'json':
-			request['data'] = json.dumps(request['data'])
+			request['data'] = (codec or Codec.get()).dumps(request['data'])
 			request['headers']['content-type'] = 'application/json'
 
 		# Encoding body into form-urlencoded format
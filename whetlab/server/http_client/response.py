@@ -1,6 +1,51 @@
+import copy
+
+from .response_handler import ResponseHandler
+
+# Marks a body which hasn't been decoded yet
+NOT_DECODED = object()
+
 # Response object contains the response returned by the client
-class Response():
+#
+# A Response made with lazy keeps the response received from the server, and
+# only decodes its body when it is first read, once. The response received
+# is then released, so that its content isn't kept along with the decoded body.
+class Response(object):
+
+	__slots__ = ('code', 'headers', 'raw', 'codec', '_body')
+
 	def __init__(self, body, code, headers):
-		self.body = body
+		self._body = body
 		self.code = code
 		self.headers = headers
+		self.raw = None
+		self.codec = None
+
+	@staticmethod
+	def lazy(raw, codec=None):
+		response = Response(NOT_DECODED, raw.status_code, raw.headers)
+		response.raw = raw
+		response.codec = codec
+		return response
+
+	@property
+	def body(self):
+		if self._body is NOT_DECODED:
+			self._body = ResponseHandler.get_body(self.raw, self.codec)
+			self.raw = None
+			self.codec = None
+
+		return self._body
+
+	@body.setter
+	def body(self, body):
+		self._body = body
+
+	# Decode the body now, e.g. before the response is shared between threads
+	def decode(self):
+		self.body
+		return self
+
+	# Copies hold their decoded body, but not the response received from the server
+	def __deepcopy__(self, memo):
+		return Response(copy.deepcopy(self.body, memo), self.code, copy.deepcopy(self.headers, memo))
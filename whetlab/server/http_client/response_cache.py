@@ -0,0 +1,73 @@
+import collections
+import threading
+
+# ResponseCache keeps the last responses to GET requests, along with their validators
+#
+# The cached responses are used to send conditional requests (If-None-Match,
+# If-Modified-Since), and are returned in place of the body when the server
+# answers that they are still current (304 Not Modified). At most max_entries
+# responses are kept, the least recently used ones being dropped first.
+#
+# The responses are kept as received, and decoded again for each call which
+# gets them, so that callers never share a body they might modify.
+class ResponseCache():
+
+	def __init__(self, max_entries):
+		self.max_entries = max_entries
+		self.entries = collections.OrderedDict()
+		self.lock = threading.Lock()
+
+	@staticmethod
+	def key(url, params):
+		return (url, tuple(sorted(params.items())))
+
+	def get(self, key):
+		with self.lock:
+			entry = self.entries.pop(key, None)
+			if entry is not None:
+				self.entries[key] = entry
+
+			return entry
+
+	# Keep the response if it can be revalidated, forget the previous one otherwise
+	def store(self, key, response):
+		etag = response.headers.get('etag')
+		last_modified = response.headers.get('last-modified')
+
+		with self.lock:
+			self.entries.pop(key, None)
+
+			if etag is None and last_modified is None:
+				return
+
+			self.entries[key] = CacheEntry(etag, last_modified, response)
+
+			while len(self.entries) > self.max_entries:
+				self.entries.popitem(last=False)
+
+	def clear(self):
+		with self.lock:
+			self.entries.clear()
+
+	def __len__(self):
+		return len(self.entries)
+
+# Cached response, along with its validators
+class CacheEntry():
+
+	def __init__(self, etag, last_modified, response):
+		self.etag = etag
+		self.last_modified = last_modified
+		self.response = response
+
+	# Headers making a request conditional on the response having changed
+	def conditional_headers(self):
+		headers = {}
+
+		if self.etag is not None:
+			headers['if-none-match'] = self.etag
+
+		if self.last_modified is not None:
+			headers['if-modified-since'] = self.last_modified
+
+		return headers
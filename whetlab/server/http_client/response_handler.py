@@ -1,13 +1,14 @@
+from .codec import Codec
+
 # ResponseHandler takes care of decoding the response body into suitable type
 class ResponseHandler():
 
 	@staticmethod
-	def get_body(response):
+	def get_body(response, codec=None):
 		typ = response.headers.get('content-type')
-		body = response.text
 
 		# Response body is in JSON
-		if typ.find('json') != -1 and body:
-			body = response.json()
+		if typ.find('json') != -1 and response.content:
+			return (codec or Codec.get()).loads(response.content)
 
-		return body
+		return response.text
@@ -0,0 +1,65 @@
+import copy
+import threading
+
+from ..executor import Future
+
+# SingleFlight coalesces identical calls made at the same time
+#
+# The first call made with a key runs, and the calls made with the same key
+# while it is in flight wait for it and receive a deep copy of its result (or
+# its exception), so that no caller can modify what another one receives.
+# When other calls waited for it, the first one receives a copy as well, and
+# the result itself is only read, by the threads copying it.
+#
+# The result is copied by several threads at once, so it must not change
+# when read: a lazy Response must be decoded by fn before it is returned.
+class SingleFlight():
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.calls = {}
+		self.followers = {}
+
+	# Key of a GET request, from its url, query and headers
+	@staticmethod
+	def key(url, params, headers):
+		return (url, repr(sorted((params or {}).items())), repr(sorted((headers or {}).items())))
+
+	# Run fn unless a call with the same key is in flight, and return its result
+	#
+	# on_coalesced is called when the result of a call in flight is used instead.
+	def do(self, key, fn, on_coalesced=None):
+		with self.lock:
+			future = self.calls.get(key)
+			leader = future is None
+			if leader:
+				future = self.calls[key] = Future()
+				self.followers[key] = 0
+			else:
+				self.followers[key] += 1
+
+		if not leader:
+			if on_coalesced is not None:
+				on_coalesced()
+			return copy.deepcopy(future.result())
+
+		try:
+			value = fn()
+		except Exception as e:
+			self.finish(key)
+			future.set_exception(e)
+			raise
+
+		# No call can join once the key is removed, so the result is shared only
+		# with the followers counted here
+		if self.finish(key):
+			future.set_result(value)
+			return copy.deepcopy(value)
+		future.set_result(value)
+		return value
+
+	# Remove the call in flight with key, and return how many calls waited for it
+	def finish(self, key):
+		with self.lock:
+			del self.calls[key]
+			return self.followers.pop(key)
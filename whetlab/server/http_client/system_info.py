@@ -0,0 +1,57 @@
+import os
+import platform
+import threading
+import time
+
+# SystemInfo takes care of the host information which is sent along with request bodies
+#
+# The static host information is computed once per process, while the load
+# average is sampled at most once every LOAD_INTERVAL seconds.
+class SystemInfo():
+
+	# Minimum number of seconds between two samples of the load average
+	LOAD_INTERVAL = 10.0
+
+	lock = threading.Lock()
+	sys_info = None
+	load_info = None
+	load_time = None
+
+	@staticmethod
+	def get_sys_info():
+		if SystemInfo.sys_info is None:
+			try:
+				SystemInfo.sys_info = list(platform.uname())
+			except:
+				SystemInfo.sys_info = False
+
+		return SystemInfo.sys_info or None
+
+	@staticmethod
+	def get_load_info():
+		now = time.time()
+
+		with SystemInfo.lock:
+			if SystemInfo.load_time is None or now - SystemInfo.load_time >= SystemInfo.LOAD_INTERVAL:
+				try:
+					SystemInfo.load_info = os.getloadavg()
+				except:
+					SystemInfo.load_info = None
+				SystemInfo.load_time = now
+
+			return SystemInfo.load_info
+
+	# Copy of body with the host information added to it
+	@staticmethod
+	def add_to(body):
+		body = dict(body)
+
+		sys_info = SystemInfo.get_sys_info()
+		if sys_info is not None:
+			body['sys_info'] = sys_info
+
+		load_info = SystemInfo.get_load_info()
+		if load_info is not None:
+			body['load_info'] = load_info
+
+		return body
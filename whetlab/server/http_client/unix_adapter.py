@@ -0,0 +1,80 @@
+import socket
+import threading
+
+import requests
+
+try:
+	import urlparse
+except ImportError:
+	import urllib.parse as urlparse
+
+from requests.packages.urllib3.connection import HTTPConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool
+
+# Header carrying the server a request is meant for, when it is sent to a broker
+UPSTREAM_HEADER = 'x-whetlab-upstream'
+
+# Connection to a server listening on a Unix socket
+class UnixConnection(HTTPConnection):
+
+	def __init__(self, path, timeout=None):
+		HTTPConnection.__init__(self, 'localhost')
+		self.path = path
+		self.timeout = timeout
+
+	def connect(self):
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		if self.timeout is None or isinstance(self.timeout, (int, float)):
+			sock.settimeout(self.timeout)
+		sock.connect(self.path)
+		self.sock = sock
+
+# Pool of connections to a server listening on a Unix socket
+class UnixConnectionPool(HTTPConnectionPool):
+
+	def __init__(self, path, maxsize):
+		HTTPConnectionPool.__init__(self, 'localhost', maxsize=maxsize)
+		self.path = path
+
+	def _new_conn(self):
+		return UnixConnection(self.path, self.timeout.connect_timeout)
+
+# UnixAdapter sends all the requests of a session to a broker listening on a Unix socket
+#
+# The broker forwards each request to the server it was meant for, which is
+# given by the UPSTREAM_HEADER header (scheme and host of the request's url).
+class UnixAdapter(requests.adapters.HTTPAdapter):
+
+	def __init__(self, path, pool_size, max_retries):
+		self.path = path
+		self.pool_size = pool_size
+		self.pool = None
+		self.pool_lock = threading.Lock()
+		requests.adapters.HTTPAdapter.__init__(self, pool_connections=1, pool_maxsize=pool_size,
+						       max_retries=max_retries)
+
+	def get_connection(self, url, proxies=None):
+		with self.pool_lock:
+			if self.pool is None:
+				self.pool = UnixConnectionPool(self.path, self.pool_size)
+
+			return self.pool
+
+	def request_url(self, request, proxies):
+		return request.path_url
+
+	def add_headers(self, request, **kwargs):
+		url = urlparse.urlparse(request.url)
+		request.headers[UPSTREAM_HEADER] = '%s://%s' % (url.scheme, url.netloc)
+
+	# Certificates are checked by the broker, when it connects to the server
+	def cert_verify(self, conn, url, verify, cert):
+		pass
+
+	def close(self):
+		requests.adapters.HTTPAdapter.close(self)
+
+		with self.pool_lock:
+			if self.pool is not None:
+				self.pool.close()
+				self.pool = None
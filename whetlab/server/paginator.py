@@ -0,0 +1,86 @@
+import threading
+
+try:
+	import urlparse
+except ImportError:
+	import urllib.parse as urlparse
+
+# Paginator iterates over the items of a paginated collection, one page at a time
+#
+# Each page is a dict with its items under 'results' and the url of the next
+# page (or None) under 'next'. The query of the next page is read from that
+# url, so that the server decides how pages follow each other.
+#
+# With an executor, the next page is requested by one of its workers as soon
+# as a page is received, so that it is usually there when its items are needed.
+# Only the current and the next pages are held in memory at any time.
+#
+# fetch - Function getting the page with the given query (a dict), and returning its body
+# query - Query of the first page
+# page_size - Number of items per page, or None for the default of the server
+# executor - Executor requesting the next page while the items of the current one
+#            are consumed (see Executor), or None to request each page when its items are needed
+class Paginator():
+
+	def __init__(self, fetch, query = {}, page_size = None, executor = None):
+		self.fetch = fetch
+		self.query = dict(query)
+		self.executor = executor
+
+		if page_size is not None:
+			self.query['page_size'] = page_size
+
+	def __iter__(self):
+		for page in self.pages():
+			for item in page['results']:
+				yield item
+
+	# Iterate over the pages themselves
+	#
+	def pages(self):
+		page = self.fetch(self.query)
+
+		while True:
+			query = self.next_query(page)
+
+			if query is None:
+				yield page
+				return
+
+			next_page = self.background(query) if self.executor is not None else None
+
+			yield page
+
+			page = next_page() if next_page is not None else self.fetch(query)
+
+	# Query of the page following the given one, or None if it is the last one
+	#
+	def next_query(self, page):
+		if not page.get('next'):
+			return None
+
+		query = dict(self.query)
+		query.update(urlparse.parse_qsl(urlparse.urlparse(page['next']).query))
+
+		return query
+
+	# Start fetching a page with the executor, and return a function returning it
+	#
+	# If no worker has started fetching the page by the time it is needed, it
+	# is fetched by the caller instead, so that it never waits for a busy executor.
+	def background(self, query):
+		started = threading.Lock()
+
+		def run():
+			if started.acquire(False):
+				return self.fetch(query)
+
+		future = self.executor.submit(run)
+
+		def result():
+			if started.acquire(False):
+				return self.fetch(query)
+
+			return future.result()
+
+		return result
@@ -0,0 +1,488 @@
+"""
+Local stand-in for the Whetlab REST server, to test and load-test the client without the real server.
+
+It implements, in memory, the endpoints used by :mod:`whetlab.server.api`:
+``/alpha/experiments``, ``/alpha/settings``, ``/alpha/results`` and
+``/alpha/experiments/:id/suggest/``, under an optional ``/api`` prefix.
+Suggestions are drawn at random within the bounds of each parameter.
+
+Its latency, and the rate of errors it answers with (429, 503 and other 5xx,
+with a ``Retry-After`` header), are configurable, and experiments can be
+seeded with any number of results.
+
+It can be started from Python::
+
+    with StandinServer(latency=0.05, error_rate=0.01) as server:
+        experiment = whetlab.Experiment(name, access_token='token', parameters=..., outcome=...,
+                                        client_options={'base': server.url})
+
+or from the command line::
+
+    python -m whetlab.standin --port 8000 --latency 0.05 --seed-experiment 'Load test' --seed-results 20000
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import BaseHTTPServer
+import SocketServer
+
+try:
+    import urlparse
+except ImportError:
+    import urllib.parse as urlparse
+
+import whetlab
+
+# Default number of items per page, when the request doesn't give one
+DEFAULT_PAGE_SIZE = 10
+
+# Maximum length of an experiment's name
+MAX_NAME_LENGTH = 500
+
+class StandinError(Exception):
+    """
+    Error answered to a request, with its HTTP status.
+    """
+
+    def __init__(self, code, message):
+        super(StandinError, self).__init__(message)
+        self.code = code
+        self.message = message
+
+class StandinStore:
+    """
+    In-memory state of the stand-in server: experiments, settings and results.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.ids = {'experiment':0, 'setting':0, 'result':0, 'variable':0}
+        self.experiments = {}
+        self.settings = {}
+        self.results = {}
+        self.modified = 0
+
+    def next_id(self, kind):
+        self.ids[kind] += 1
+        return self.ids[kind]
+
+    def touch(self, result):
+        # Modification times, in microseconds, never repeat nor go backwards
+        self.modified = max(self.modified + 1, int(time.time() * 1e6))
+        result['modified'] = self.modified
+
+    def experiment(self, id):
+        if id not in self.experiments:
+            raise StandinError(404, 'Not found')
+        return self.experiments[id]
+
+    def result(self, id):
+        if id not in self.results:
+            raise StandinError(404, 'Not found')
+        return self.results[id]
+
+    def create_experiment(self, name, description, settings):
+        if not name or len(name) > MAX_NAME_LENGTH:
+            raise StandinError(400, 'Experiment name must have between 1 and %d characters.' % MAX_NAME_LENGTH)
+        if any(e['name'] == name for e in self.experiments.values()):
+            raise StandinError(400, 'An experiment with this name already exists.')
+
+        id = self.next_id('experiment')
+        self.experiments[id] = {'id':id, 'name':name, 'description':description or '',
+                                'created':time.time()}
+        for setting in settings or []:
+            self.add_setting(dict(setting, experiment=id))
+        return self.experiments[id]
+
+    def delete_experiment(self, id):
+        self.experiment(id)
+        del self.experiments[id]
+        for setting in [s for s in self.settings.values() if s['experiment'] == id]:
+            del self.settings[setting['id']]
+        for result in [r for r in self.results.values() if r['experiment'] == id]:
+            del self.results[result['id']]
+
+    def add_setting(self, setting):
+        setting = dict(setting)
+        setting['id'] = self.next_id('setting')
+        setting['experiment'] = int(setting['experiment'])
+        setting.setdefault('isOutput', False)
+        setting.setdefault('size', 1)
+        if setting.get('type') != 'enum':
+            for prop, default in [('units', 'Reals'), ('scale', 'linear'), ('min', None), ('max', None)]:
+                setting.setdefault(prop, default)
+        self.settings[setting['id']] = setting
+        return setting
+
+    def settings_of(self, experiment):
+        return sorted([s for s in self.settings.values() if s['experiment'] == experiment],
+                      key=lambda s: s['id'])
+
+    def add_result(self, experiment, variables, user_proposed=True, description=''):
+        id = self.next_id('result')
+        result = {'id':id, 'experiment':experiment, 'userProposed':user_proposed,
+                  'description':description or '', 'variables':[]}
+        names_to_settings = dict((s['name'], s['id']) for s in self.settings_of(experiment))
+        for var in variables:
+            result['variables'].append({'id':self.next_id('variable'), 'result':id,
+                                        'setting':var.get('setting', names_to_settings.get(var['name'])),
+                                        'name':var['name'], 'value':var.get('value')})
+        self.touch(result)
+        self.results[id] = result
+        return result
+
+    def update_result(self, id, variables):
+        result = self.result(id)
+        values = dict((var['name'], var.get('value')) for var in variables)
+        for var in result['variables']:
+            if var['name'] in values:
+                var['value'] = values.pop(var['name'])
+        for name, value in values.items():
+            result['variables'].append({'id':self.next_id('variable'), 'result':id,
+                                        'setting':None, 'name':name, 'value':value})
+        self.touch(result)
+        return result
+
+    def suggest(self, experiment):
+        self.experiment(experiment)
+        variables = []
+        for setting in self.settings_of(experiment):
+            value = None if setting['isOutput'] else random_value(setting)
+            variables.append({'setting':setting['id'], 'name':setting['name'], 'value':value})
+        return self.add_result(experiment, variables, user_proposed=False)
+
+    def seed(self, name, n_results, parameters=None, description=''):
+        """
+        Create an experiment with ``n_results`` completed results.
+        """
+
+        parameters = parameters or {'x':{'type':'float', 'min':0., 'max':1.},
+                                    'y':{'type':'float', 'min':0., 'max':1.}}
+        settings = [dict(p, name=k) for k, p in parameters.items()]
+        settings.append({'name':'outcome', 'type':'float', 'min':-100., 'max':100., 'isOutput':True})
+
+        with self.lock:
+            experiment = self.create_experiment(name, description, settings)
+            for i in range(n_results):
+                result = self.suggest(experiment['id'])
+                self.update_result(result['id'], [{'name':'outcome', 'value':random.gauss(0, 1)}])
+        return experiment
+
+def random_value(setting):
+    """
+    Draw a value at random for a parameter, within its bounds.
+    """
+
+    def draw():
+        if setting['type'] == 'enum':
+            return random.choice(setting['options'])
+        if setting['type'] == 'integer':
+            return random.randint(int(setting['min']), int(setting['max']))
+        return random.uniform(setting['min'], setting['max'])
+
+    if setting.get('size', 1) > 1:
+        return [draw() for i in range(setting['size'])]
+    return draw()
+
+class StandinHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answers the requests of the client, from the server's store.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    ROUTES = [
+        ('GET',    r'/alpha/experiments/?$',                'get_experiments'),
+        ('POST',   r'/alpha/experiments/?$',                'create_experiment'),
+        ('GET',    r'/alpha/experiments/(\d+)/?$',          'get_experiment'),
+        ('DELETE', r'/alpha/experiments/(\d+)/?$',          'delete_experiment'),
+        ('POST',   r'/alpha/experiments/(\d+)/suggest/?$',  'suggest'),
+        ('GET',    r'/alpha/settings/?$',                   'get_settings'),
+        ('POST',   r'/alpha/settings/?$',                   'add_setting'),
+        ('GET',    r'/alpha/results/?$',                    'get_results'),
+        ('POST',   r'/alpha/results/?$',                    'add_result'),
+        ('GET',    r'/alpha/results/(\d+)/?$',              'get_result'),
+        ('PATCH',  r'/alpha/results/(\d+)/?$',              'update_result'),
+        ('PUT',    r'/alpha/results/(\d+)/?$',              'update_result'),
+        ('DELETE', r'/alpha/results/(\d+)/?$',              'delete_result'),
+        ('GET',    r'/alpha/variables/?$',                  'get_variables'),
+    ]
+
+    def handle_request(self):
+        server = self.server.standin
+        parsed = urlparse.urlparse(self.path)
+        path = re.sub(r'^/api(?=/)', '', parsed.path)
+        self.query = dict(urlparse.parse_qsl(parsed.query))
+
+        length = int(self.headers.get('content-length') or 0)
+        content = self.rfile.read(length) if length else ''
+
+        server.wait()
+        with server.lock:
+            server.requests += 1
+
+        try:
+            error = server.draw_error()
+            if error is not None:
+                raise error
+
+            self.check_token()
+            body = json.loads(content) if content else {}
+
+            for method, pattern, name in self.ROUTES:
+                match = re.match(pattern, path)
+                if match and method == self.command:
+                    args = [int(arg) for arg in match.groups()]
+                    with server.store.lock:
+                        self.respond(200 if method != 'POST' else 201, getattr(self, name)(body, *args))
+                    return
+
+            raise StandinError(404, 'Not found')
+        except StandinError as e:
+            self.respond(e.code, {'error':e.message}, {'retry-after':str(server.retry_after)}
+                         if e.code in (429, 503) else {})
+        except (ValueError, KeyError, TypeError) as e:
+            self.respond(400, {'error':'Bad request: %s' % e})
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = handle_request
+
+    def check_token(self):
+        if not self.server.standin.require_token:
+            return
+        authorization = self.headers.get('authorization') or ''
+        token = authorization[len('Bearer '):].strip() if authorization.startswith('Bearer ') else ''
+        if not (token or self.query.get('access_token')):
+            raise StandinError(401, 'Invalid token.')
+
+    def respond(self, code, body, headers={}):
+        content = json.dumps(body)
+        etag = '"%s"' % hashlib.md5(content).hexdigest()
+
+        if self.command == 'GET' and code == 200 and self.headers.get('if-none-match') == etag:
+            code, content = 304, ''
+
+        self.send_response(code)
+        if content:
+            self.send_header('content-type', 'application/json')
+        if self.command == 'GET' and code in (200, 304):
+            self.send_header('etag', etag)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.send_header('content-length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def page(self, items):
+        page = int(self.query.get('page', 1))
+        page_size = int(self.query.get('page_size', DEFAULT_PAGE_SIZE))
+        start = (page - 1) * page_size
+
+        def link(page):
+            query = dict(self.query, page=page)
+            return 'http://%s%s?%s' % (self.headers.get('host'), urlparse.urlparse(self.path).path,
+                                       '&'.join('%s=%s' % item for item in sorted(query.items())))
+
+        return {'count':len(items),
+                'next':link(page + 1) if start + page_size < len(items) else None,
+                'previous':link(page - 1) if page > 1 else None,
+                'results':items[start:start + page_size]}
+
+    def get_experiments(self, body):
+        experiments = sorted(self.server.standin.store.experiments.values(), key=lambda e: e['id'])
+        if 'id' in self.query:
+            experiments = [e for e in experiments if e['id'] == int(self.query['id'])]
+        if 'name' in self.query and self.server.standin.name_filter:
+            experiments = [e for e in experiments if e['name'] == self.query['name']]
+        return self.page(experiments)
+
+    def create_experiment(self, body):
+        return self.server.standin.store.create_experiment(body.get('name'), body.get('description'),
+                                                           body.get('settings'))
+
+    def get_experiment(self, body, id):
+        return self.server.standin.store.experiment(id)
+
+    def delete_experiment(self, body, id):
+        self.server.standin.store.delete_experiment(id)
+        return {}
+
+    def suggest(self, body, id):
+        return {'id':self.server.standin.store.suggest(id)['id']}
+
+    def get_settings(self, body):
+        return self.page(self.server.standin.store.settings_of(int(self.query['experiment'])))
+
+    def add_setting(self, body):
+        self.server.standin.store.experiment(int(body['experiment']))
+        return self.server.standin.store.add_setting(body)
+
+    def get_results(self, body):
+        store = self.server.standin.store
+        results = sorted(store.results.values(), key=lambda r: r['id'])
+        if 'experiment' in self.query:
+            results = [r for r in results if r['experiment'] == int(self.query['experiment'])]
+        if self.server.standin.id_filters:
+            if 'id__gt' in self.query:
+                results = [r for r in results if r['id'] > int(self.query['id__gt'])]
+            if 'id__lte' in self.query:
+                results = [r for r in results if r['id'] <= int(self.query['id__lte'])]
+        if self.server.standin.modified_filter and 'modified__gte' in self.query:
+            results = [r for r in results if r['modified'] >= int(self.query['modified__gte'])]
+        return self.page(results)
+
+    def add_result(self, body):
+        store = self.server.standin.store
+        store.experiment(int(body['experiment']))
+        return store.add_result(int(body['experiment']), body['variables'],
+                                body.get('userProposed', True), body.get('description'))
+
+    def get_result(self, body, id):
+        return self.server.standin.store.result(id)
+
+    def update_result(self, body, id):
+        return self.server.standin.store.update_result(id, body.get('variables', []))
+
+    def delete_result(self, body, id):
+        self.server.standin.store.result(id)
+        del self.server.standin.store.results[id]
+        return {}
+
+    def get_variables(self, body):
+        return self.page([])
+
+    def log_message(self, *args):
+        pass
+
+class ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+class StandinServer:
+    """
+    Local stand-in for the Whetlab REST server.
+
+    :param host: Host to listen on (default: ``'127.0.0.1'``).
+    :type host: str
+    :param port: Port to listen on, ``0`` for any free port (default: ``0``).
+    :type port: int
+    :param latency: Time taken to answer each request, in seconds, either fixed or a ``(min, max)`` range (default: ``0``).
+    :type latency: float or tuple
+    :param error_rate: Fraction of the requests answered with an error (default: ``0``).
+    :type error_rate: float
+    :param error_codes: HTTP statuses of these errors, drawn uniformly (default: ``(429, 503, 500)``).
+    :type error_codes: tuple
+    :param retry_after: Value of the ``Retry-After`` header sent with 429 and 503 errors, in seconds (default: ``1``).
+    :type retry_after: int
+    :param require_token: Whether requests without an access token are rejected (default: ``True``).
+    :type require_token: bool
+    :param name_filter: Whether experiments can be filtered by name, with the query parameter ``name`` (default: ``True``).
+    :type name_filter: bool
+    :param id_filters: Whether results can be filtered by ID, with the query parameters ``id__gt`` and ``id__lte`` (default: ``True``).
+    :type id_filters: bool
+    :param modified_filter: Whether results can be filtered by modification time, with the query parameter ``modified__gte`` (default: ``True``).
+    :type modified_filter: bool
+
+    :ivar url: Base URL of the server, to give as the client option ``'base'``.
+    :type url: str
+    :ivar store: In-memory state of the server.
+    :type store: StandinStore
+    :ivar requests: Number of requests received so far.
+    :type requests: int
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, error_rate=0,
+                 error_codes=(429, 503, 500), retry_after=1, require_token=True, name_filter=True,
+                 id_filters=True, modified_filter=True):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self.retry_after = retry_after
+        self.require_token = require_token
+        self.name_filter = name_filter
+        self.id_filters = id_filters
+        self.modified_filter = modified_filter
+        self.store = StandinStore()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.thread = None
+
+        self.httpd = ThreadingHTTPServer((host, port), StandinHandler)
+        self.httpd.standin = self
+        self.url = 'http://%s:%d' % self.httpd.server_address
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """
+        Serve requests from a background thread.
+        """
+
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        """
+        Serve requests from the current thread, until interrupted.
+        """
+
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """
+        Stop serving requests and close the server's socket.
+        """
+
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def wait(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            latency = random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def draw_error(self):
+        if self.error_rate and random.random() < self.error_rate:
+            return StandinError(random.choice(self.error_codes), 'Error injected by the stand-in server.')
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local stand-in for the Whetlab REST server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, nargs='+', default=[0],
+                        help='seconds taken by each request, or a min and max')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered with an error')
+    parser.add_argument('--error-codes', type=int, nargs='+', default=[429, 503, 500])
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--seed-experiment', help='name of an experiment to create with --seed-results results')
+    parser.add_argument('--seed-results', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    latency = args.latency[0] if len(args.latency) == 1 else tuple(args.latency[:2])
+    server = StandinServer(args.host, args.port, latency, args.error_rate,
+                           tuple(args.error_codes), args.retry_after)
+    if args.seed_experiment:
+        server.store.seed(args.seed_experiment, args.seed_results)
+
+    print 'Whetlab stand-in server listening on %s' % server.url
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()